@@ -0,0 +1,119 @@
+"""Runs the micro-benchmarks and compares them with the stored baseline.
+
+    python -m benchmarks                  # report the change against the baseline
+    python -m benchmarks --compare        # also exit 1 on regression
+    python -m benchmarks --save           # record a new baseline
+    python -m benchmarks -k hotkey        # only cases whose name contains "hotkey"
+
+Timings are absolute, so a baseline only predicts runs on the machine that
+recorded it. The gate is therefore opt-in: use ``--compare`` against a baseline
+saved on the same machine, e.g. before and after a change.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from . import fakes
+
+fakes.install()
+
+from .cases import CASES  # noqa: E402
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+DEFAULT_THRESHOLD = 0.25
+TARGET_SECONDS = 0.05
+
+
+def measure(name: str, repeats: int) -> Dict[str, float]:
+    unit, setup = CASES[name]
+    operation, units = setup()
+    operation()
+    # Calibrate so each sample runs for roughly TARGET_SECONDS.
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            operation()
+        elapsed = time.perf_counter() - started
+        if elapsed >= TARGET_SECONDS or loops >= 1 << 16:
+            break
+        loops *= 2
+    samples: List[float] = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(loops):
+            operation()
+        samples.append((time.perf_counter() - started) / (loops * units))
+    return {"unit": unit, "median": statistics.median(samples), "min": min(samples)}
+
+
+def _format(seconds: float) -> str:
+    for scale, suffix in ((1.0, "s"), (1e-3, "ms"), (1e-6, "us")):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {suffix}"
+    return f"{seconds / 1e-9:8.0f} ns"
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    """Returns the cases slower than the baseline by more than ``threshold``.
+
+    The fastest sample is compared rather than the median, as it is the least
+    sensitive to scheduler noise.
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference and result["min"] > reference["min"] * (1 + threshold):
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    parser.add_argument("-k", dest="pattern", default="", help="only run cases whose name contains PATTERN")
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown, e.g. 0.25 for 25%%")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="exit 1 when a case regresses past the threshold")
+    args = parser.parse_args(argv)
+
+    stored = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else {}
+    baseline = stored.get("cases", {})
+    results = {}
+    for name in CASES:
+        if args.pattern not in name:
+            continue
+        results[name] = result = measure(name, args.repeats)
+        reference = baseline.get(name)
+        change = f"{result['min'] / reference['min'] - 1:+7.1%}" if reference else "    new"
+        print(f"{name:<20} {_format(result['median'])}/{result['unit']:<13} {change}")
+
+    if args.save:
+        stored["machine"] = f"{platform.system()} {platform.machine()} / Python {platform.python_version()}"
+        stored["cases"] = {**baseline, **results}
+        args.baseline.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not args.compare:
+        return 0
+    machine = f"{platform.system()} {platform.machine()} / Python {platform.python_version()}"
+    if stored.get("machine") not in (None, machine):
+        print(f"Baseline was recorded on {stored['machine']}; timings may not be comparable", file=sys.stderr)
+    regressions = compare(results, baseline, args.threshold)
+    for name in regressions:
+        print(f"REGRESSION: {name} is more than {args.threshold:.0%} slower than the baseline", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
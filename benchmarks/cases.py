@@ -0,0 +1,270 @@
+"""Benchmark cases for the latency-sensitive paths.
+
+Each case is a setup function returning ``(operation, units)``: ``operation`` is
+timed repeatedly and its cost is reported per unit (audio block, key event,
+frame, audio second, ...).
+"""
+
+from __future__ import annotations
+
+import itertools
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, Tuple
+from unittest import mock
+
+import numpy as np
+
+Operation = Callable[[], None]
+Case = Callable[[], Tuple[Operation, int]]
+
+SAMPLE_RATE = 16000
+BLOCK_SIZE = 1024
+ENCODE_SECONDS = 10
+
+CASES: Dict[str, Tuple[str, Case]] = {}
+
+
+def case(name: str, unit: str) -> Callable[[Case], Case]:
+    def register(setup: Case) -> Case:
+        CASES[name] = (unit, setup)
+        return setup
+
+    return register
+
+
+def _speech_like(seconds: float, channels: int = 1, rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Bursts of a modulated tone separated by pauses, with a little noise, as int16."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * rate)) / rate
+    envelope = (np.sin(2 * np.pi * 0.5 * t) > 0).astype(np.float32)
+    signal = 0.3 * envelope * np.sin(2 * np.pi * 220 * t) * (1 + 0.5 * np.sin(2 * np.pi * 3 * t))
+    signal = (signal + rng.normal(0, 0.002, t.shape)) * 32767
+    return np.repeat(signal.astype(np.int16)[:, None], channels, axis=1)
+
+
+@case("recorder_callback", "block")
+def recorder_callback() -> Tuple[Operation, int]:
+    import sounddevice as sd
+
+    from getdict.audio import AudioRecorder
+    from getdict.settings import AudioSettings
+
+    settings = AudioSettings(sample_rate=SAMPLE_RATE, block_size=BLOCK_SIZE, native_format=False)
+    recorder = AudioRecorder(settings, waveform_callback=lambda frame: None)
+    recorder._prepare_buffer()
+    buffer = recorder._buffer
+    assert buffer is not None
+    blocks = [block for block in np.split(_speech_like(6.4), 100)]
+    status = sd.CallbackFlags()
+
+    def operation() -> None:
+        # Stay below capacity so every write takes the normal, non-overrun path.
+        buffer.reset()
+        for block in blocks:
+            recorder._callback(block, BLOCK_SIZE, {}, status)
+
+    return operation, len(blocks)
+
+
+@case("writer_encode", "audio_second")
+def writer_encode() -> Tuple[Operation, int]:
+    return _writer_encode("flac")
+
+
+@case("writer_encode_opus", "audio_second")
+def writer_encode_opus() -> Tuple[Operation, int]:
+    return _writer_encode("opus")
+
+
+@case("writer_native_48k", "audio_second")
+def writer_native_48k() -> Tuple[Operation, int]:
+    """FLAC writer fed by the fake 48 kHz stereo headset, so it also downmixes and resamples."""
+    return _writer_encode("flac", native_format=True)
+
+
+def _writer_encode(codec: str, native_format: bool = False) -> Tuple[Operation, int]:
+    from getdict.audio import AudioRecorder
+    from getdict.settings import AudioSettings
+
+    settings = AudioSettings(
+        sample_rate=SAMPLE_RATE,
+        block_size=BLOCK_SIZE,
+        buffer_seconds=ENCODE_SECONDS + 1,
+        codec=codec,
+        native_format=native_format,
+    )
+    recorder = AudioRecorder(settings, waveform_callback=lambda frame: None)
+    rate, channels = recorder._capture_rate, recorder._capture_channels = recorder._capture_format()
+    recorder._prepare_buffer()
+    buffer = recorder._buffer
+    assert buffer is not None
+    blocks = np.array_split(_speech_like(ENCODE_SECONDS, channels, rate), ENCODE_SECONDS * rate // BLOCK_SIZE)
+
+    def operation() -> None:
+        buffer.reset()
+        for block in blocks:
+            buffer.write(block)
+        buffer.close()
+        recorder._writer_loop()
+        if recorder._writer_error is not None:
+            raise recorder._writer_error
+
+    return operation, ENCODE_SECONDS
+
+
+def _key_events() -> list:
+    from pynput import keyboard
+
+    return [
+        keyboard.Key.ctrl_l,
+        keyboard.Key.alt_l,
+        keyboard.KeyCode.from_char("a"),
+        keyboard.Key.space,
+        keyboard.KeyCode.from_char("E"),
+        keyboard.Key.shift_r,
+        keyboard.Key.f5,
+        keyboard.Key.esc,
+        keyboard.KeyCode.from_vk(65437),
+    ]
+
+
+@case("hotkey_key_name", "key_event")
+def hotkey_key_name() -> Tuple[Operation, int]:
+    from getdict.hotkeys import _key_name
+
+    events = _key_events() * 50
+
+    def operation() -> None:
+        for key in events:
+            _key_name(key)
+
+    return operation, len(events)
+
+
+@case("hotkey_dispatch", "key_event")
+def hotkey_dispatch() -> Tuple[Operation, int]:
+    from getdict.hotkeys import HotkeyListener
+    from getdict.settings import Settings
+
+    settings = Settings()
+    listener = HotkeyListener(
+        settings.hotkey,
+        on_start=lambda: None,
+        on_stop=lambda: None,
+        cancel_hotkey=settings.cancel_hotkey,
+        on_cancel=lambda: None,
+    )
+    listener.start()
+    events = _key_events() * 25
+
+    def operation() -> None:
+        for key in events:
+            listener._on_press(key)
+        for key in events:
+            listener._on_release(key)
+
+    return operation, 2 * len(events)
+
+
+@case("visualizer_paint", "frame")
+def visualizer_paint() -> Tuple[Operation, int]:
+    from PySide6.QtGui import QImage
+    from PySide6.QtWidgets import QApplication
+
+    from getdict.models import LevelFrame
+    from getdict.ui.visualizer import WaveformVisualizer
+
+    QApplication.instance() or QApplication([])
+    widget = WaveformVisualizer()
+    levels = [
+        LevelFrame(rms=float(value), bands=(float(value), float(value) * 0.8, float(value) * 0.6))
+        for value in np.abs(np.sin(np.linspace(0, 6, 60)))
+    ]
+    for frame in levels:
+        widget.push_levels(frame)
+    image = QImage(widget.size(), QImage.Format.Format_ARGB32_Premultiplied)
+    frames = 10
+    cursor = itertools.cycle(levels)
+
+    def operation() -> None:
+        # A frame as the timer sees it: a new level frame arrives, then a repaint.
+        # Cycling keeps the window a rotation of the same values, and so the same area.
+        for _ in range(frames):
+            widget.push_levels(next(cursor))
+            widget._refresh()
+            widget.render(image)
+
+    return operation, frames
+
+
+def _settings_path() -> Path:
+    return Path(tempfile.mkdtemp(prefix="getdict-bench-")) / "settings.json"
+
+
+@case("settings_save", "call")
+def settings_save() -> Tuple[Operation, int]:
+    from getdict.settings import Settings
+
+    path = _settings_path()
+    settings = Settings()
+
+    def operation() -> None:
+        with mock.patch.object(Settings, "_config_path", staticmethod(lambda: path)):
+            settings.save()
+
+    return operation, 1
+
+
+@case("settings_load", "call")
+def settings_load() -> Tuple[Operation, int]:
+    from getdict.settings import Settings
+
+    path = _settings_path()
+    with mock.patch.object(Settings, "_config_path", staticmethod(lambda: path)):
+        Settings().save()
+
+    def operation() -> None:
+        with mock.patch.object(Settings, "_config_path", staticmethod(lambda: path)):
+            Settings.load()
+
+    return operation, 1
+
+
+def _vocabulary_terms(count: int) -> str:
+    rng = np.random.default_rng(0)
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    lines = []
+    for index in range(count):
+        word = "".join(rng.choice(letters, size=int(rng.integers(4, 12))))
+        lines.append(f"{word} => {word.upper()}" if index % 2 else word.capitalize())
+    return "\n".join(lines)
+
+
+@case("vocabulary_apply", "transcript")
+def vocabulary_apply() -> Tuple[Operation, int]:
+    from getdict.vocabulary import Automaton, parse_vocabulary
+
+    entries = parse_vocabulary(_vocabulary_terms(5000))
+    automaton = Automaton(entries)
+    words = [pattern for pattern, _ in entries[:20]] + ["the", "quick", "brown", "fox", "deploys", "services"] * 30
+    transcript = " ".join(np.random.default_rng(1).permutation(words))
+
+    def operation() -> None:
+        automaton.replace(transcript)
+
+    return operation, 1
+
+
+@case("vocabulary_load", "call")
+def vocabulary_load() -> Tuple[Operation, int]:
+    from getdict.vocabulary import Vocabulary
+
+    path = Path(tempfile.mkdtemp()) / "vocabulary.txt"
+    path.write_text(_vocabulary_terms(5000), encoding="utf-8")
+    Vocabulary(path).refresh()
+
+    def operation() -> None:
+        Vocabulary(path).refresh()
+
+    return operation, 1
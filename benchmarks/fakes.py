@@ -0,0 +1,233 @@
+"""Stand-ins for the hardware-bound modules so benchmarks run headless.
+
+``install`` must run before any ``getdict`` module is imported. It registers fake
+``sounddevice`` and ``pynput`` modules and selects Qt's offscreen platform.
+Streams deliver no audio unless a :class:`VirtualMicrophone` is attached with
+:func:`attach_microphone`.
+"""
+
+from __future__ import annotations
+
+import enum
+import os
+import platform
+import sys
+import threading
+import time
+import types
+from importlib import metadata
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+# PySide6 releases excluded for Python < 3.12 in pyproject.toml; see _check_pyside.
+BROKEN_PYSIDE = {"6.12.0"}
+
+
+class VirtualMicrophone:
+    """Plays queued clips into open fake input streams, then silence.
+
+    Blocks are delivered from a thread at ``speed`` times real time, in the
+    stream's rate, channel count and dtype, like a sounddevice callback.
+    """
+
+    def __init__(self, speed: float = 1.0) -> None:
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._clips: List[Tuple[np.ndarray, float]] = []
+        self._drained = threading.Event()
+        self._drained.set()
+
+    def play(self, samples: np.ndarray, rate: int) -> None:
+        """Queues mono float ``samples`` at ``rate`` Hz; they are resampled to the stream's rate on delivery."""
+        with self._lock:
+            self._clips.append((np.asarray(samples, dtype=np.float32), float(rate)))
+            self._drained.clear()
+
+    def wait_drained(self, timeout: Optional[float] = None) -> bool:
+        return self._drained.wait(timeout)
+
+    def _take(self, frames: int, rate: float) -> np.ndarray:
+        out = np.zeros(frames, dtype=np.float32)
+        filled = 0
+        with self._lock:
+            while self._clips and filled < frames:
+                clip, clip_rate = self._clips[0]
+                if clip_rate != rate:
+                    positions = np.arange(0, len(clip) - 1, clip_rate / rate)
+                    clip = np.interp(positions, np.arange(len(clip)), clip).astype(np.float32)
+                count = min(frames - filled, len(clip))
+                out[filled : filled + count] = clip[:count]
+                filled += count
+                if count == len(clip):
+                    self._clips.pop(0)
+                else:
+                    self._clips[0] = (clip[count:], rate)
+            if not self._clips:
+                self._drained.set()
+        return out
+
+
+_microphone: Optional[VirtualMicrophone] = None
+
+
+def attach_microphone(microphone: Optional[VirtualMicrophone]) -> None:
+    global _microphone
+    _microphone = microphone
+
+
+class CallbackFlags:
+    def __bool__(self) -> bool:
+        return False
+
+    def __str__(self) -> str:
+        return ""
+
+
+class InputStream:
+    """Accepts the same arguments as ``sounddevice.InputStream``; delivers audio only from an attached microphone."""
+
+    def __init__(self, samplerate: float = 0, channels: int = 1, dtype: str = "float32", blocksize: int = 0, callback: Any = None, **kwargs: Any) -> None:
+        self.samplerate = samplerate
+        self.channels = channels
+        self.dtype = dtype
+        self.blocksize = blocksize
+        self.callback = callback
+        self.active = False
+
+    def start(self) -> None:
+        self.active = True
+        microphone = _microphone
+        if microphone is not None and self.callback is not None:
+            self._feeder = threading.Thread(target=self._feed, args=(microphone,), name="fake-microphone", daemon=True)
+            self._feeder.start()
+
+    def stop(self) -> None:
+        self.active = False
+
+    def close(self) -> None:
+        self.active = False
+
+    def _feed(self, microphone: VirtualMicrophone) -> None:
+        frames = self.blocksize or 1024
+        period = frames / self.samplerate / microphone.speed
+        deadline = time.monotonic()
+        while self.active:
+            mono = microphone._take(frames, self.samplerate)
+            block = np.repeat(mono[:, None], self.channels, axis=1)
+            if np.dtype(self.dtype) == np.int16:
+                block = np.clip(np.rint(block * 32767), -32768, 32767).astype(np.int16)
+            self.callback(block, frames, None, CallbackFlags())
+            deadline += period
+            time.sleep(max(deadline - time.monotonic(), 0.0))
+
+
+# What ``query_devices(kind="input")`` reports: a typical USB headset.
+INPUT_DEVICE = {"name": "Fake USB headset", "default_samplerate": 48000.0, "max_input_channels": 2}
+
+
+def query_devices(device: Any = None, kind: Optional[str] = None) -> dict:
+    return dict(INPUT_DEVICE)
+
+
+def _sounddevice() -> types.ModuleType:
+    module = types.ModuleType("sounddevice")
+    module.CallbackFlags = CallbackFlags  # type: ignore[attr-defined]
+    module.InputStream = InputStream  # type: ignore[attr-defined]
+    module.query_devices = query_devices  # type: ignore[attr-defined]
+    return module
+
+
+class KeyCode:
+    def __init__(self, vk: Optional[int] = None, char: Optional[str] = None) -> None:
+        self.vk = vk
+        self.char = char
+
+    @classmethod
+    def from_char(cls, char: str) -> "KeyCode":
+        return cls(char=char)
+
+    @classmethod
+    def from_vk(cls, vk: int) -> "KeyCode":
+        return cls(vk=vk)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, KeyCode) and (self.vk, self.char) == (other.vk, other.char)
+
+    def __hash__(self) -> int:
+        return hash((self.vk, self.char))
+
+    def __str__(self) -> str:
+        return repr(self.char) if self.char is not None else f"<{self.vk}>"
+
+
+_KEY_NAMES = (
+    "alt alt_l alt_r alt_gr backspace caps_lock cmd cmd_l cmd_r ctrl ctrl_l ctrl_r delete down end enter esc "
+    "f1 f2 f3 f4 f5 f6 f7 f8 f9 f10 f11 f12 home left page_down page_up right shift shift_l shift_r space tab up"
+).split()
+
+Key = enum.Enum("Key", {name: KeyCode(vk=index) for index, name in enumerate(_KEY_NAMES, start=1)})  # type: ignore[misc]
+
+
+class Listener:
+    def __init__(self, on_press: Any = None, on_release: Any = None, **kwargs: Any) -> None:
+        self.on_press = on_press
+        self.on_release = on_release
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+class Controller:
+    def press(self, key: Any) -> None:
+        pass
+
+    def release(self, key: Any) -> None:
+        pass
+
+    def type(self, text: str) -> None:
+        pass
+
+
+def _pynput() -> types.ModuleType:
+    keyboard = types.ModuleType("pynput.keyboard")
+    keyboard.Key = Key  # type: ignore[attr-defined]
+    keyboard.KeyCode = KeyCode  # type: ignore[attr-defined]
+    keyboard.Listener = Listener  # type: ignore[attr-defined]
+    keyboard.Controller = Controller  # type: ignore[attr-defined]
+    package = types.ModuleType("pynput")
+    package.keyboard = keyboard  # type: ignore[attr-defined]
+    return package
+
+
+def _check_pyside() -> None:
+    """Refuses to run on PySide6 6.12.0 before Python 3.12.
+
+    That build releases a reference to None from every void-returning call,
+    which aborts the interpreter after a few thousand painter or timer calls.
+    Python 3.12 made None immortal, so it is only fatal on older interpreters.
+    """
+    if sys.version_info < (3, 12):
+        try:
+            version = metadata.version("PySide6")
+        except metadata.PackageNotFoundError:
+            return
+        if version in BROKEN_PYSIDE:
+            raise SystemExit(f"PySide6 {version} crashes on Python {platform.python_version()}; install another version (see requirements.txt)")
+
+
+def install() -> None:
+    _check_pyside()
+    if str(SRC) not in sys.path:
+        sys.path.insert(0, str(SRC))
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    sys.modules["sounddevice"] = _sounddevice()
+    pynput = _pynput()
+    sys.modules["pynput"] = pynput
+    sys.modules["pynput.keyboard"] = pynput.keyboard  # type: ignore[attr-defined]
@@ -0,0 +1,318 @@
+"""End-to-end dictation latency under load, against a local stub Whisper server.
+
+    python -m benchmarks.loadtest                      # 100 dictations, compare with load_baseline.json
+    python -m benchmarks.loadtest -n 300 --speed 10 --slow-rate 0.05 --error-rate 0.02
+    python -m benchmarks.loadtest --save               # record a new baseline
+
+The tray controller runs headless (offscreen Qt, fake ``sounddevice``/``pynput``)
+with an isolated config directory. A virtual microphone plays WAV fixtures into
+the capture stream at ``--speed`` times real time, uploads go to a
+:class:`~benchmarks.stub_server.StubWhisperServer` over real HTTP, and the text
+inserter is replaced by a recorder that timestamps each paste. Every dictation is
+driven the way the hotkeys drive it: ``start_recording`` when speech starts,
+``stop_recording`` shortly after it ends. Release-to-paste is measured from that
+call to the paste.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from . import fakes
+
+fakes.install()
+
+import numpy as np  # noqa: E402
+import soundfile as sf  # noqa: E402
+
+from .cases import _speech_like  # noqa: E402
+from .stub_server import StubWhisperServer, add_profile_arguments, profile_from_args  # noqa: E402
+
+BASELINE_PATH = Path(__file__).with_name("load_baseline.json")
+DEFAULT_THRESHOLD = 0.25
+FIXTURE_RATE = 16000
+# Spoken lengths of the generated fixtures; the longer ones are cut into segments at pauses.
+FIXTURE_SECONDS = (1.5, 3.0, 6.0, 12.0)
+# Silence after the last word before the hotkey is released, in real-time seconds.
+RELEASE_DELAY = 0.2
+DICTATION_TIMEOUT = 120.0
+QUANTILES = (50, 90, 95, 99)
+COMPARED = ("p50", "p95")
+
+
+class InsertRecorder:
+    """Stands in for ``TextInserter``: records each paste instead of sending keys."""
+
+    instances: List["InsertRecorder"] = []
+
+    def __init__(self, settings: Any, keys_released: Any = None) -> None:
+        self.keys_released = keys_released
+        self.pastes: List[tuple[float, str]] = []
+        InsertRecorder.instances.append(self)
+
+    def insert(self, text: str) -> Any:
+        from getdict.models import InsertionResult, InsertionStrategy
+
+        self.pastes.append((time.monotonic(), text))
+        return InsertionResult(success=True, strategy=InsertionStrategy.PASTE)
+
+    def close(self) -> None:
+        pass
+
+
+class Dictation:
+    def __init__(self, index: int, fixture: Path, seconds: float) -> None:
+        self.index = index
+        self.fixture = fixture
+        self.seconds = seconds
+        self.sequence: Optional[int] = None
+        self.released = 0.0
+        self.pasted: Optional[float] = None
+        self.status: Optional[str] = None
+        self.finished = threading.Event()
+
+    @property
+    def release_to_paste(self) -> Optional[float]:
+        return None if self.pasted is None else self.pasted - self.released
+
+
+def write_fixtures(directory: Path) -> List[Path]:
+    paths = []
+    for seconds in FIXTURE_SECONDS:
+        path = directory / f"speech_{seconds:g}s.wav"
+        sf.write(str(path), _speech_like(seconds)[:, 0], FIXTURE_RATE, subtype="PCM_16")
+        paths.append(path)
+    return paths
+
+
+def _configure(config_dir: Path, base_url: str, args: argparse.Namespace) -> None:
+    from getdict.settings import Settings
+
+    Settings._config_path = staticmethod(lambda: config_dir / "settings.json")  # type: ignore[method-assign]
+    settings = Settings()
+    settings.api_key = "stub-key"
+    settings.transcription.api_base_url = base_url
+    settings.transcription.hedge_requests = not args.no_hedge
+    settings.audio.codec = args.codec
+    settings.audio.warm_stream = args.warm_stream
+    settings.pipeline.max_pending_jobs = max(settings.pipeline.max_pending_jobs, args.overlap + 1)
+    settings.daemon.serve = False
+    settings.daemon.socket_path = str(config_dir / "getdict.sock")
+    settings.ui.show_visualizer = not args.no_visualizer
+    settings.save()
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0}
+    array = np.asarray(values)
+    summary = {f"p{q}": float(value) for q, value in zip(QUANTILES, np.percentile(array, QUANTILES))}
+    summary.update(count=len(values), mean=float(array.mean()), max=float(array.max()))
+    return summary
+
+
+def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    from PySide6.QtCore import QObject, Signal
+    from PySide6.QtWidgets import QApplication
+
+    from getdict import insertion
+    from getdict.app import GetDictController
+
+    workdir = Path(tempfile.mkdtemp(prefix="getdict-load-"))
+    fixtures = [Path(path) for path in args.fixtures] if args.fixtures else write_fixtures(workdir)
+    clips = [sf.read(str(path), dtype="float32", always_2d=True) for path in fixtures]
+    server = StubWhisperServer(profile_from_args(args)).start()
+    _configure(workdir / "config", server.base_url, args)
+    insertion.TextInserter = InsertRecorder  # type: ignore[misc]
+    microphone = fakes.VirtualMicrophone(args.speed)
+    fakes.attach_microphone(microphone)
+
+    class Finished(QObject):
+        done = Signal()
+
+    app = QApplication.instance() or QApplication([])
+    controller = GetDictController()
+    finished = Finished()
+    finished.done.connect(controller.quit)
+    dictations: List[Dictation] = []
+    by_sequence: Dict[int, Dictation] = {}
+    lock = threading.Lock()
+
+    def on_event(event: Dict[str, Any]) -> None:
+        if event["event"] == "transcript":
+            with lock:
+                dictation = by_sequence.get(event["sequence"])
+            if dictation is not None and event["inserted"]:
+                dictation.pasted = InsertRecorder.instances[-1].pastes[-1][0]
+        elif event["event"] == "jobs":
+            for job in event["jobs"]:
+                with lock:
+                    dictation = by_sequence.get(job["sequence"])
+                if dictation is not None and job["status"] in ("done", "failed", "empty", "cancelled"):
+                    dictation.status = job["status"]
+                    dictation.finished.set()
+
+    def drive() -> None:
+        try:
+            if not controller._ready.wait(60):
+                raise RuntimeError("GetDict did not start")
+            assert controller._engine is not None
+            controller._engine.subscribe(on_event)
+            started = time.monotonic()
+            for index in range(args.dictations):
+                samples, rate = clips[index % len(clips)]
+                dictation = Dictation(index, fixtures[index % len(fixtures)], len(samples) / rate)
+                # Keep at most ``overlap`` earlier dictations in flight.
+                if index > args.overlap:
+                    dictations[index - args.overlap - 1].finished.wait(DICTATION_TIMEOUT)
+                controller.start_recording()
+                if not controller._recording:
+                    raise RuntimeError(f"Dictation {index} did not start; see the log")
+                with lock:
+                    dictation.sequence = len(dictations) + 1
+                    by_sequence[dictation.sequence] = dictation
+                dictations.append(dictation)
+                microphone.play(samples[:, 0], rate)
+                microphone.wait_drained()
+                time.sleep(RELEASE_DELAY / args.speed)
+                dictation.released = time.monotonic()
+                controller.stop_recording()
+                if (index + 1) % 25 == 0:
+                    print(f"  {index + 1}/{args.dictations} dictations", file=sys.stderr)
+            for dictation in dictations:
+                dictation.finished.wait(DICTATION_TIMEOUT)
+            report["wall_seconds"] = time.monotonic() - started
+            report["engine"] = controller._engine.stats()
+        except Exception as exc:  # reported after the event loop exits
+            report["error"] = f"{type(exc).__name__}: {exc}"
+        finally:
+            finished.done.emit()
+
+    report: Dict[str, Any] = {}
+    threading.Thread(target=drive, name="load-driver", daemon=True).start()
+    app.exec()
+    fakes.attach_microphone(None)
+    server.close()
+    if "error" in report:
+        raise RuntimeError(report["error"])
+
+    latencies = [d.release_to_paste for d in dictations if d.release_to_paste is not None]
+    statuses: Dict[str, int] = {}
+    for dictation in dictations:
+        key = dictation.status or "timeout"
+        statuses[key] = statuses.get(key, 0) + 1
+    engine = report["engine"]
+    return {
+        "config": {
+            "dictations": args.dictations,
+            "speed": args.speed,
+            "overlap": args.overlap,
+            "codec": args.codec,
+            "hedge": not args.no_hedge,
+            "server": {name: getattr(args, name) for name in vars(profile_from_args(args))},
+        },
+        "release_to_paste": _percentiles(latencies),
+        "statuses": statuses,
+        "stages": {
+            name: row
+            for name, row in engine["latency"].items()
+            if name in ("encode", "upload_wait", "transcribe", "insert", "release_to_paste")
+        },
+        "requests": engine["requests"],
+        "server": vars(server.stats),
+        "wall_seconds": report["wall_seconds"],
+        "samples": [
+            {"fixture": d.fixture.name, "seconds": round(d.seconds, 3), "status": d.status, "release_to_paste": d.release_to_paste}
+            for d in dictations
+        ],
+    }
+
+
+def _ms(value: Optional[float]) -> str:
+    return "       –" if value is None else f"{value * 1000:8.1f}"
+
+
+def print_report(result: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    rows = [("release_to_paste", result["release_to_paste"])] + [
+        (f"  {name}", row) for name, row in result["stages"].items() if name != "release_to_paste"
+    ]
+    print(f"{'stage (ms)':<20}" + "".join(f"{f'p{q}':>9}" for q in QUANTILES) + f"{'max':>9}{'count':>7}")
+    for name, row in rows:
+        print(f"{name:<20}" + "".join(f" {_ms(row.get(f'p{q}'))}" for q in QUANTILES) + f" {_ms(row.get('max'))}{int(row.get('count', 0)):>7}")
+    if baseline:
+        reference = baseline["release_to_paste"]
+        changes = ", ".join(
+            f"{key} {result['release_to_paste'][key] / reference[key] - 1:+.1%}"
+            for key in COMPARED
+            if key in reference and key in result["release_to_paste"]
+        )
+        print(f"vs baseline: {changes}")
+    requests = result["requests"]
+    print(
+        f"statuses {result['statuses']}; {int(requests['requests'])} requests, {int(requests['retries'])} retried, "
+        f"{int(requests['hedged'])} hedged ({int(requests['hedge_wins'])} won); "
+        f"server saw {result['server']['requests']} ({result['server']['slow']} slow, "
+        f"{result['server']['throttled']} throttled, {result['server']['errors']} failed) "
+        f"in {result['wall_seconds']:.1f}s"
+    )
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Returns the release-to-paste percentiles slower than the baseline by more than ``threshold``."""
+    regressions = []
+    current, reference = result["release_to_paste"], baseline.get("release_to_paste", {})
+    for key in COMPARED:
+        if key in reference and key in current and current[key] > reference[key] * (1 + threshold):
+            regressions.append(key)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.loadtest", description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--dictations", type=int, default=100)
+    parser.add_argument("--speed", type=float, default=20.0, help="microphone playback speed relative to real time")
+    parser.add_argument("--overlap", type=int, default=0, help="dictations started before the previous ones are pasted")
+    parser.add_argument("--fixtures", nargs="*", type=Path, help="WAV files to play (default: generated speech-like clips)")
+    parser.add_argument("--codec", default="flac", choices=("flac", "opus", "wav", "auto"))
+    parser.add_argument("--warm-stream", action="store_true")
+    parser.add_argument("--no-hedge", action="store_true")
+    parser.add_argument("--no-visualizer", action="store_true")
+    add_profile_arguments(parser)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown, e.g. 0.25 for 25%%")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--json", type=Path, help="also write the full report, with per-dictation samples")
+    args = parser.parse_args(argv)
+
+    result = run_load(args)
+    stored = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else None
+    if stored and stored.get("config") != result["config"]:
+        print("Baseline was recorded with different options; not comparing", file=sys.stderr)
+        stored = None
+    print_report(result, stored)
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+    if args.save:
+        summary = {key: value for key, value in result.items() if key != "samples"}
+        summary["machine"] = f"{platform.system()} {platform.machine()} / Python {platform.python_version()}"
+        args.baseline.write_text(json.dumps(summary, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if stored is None:
+        return 0
+    regressions = compare(result, stored, args.threshold)
+    for key in regressions:
+        print(f"REGRESSION: release-to-paste {key} is more than {args.threshold:.0%} slower than the baseline", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+"""A local OpenAI-compatible transcription endpoint with injected latency and errors.
+
+    python -m benchmarks.stub_server --port 8765 --latency-ms 150 --error-rate 0.02
+
+Point ``transcription.api_base_url`` at ``http://127.0.0.1:8765/v1`` with any API
+key. Each request decodes the uploaded audio to find its duration and answers
+after ``latency_ms + per_second_ms * duration``, with log-normal jitter. A
+fraction of requests is slowed down by ``slow_factor`` (to exercise hedging),
+throttled with a 429 and ``Retry-After``, or failed with a 500.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import random
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+import soundfile as sf
+
+TRANSCRIPTIONS_PATH = "/v1/audio/transcriptions"
+
+
+@dataclass
+class ServerProfile:
+    latency_ms: float = 150.0
+    per_second_ms: float = 40.0
+    jitter: float = 0.2
+    slow_rate: float = 0.0
+    slow_factor: float = 10.0
+    throttle_rate: float = 0.0
+    retry_after: float = 1.0
+    error_rate: float = 0.0
+    seed: int = 0
+
+
+@dataclass
+class ServerStats:
+    requests: int = 0
+    slow: int = 0
+    throttled: int = 0
+    errors: int = 0
+    audio_seconds: float = 0.0
+    by_format: Dict[str, int] = field(default_factory=dict)
+
+
+def _parse_upload(content_type: str, body: bytes) -> Tuple[bytes, Dict[str, str]]:
+    message = BytesParser(policy=default_policy).parsebytes(
+        b"Content-Type: " + content_type.encode("latin-1") + b"\r\n\r\n" + body
+    )
+    audio = b""
+    fields: Dict[str, str] = {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        payload = part.get_payload(decode=True) or b""
+        if part.get_filename() is not None:
+            audio = payload
+        elif name:
+            fields[str(name)] = payload.decode("utf-8", "replace")
+    return audio, fields
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request: object, client_address: object) -> None:
+        # Clients drop connections routinely, e.g. to abandon a losing hedged request.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StubWhisperServer:
+    """Threaded HTTP server answering ``POST /v1/audio/transcriptions``."""
+
+    def __init__(self, profile: Optional[ServerProfile] = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.profile = profile or ServerProfile()
+        self.stats = ServerStats()
+        self._random = random.Random(self.profile.seed)
+        self._lock = threading.Lock()
+        self._httpd = _QuietServer((host, port), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StubWhisperServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="stub-whisper", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _plan(self, seconds: float) -> Tuple[str, float]:
+        """Decides the outcome and delay of one request."""
+        profile = self.profile
+        with self._lock:
+            roll = self._random.random()
+            jitter = self._random.lognormvariate(0.0, profile.jitter) if profile.jitter else 1.0
+            slow = self._random.random() < profile.slow_rate
+        delay = (profile.latency_ms + profile.per_second_ms * seconds) / 1000 * jitter
+        if slow:
+            delay *= profile.slow_factor
+        if roll < profile.throttle_rate:
+            return "throttle", 0.0
+        if roll < profile.throttle_rate + profile.error_rate:
+            return "error", delay
+        return ("slow" if slow else "ok"), delay
+
+    def _record(self, outcome: str, seconds: float, audio_format: str) -> None:
+        with self._lock:
+            stats = self.stats
+            stats.requests += 1
+            stats.audio_seconds += seconds
+            stats.by_format[audio_format] = stats.by_format.get(audio_format, 0) + 1
+            if outcome == "slow":
+                stats.slow += 1
+            elif outcome == "throttle":
+                stats.throttled += 1
+            elif outcome == "error":
+                stats.errors += 1
+
+    def _handler(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format: str, *args: object) -> None:
+                pass
+
+            def do_HEAD(self) -> None:
+                self._send(200, b"", "text/plain")
+
+            def do_GET(self) -> None:
+                self._send(200, b"ok", "text/plain")
+
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.path.rstrip("/") != TRANSCRIPTIONS_PATH:
+                    self._send(404, b'{"error": {"message": "not found"}}', "application/json")
+                    return
+                audio, fields = _parse_upload(self.headers.get("Content-Type", ""), body)
+                try:
+                    info = sf.info(io.BytesIO(audio))
+                    seconds, audio_format = info.duration, info.format
+                except RuntimeError:
+                    self._send(400, b'{"error": {"message": "could not decode audio"}}', "application/json")
+                    return
+                outcome, delay = server._plan(seconds)
+                server._record(outcome, seconds, audio_format)
+                if outcome == "throttle":
+                    retry_after = f"{server.profile.retry_after:g}"
+                    self._send(429, b'{"error": {"message": "rate limited"}}', "application/json", {"Retry-After": retry_after})
+                    return
+                time.sleep(delay)
+                if outcome == "error":
+                    self._send(500, b'{"error": {"message": "injected failure"}}', "application/json")
+                    return
+                text = f"dictation of {seconds:.2f} seconds"
+                if fields.get("response_format", "json") == "text":
+                    self._send(200, text.encode("utf-8"), "text/plain")
+                else:
+                    self._send(200, json.dumps({"text": text}).encode("utf-8"), "application/json")
+
+            def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+        return Handler
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = ServerProfile()
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms, help="fixed server time per request")
+    parser.add_argument("--per-second-ms", type=float, default=defaults.per_second_ms, help="server time per second of audio")
+    parser.add_argument("--jitter", type=float, default=defaults.jitter, help="sigma of the log-normal latency jitter")
+    parser.add_argument("--slow-rate", type=float, default=defaults.slow_rate, help="fraction of requests slowed down")
+    parser.add_argument("--slow-factor", type=float, default=defaults.slow_factor)
+    parser.add_argument("--throttle-rate", type=float, default=defaults.throttle_rate, help="fraction answered 429")
+    parser.add_argument("--retry-after", type=float, default=defaults.retry_after, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="fraction answered 500")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def profile_from_args(args: argparse.Namespace) -> ServerProfile:
+    return ServerProfile(**{name: getattr(args, name) for name in asdict(ServerProfile())})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.stub_server", description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    server = StubWhisperServer(profile_from_args(args), args.host, args.port).start()
+    print(f"Serving {server.base_url}{TRANSCRIPTIONS_PATH[3:]}; Ctrl+C to stop")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.close()
+        print(json.dumps(asdict(server.stats), indent=2))
+
+
+if __name__ == "__main__":
+    main()
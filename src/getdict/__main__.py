@@ -1,8 +1,47 @@
-from .app import run
+from __future__ import annotations
 
+import argparse
+import sys
+from typing import List, Optional
 
-def main() -> None:
-    run()
+from .startup import StartupProfiler
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["transcribe"]:
+        # Dispatched before building the tray's parser so the app itself never imports the batch tooling.
+        from . import batch
+
+        sys.exit(batch.main(batch.build_parser().parse_args(argv[1:])))
+    if argv[:1] == ["daemon"]:
+        from . import daemon
+
+        sys.exit(daemon.main(daemon.build_parser().parse_args(argv[1:])))
+    if argv[:1] == ["ctl"]:
+        from . import daemon
+
+        sys.exit(daemon.ctl_main(argv[1:]))
+    parser = argparse.ArgumentParser(
+        prog="getdict",
+        description="Push-to-talk dictation tray app.",
+        epilog=(
+            "Run 'python -m getdict transcribe --help' to transcribe files without the tray, "
+            "'python -m getdict daemon' to run the engine headless and "
+            "'python -m getdict ctl --help' to control it."
+        ),
+    )
+    parser.add_argument(
+        "--startup-profile",
+        action="store_true",
+        help="print per-import and per-phase startup timings to stderr once the app is ready",
+    )
+    args = parser.parse_args(argv)
+    profiler = StartupProfiler(enabled=args.startup_profile)
+    profiler.install()
+    with profiler.phase("import app"):
+        from .app import run
+    run(profiler)
 
 
 if __name__ == "__main__":
@@ -1,148 +1,382 @@
 from __future__ import annotations
 
+import functools
+import importlib
 import logging
 import sys
 import threading
-from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, TypeVar, Union
 
-from PySide6.QtCore import QObject, QTimer
+from PySide6.QtCore import QObject, QTimer, Signal
 from PySide6.QtWidgets import QApplication
 
-from .audio import AudioRecorder
-from .hotkeys import HotkeyListener
-from .insertion import insert_text
-from .models import AppState, RecordingError, TranscriptionError, TranscriptionRequest
+from .event_bus import (
+    Disconnected,
+    EventBus,
+    JobsChanged,
+    LevelsChanged,
+    Notice,
+    PickupsChanged,
+    StateChanged,
+    parse_engine_event,
+)
+from .models import AppState, EngineError
 from .settings import Settings
-from .transcription import TranscriptionClient
-from .ui.settings_dialog import SettingsDialog
+from .spool import SpooledResult
+from .startup import StartupProfiler
 from .ui.tray import TrayController
-from .ui.visualizer import WaveformVisualizer
+
+if TYPE_CHECKING:
+    from .daemon import DaemonClient, DaemonServer
+    from .engine import DictationEngine
+    from .hotkeys import HotkeyListener
+    from .ui.visualizer import WaveformVisualizer
 
 logger = logging.getLogger(__name__)
 
+# Imported on a background thread once the tray is visible; together they pull in
+# numpy, soundfile, sounddevice, pynput and pyqtgraph. The transcription stack
+# (openai alone takes about a second) is only needed after the first recording,
+# so it is warmed afterwards without holding up the hotkeys.
+PRELOAD_MODULES = (
+    ".audio",
+    ".hotkeys",
+    ".insertion",
+    ".jobs",
+    ".ui.visualizer",
+)
+WARM_MODULES = (".transcription",)
+REINSERT_DELAY_MS = 200
+
+_Method = TypeVar("_Method", bound=Callable[..., Any])
+
+
+def _when_ready(method: _Method) -> _Method:
+    """Ignores user actions that arrive before startup has finished."""
+
+    @functools.wraps(method)
+    def wrapper(self: "GetDictController", *args: Any, **kwargs: Any) -> Any:
+        if not self._ready.is_set():
+            logger.info("Ignoring %s while GetDict is starting", method.__name__)
+            return None
+        return method(self, *args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
+
 
 class GetDictController(QObject):
-    def __init__(self) -> None:
+    """Tray front-end for a :class:`~getdict.engine.DictationEngine`.
+
+    If a GetDict daemon is already running, the tray connects to it and only
+    owns the hotkeys, the tray icon and the visualizer. Otherwise it starts an
+    engine in-process and, unless disabled in settings, serves it on the daemon
+    socket so scripts and editor plugins can share it.
+
+    Startup is split so the tray appears first: the constructor only loads
+    settings and shows the tray, the engine is started on a background thread,
+    and the hotkeys and visualizer are wired up on the GUI thread when that
+    finishes.
+    """
+
+    _preloaded = Signal()
+
+    def __init__(self, profiler: Optional[StartupProfiler] = None) -> None:
         super().__init__()
-        self.settings = Settings.load()
+        self._profiler = profiler or StartupProfiler()
+        with self._profiler.phase("load settings"):
+            self.settings = Settings.load()
         self.state = AppState.IDLE
+        self._ready = threading.Event()
+        self._command_lock = threading.Lock()
+        # Tracked locally: a release must stop the recording this tray started even
+        # if the state event for it has not been delivered yet.
+        self._recording = False
+        self._engine: Union[DictationEngine, DaemonClient, None] = None
+        self._server: Optional[DaemonServer] = None
+        self._startup_error: Optional[Exception] = None
         self._visualizer: WaveformVisualizer | None = None
-        self._recorder = AudioRecorder(self.settings.audio, waveform_callback=self._handle_amplitude)
-        self._transcription_client = TranscriptionClient(self.settings)
-        self._tray = TrayController(
-            on_start=self.start_recording,
-            on_stop=self.stop_recording,
-            on_open_settings=self.open_settings,
-            on_quit=self.quit,
-        )
-        self._hotkeys = HotkeyListener(
+        with self._profiler.phase("show tray"):
+            self._tray = TrayController(
+                on_start=self.start_recording,
+                on_stop=self.stop_recording,
+                on_open_settings=self.open_settings,
+                on_quit=self.quit,
+                on_pick_up=self._pick_up,
+                on_show_stats=self.show_stats,
+                on_show_history=self.show_history,
+            )
+            self._tray.update_state(AppState.PROCESSING, "Starting...")
+        self._profiler.mark("tray visible")
+        self._preloaded.connect(self._finish_startup)
+        # Engine, IPC and hotkey threads reach the tray and visualizer only through the bus.
+        self._bus = EventBus(parent=self)
+        self._bus.subscribe(StateChanged, lambda event: self.update_state(event.state, event.tooltip))
+        self._bus.subscribe(LevelsChanged, self._push_levels)
+        self._bus.subscribe(JobsChanged, lambda event: self._tray.update_jobs(list(event.jobs)))
+        self._bus.subscribe(PickupsChanged, lambda event: self._tray.update_pickups(list(event.results)))
+        self._bus.subscribe(Notice, lambda event: self._tray.show_message(event.title, event.message))
+        self._bus.subscribe(Disconnected, self._handle_disconnected)
+        threading.Thread(target=self._preload, name="getdict-preload", daemon=True).start()
+
+    def _preload(self) -> None:
+        try:
+            with self._profiler.phase("start engine"):
+                self._engine = self._connect_engine()
+        except Exception as exc:
+            self._startup_error = exc
+        self._import_all((".hotkeys", ".ui.visualizer"))
+        self._preloaded.emit()
+        from .engine import DictationEngine
+
+        # Only an in-process engine transcribes here; a daemon keeps its own stack warm.
+        if isinstance(self._engine, DictationEngine):
+            self._import_all(WARM_MODULES)
+            with self._profiler.phase("warm up transcription"):
+                self._engine.warm_up()
+
+    def _connect_engine(self) -> Union[DictationEngine, DaemonClient]:
+        from .daemon import DaemonClient, DaemonServer, default_socket_path
+
+        path = default_socket_path(self.settings)
+        client = DaemonClient.connect(path)
+        if client is not None:
+            logger.info("Using the GetDict daemon at %s", path)
+            return client
+        self._import_all(PRELOAD_MODULES)
+        from .engine import DictationEngine
+
+        engine = DictationEngine(self.settings)
+        engine.start()
+        if self.settings.daemon.serve:
+            server = DaemonServer(engine, path)
+            try:
+                server.start()
+            except (EngineError, OSError) as exc:
+                logger.warning("Not serving the engine: %s", exc)
+            else:
+                self._server = server
+        return engine
+
+    def _import_all(self, modules: tuple[str, ...]) -> None:
+        for module in modules:
+            try:
+                with self._profiler.phase(f"import {module}"):
+                    importlib.import_module(module, __package__)
+            except Exception as exc:
+                # The real import on first use raises and reports the failure.
+                logger.debug("Preloading %s failed: %s", module, exc)
+
+    def _finish_startup(self) -> None:
+        try:
+            if self._startup_error is not None:
+                raise self._startup_error
+            with self._profiler.phase("start front-end"):
+                self._start_front_end()
+        except Exception as exc:
+            logger.exception("Startup failed: %s", exc)
+            self.update_state(AppState.ERROR, "Startup failed")
+            self._tray.show_message("GetDict failed to start", str(exc))
+            return
+        finally:
+            self._profiler.report()
+        self._ready.set()
+
+    def _start_front_end(self) -> None:
+        assert self._engine is not None
+        status = self._engine.status()
+        self._on_engine_event({"event": "jobs", "jobs": status["jobs"]})
+        self._on_engine_event({"event": "pickups", "results": status["pickups"]})
+        self._hotkeys = self._create_hotkeys()
+        self._hotkeys.start()
+        from .engine import DictationEngine
+
+        if isinstance(self._engine, DictationEngine):
+            # Looked up on each call, as the listener is replaced when the hotkeys change.
+            self._engine.watch_keys(lambda timeout: self._hotkeys.wait_released(timeout))
+        self._initialise_visualizer()
+        self._engine.subscribe(self._on_engine_event)
+
+    def _create_hotkeys(self) -> HotkeyListener:
+        from .hotkeys import HotkeyListener
+
+        return HotkeyListener(
             self.settings.hotkey,
             on_start=self.start_recording,
             on_stop=self.stop_recording,
+            toggle_hotkey=self.settings.toggle_hotkey,
+            on_toggle=self.toggle_recording,
+            cancel_hotkey=self.settings.cancel_hotkey,
+            on_cancel=self.cancel_recording,
         )
-        self._hotkeys.start()
-        self._processing_thread: threading.Thread | None = None
-        QTimer.singleShot(0, self._initialise_visualizer)
 
     def _initialise_visualizer(self) -> None:
         if self.settings.ui.show_visualizer:
+            from .ui.visualizer import WaveformVisualizer
+
             self._visualizer = WaveformVisualizer()
+            self._visualizer.set_active(self.state == AppState.RECORDING)
             self._visualizer.show()
         elif self._visualizer:
             self._visualizer.close()
             self._visualizer = None
 
-    def _handle_amplitude(self, amplitude: float) -> None:
-        if self._visualizer:
-            self._visualizer.push_amplitude(amplitude)
+    def _on_engine_event(self, event: Dict[str, Any]) -> None:
+        """Runs on engine (or IPC) threads and hands the event to the GUI thread through the bus."""
+        if event["event"] == "levels" and self._visualizer is None:
+            return
+        bus_event = parse_engine_event(event)
+        if bus_event is not None:
+            self._bus.post(bus_event)
+
+    def _push_levels(self, event: LevelsChanged) -> None:
+        if self._visualizer is not None:
+            self._visualizer.push_levels(event.frame)
+
+    def _handle_disconnected(self, event: Disconnected) -> None:
+        self._recording = False
+        self.update_state(AppState.ERROR, "Daemon stopped")
+        self._tray.show_message("GetDict daemon stopped", "Restart GetDict to continue dictating.")
 
     def update_state(self, state: AppState, tooltip: str | None = None) -> None:
         logger.debug("State transition: %s -> %s", self.state, state)
         self.state = state
         self._tray.update_state(state, tooltip)
+        if self._visualizer:
+            self._visualizer.set_active(state == AppState.RECORDING)
 
-    def start_recording(self) -> None:
-        if self.state == AppState.RECORDING:
-            return
-        if not self._transcription_client.is_configured:
-            self._tray.show_message("Configuration required", "Set your OpenAI API key in Settings before recording.")
-            return
+    def _command(self, action: Callable[[], Any]) -> bool:
         try:
-            self._recorder.start()
-        except RecordingError as exc:
-            logger.exception("Failed to start recording: %s", exc)
-            self.update_state(AppState.ERROR, tooltip="Recording error")
-            self._tray.show_message("Recording failed", str(exc))
-            return
-        self.update_state(AppState.RECORDING, "Listening...")
+            action()
+        except EngineError as exc:
+            # Commands also run on hotkey threads, so the message goes through the bus.
+            self._bus.post(Notice(exc.title, str(exc)))
+            return False
+        return True
+
+    @_when_ready
+    def start_recording(self) -> None:
+        assert self._engine is not None
+        with self._command_lock:
+            if not self._recording:
+                self._recording = self._command(self._engine.start_recording)
 
+    @_when_ready
     def stop_recording(self) -> None:
-        if self.state != AppState.RECORDING:
-            return
-        try:
-            result = self._recorder.stop()
-        except RecordingError as exc:
-            logger.exception("Failed to stop recording: %s", exc)
-            self.update_state(AppState.ERROR, "Recording error")
-            self._tray.show_message("Recording error", str(exc))
+        assert self._engine is not None
+        with self._command_lock:
+            if self._recording:
+                self._recording = False
+                self._command(self._engine.stop_recording)
+
+    @_when_ready
+    def toggle_recording(self) -> None:
+        if self._recording:
+            self.stop_recording()
+        else:
+            self.start_recording()
+
+    @_when_ready
+    def cancel_recording(self) -> None:
+        """Stops the current recording and drops it, including segments already sent."""
+        assert self._engine is not None
+        with self._command_lock:
+            if self._recording:
+                self._recording = False
+                self._command(self._engine.cancel_recording)
+
+    @_when_ready
+    def _pick_up(self, result: SpooledResult) -> None:
+        from .insertion import copy_to_clipboard
+
+        copied = copy_to_clipboard(result.text)
+        if not copied.success:
+            self._tray.show_message("Copy failed", copied.message or "Unable to copy text")
             return
-        self.update_state(AppState.PROCESSING, "Transcribing...")
-        self._processing_thread = threading.Thread(target=self._process_audio, args=(result.path,), daemon=True)
-        self._processing_thread.start()
+        assert self._engine is not None
+        if self._command(lambda: self._engine.dismiss_pickup(result.result_id)):
+            self._tray.show_message("Copied to clipboard", "The recovered dictation is ready to paste.")
+
+    @_when_ready
+    def show_stats(self) -> None:
+        from .metrics import METRICS_DIR_NAME
+        from .ui.stats_dialog import StatsDialog
 
-    def _process_audio(self, audio_path: Path) -> None:
+        assert self._engine is not None
         try:
-            request = TranscriptionRequest(audio_path=audio_path)
-            transcription = self._transcription_client.transcribe(request)
-        except (TranscriptionError, Exception) as exc:
-            logger.exception("Transcription failed: %s", exc)
-            self.update_state(AppState.ERROR, "Transcription failed")
-            self._tray.show_message("Transcription failed", str(exc))
+            stats = self._engine.stats()
+        except EngineError as exc:
+            self._tray.show_message(exc.title, str(exc))
             return
-        try:
-            insertion = insert_text(transcription.text)
-            if not insertion.success:
-                self.update_state(AppState.ERROR, insertion.message or "Insertion failed")
-                self._tray.show_message("Insertion failed", insertion.message or "Unable to insert text")
-                return
-            self.update_state(AppState.IDLE, "Ready")
-            preview = transcription.text.strip()
-            if len(preview) > 120:
-                preview = preview[:117] + "…"
-            if not preview:
-                preview = "(No text recognised)"
-            self._tray.show_message("Transcription complete", preview)
-        finally:
+        dialog = StatsDialog(stats["latency"], str(Settings.config_dir() / METRICS_DIR_NAME), stats["requests"])
+        dialog.exec()
+
+    @_when_ready
+    def show_history(self) -> None:
+        from .history import HistoryEntry
+        from .insertion import copy_to_clipboard
+        from .ui.history_dialog import HistoryDialog
+
+        assert self._engine is not None
+        engine = self._engine
+
+        def search(query: str) -> list[HistoryEntry]:
             try:
-                audio_path.unlink(missing_ok=True)
-            except Exception:  # pragma: no cover
-                logger.debug("Unable to delete temporary audio file %s", audio_path)
+                return [HistoryEntry(**entry) for entry in engine.history(query)["entries"]]
+            except EngineError as exc:
+                self._tray.show_message(exc.title, str(exc))
+                return []
 
+        dialog = HistoryDialog(search)
+        if not dialog.exec() or dialog.selected is None:
+            return
+        entry = dialog.selected
+        if dialog.action == "copy":
+            copied = copy_to_clipboard(entry.text)
+            if not copied.success:
+                self._tray.show_message("Copy failed", copied.message or "Unable to copy text")
+            return
+        # Give focus time to return to the window the dialog was opened over before pasting.
+        QTimer.singleShot(REINSERT_DELAY_MS, lambda: self._reinsert(entry.entry_id))
+
+    def _reinsert(self, entry_id: int) -> None:
+        engine = self._engine
+        assert engine is not None
+        # Off the GUI thread: the engine waits for held hotkeys to be released before pasting.
+        threading.Thread(
+            target=self._command, args=(lambda: engine.reinsert(entry_id),), name="getdict-reinsert", daemon=True
+        ).start()
+
+    @_when_ready
     def open_settings(self) -> None:
+        from .ui.settings_dialog import SettingsDialog
+
         dialog = SettingsDialog(self.settings)
         if dialog.exec():
             self._hotkeys.stop()
-            self._hotkeys = HotkeyListener(
-                self.settings.hotkey,
-                on_start=self.start_recording,
-                on_stop=self.stop_recording,
-            )
+            self._hotkeys = self._create_hotkeys()
             self._hotkeys.start()
             QTimer.singleShot(0, self._initialise_visualizer)
-            self._transcription_client = TranscriptionClient(self.settings)
-            self.update_state(AppState.IDLE, "Ready")
+            assert self._engine is not None
+            self._command(self._engine.reconfigure)
 
     def quit(self) -> None:
         logger.info("Shutting down application")
-        self._hotkeys.stop()
+        if self._ready.is_set():
+            self._hotkeys.stop()
+        if self._server is not None:
+            self._server.close()
+        if self._engine is not None:
+            self._engine.close()
         QApplication.quit()
 
 
-def run() -> None:
+def run(profiler: Optional[StartupProfiler] = None) -> None:
     logging.basicConfig(
         level=logging.INFO,
         format="[%(levelname)s] %(name)s: %(message)s",
     )
-    app = QApplication(sys.argv)
-    controller = GetDictController()
+    profiler = profiler or StartupProfiler()
+    with profiler.phase("create QApplication"):
+        app = QApplication(sys.argv)
+    controller = GetDictController(profiler)
     sys.exit(app.exec())
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import io
 import logging
-import queue
+import math
 import threading
 import time
 from pathlib import Path
@@ -12,81 +13,344 @@ import numpy as np
 import sounddevice as sd
 import soundfile as sf
 
-from .models import RecordingError, RecordingResult, WaveformCallback
+from .encoding import UplinkEstimator, resolve_codec, soundfile_options
+from .levels import LevelMeter
+from .models import AudioCodec, RecordingError, RecordingResult, SegmentCallback, WaveformCallback
+from .resample import StreamingResampler
+from .ringbuffer import RingBuffer
+from .vad import SpeechGate
 from .settings import AudioSettings
 
 logger = logging.getLogger(__name__)
 
 
+class _SegmentSink:
+    """Encoder receiving one segment of the live stream.
+
+    Encodes into a growable in-memory buffer when ``AudioSettings.in_memory`` is set,
+    otherwise into a temporary file. Time spent in the encoder is accumulated so the
+    result can report it next to the encoded size.
+    """
+
+    def __init__(self, settings: AudioSettings, index: int, codec: AudioCodec = AudioCodec.FLAC) -> None:
+        self._settings = settings
+        self.index = index
+        self.codec = codec
+        self.frames = 0
+        self._encode_seconds = 0.0
+        self.path: Optional[Path] = None
+        self._buffer: Optional[io.BytesIO] = None
+        target: str | io.BytesIO
+        if settings.in_memory:
+            self._buffer = io.BytesIO()
+            target = self._buffer
+        else:
+            temp_file = NamedTemporaryFile(delete=False, suffix=codec.suffix)
+            temp_file.close()
+            self.path = Path(temp_file.name)
+            target = str(self.path)
+        started = time.perf_counter()
+        self._file = sf.SoundFile(
+            target,
+            mode="w",
+            samplerate=settings.sample_rate,
+            channels=settings.channels,
+            **soundfile_options(codec, settings),
+        )
+        self._encode_seconds += time.perf_counter() - started
+
+    def write(self, data: np.ndarray) -> None:
+        started = time.perf_counter()
+        self._file.write(data)
+        self._encode_seconds += time.perf_counter() - started
+        self.frames += len(data)
+
+    def close(self, has_speech: bool = True) -> RecordingResult:
+        started = time.perf_counter()
+        self._file.close()
+        self._encode_seconds += time.perf_counter() - started
+        if self._buffer is not None:
+            data: Optional[memoryview] = self._buffer.getbuffer()
+            size = len(data)
+        else:
+            assert self.path is not None
+            data = None
+            size = self.path.stat().st_size
+        result = RecordingResult(
+            duration_seconds=self.frames / self._settings.sample_rate,
+            path=self.path,
+            data=data,
+            index=self.index,
+            has_speech=has_speech,
+            codec=self.codec,
+            encoded_bytes=size,
+            encode_seconds=self._encode_seconds,
+        )
+        logger.debug(
+            "Encoded %.2fs of audio as %s: %d bytes in %.1f ms",
+            result.duration_seconds,
+            self.codec.value,
+            size,
+            self._encode_seconds * 1000,
+        )
+        return result
+
+
 class AudioRecorder:
-    """Captures microphone input and writes it to a FLAC file."""
+    """Captures microphone input and encodes it in memory or on disk.
+
+    The codec comes from ``AudioSettings.codec`` and is fixed per recording; with
+    ``"auto"`` it is picked at ``start`` from the ``uplink`` estimate.
 
-    def __init__(self, settings: AudioSettings, waveform_callback: Optional[WaveformCallback] = None) -> None:
+    The stream passes through a :class:`SpeechGate` that trims leading and trailing
+    silence and flags recordings without speech. When a ``segment_callback`` is
+    given and ``segment_on_pause`` is enabled, the stream is also cut at pauses and
+    each finished segment is handed to the callback while recording continues;
+    ``stop`` then returns only the final segment.
+
+    With ``native_format`` enabled the device is opened at its default rate and
+    channel count, since some headsets reject or badly resample 16 kHz, and the
+    writer thread downmixes and resamples to ``sample_rate``/``channels``. Samples
+    stay int16 from the device to the encoder.
+
+    The realtime callback only copies blocks into the ring buffer. Everything
+    else, including the conversion above and the level analysis behind
+    ``waveform_callback``, runs on the writer thread.
+
+    With ``warm_stream`` enabled the input stream stays open between recordings,
+    filling the ring buffer in overwrite mode; ``start`` then begins the capture
+    ``preroll_ms`` in the past instead of waiting for the device to open.
+    """
+
+    def __init__(
+        self,
+        settings: AudioSettings,
+        waveform_callback: Optional[WaveformCallback] = None,
+        segment_callback: Optional[SegmentCallback] = None,
+        uplink: Optional[UplinkEstimator] = None,
+    ) -> None:
         self._settings = settings
+        self._uplink = uplink
+        self._codec = resolve_codec(settings, uplink)
         self._waveform_callback = waveform_callback
-        self._queue: queue.Queue[np.ndarray] = queue.Queue()
+        self._segment_callback = segment_callback
+        self._buffer: Optional[RingBuffer] = None
         self._stream: Optional[sd.InputStream] = None
         self._start_time: float | None = None
         self._recording_thread: Optional[threading.Thread] = None
-        self._stop_event = threading.Event()
-        self._temp_file: Optional[NamedTemporaryFile] = None
+        self._final_result: Optional[RecordingResult] = None
+        self._first_frame_at: Optional[float] = None
+        self._writer_error: Optional[Exception] = None
+        self._capturing = False
+        self._capture_rate = settings.sample_rate
+        self._capture_channels = settings.channels
+        # The settings the open stream was opened with; see _stream_config.
+        self._stream_config: Optional[tuple] = None
+
+    def prepare(self) -> None:
+        """Opens the stream ahead of time when ``warm_stream`` is enabled, or closes an idle one.
+
+        A warm stream opened with settings that have since changed is reopened.
+        """
+        if self._capturing:
+            return
+        if not self._settings.warm_stream:
+            self.close()
+            return
+        try:
+            self._open_stream()
+        except Exception as exc:
+            logger.warning("Unable to keep the input stream open: %s", exc)
+
+    def close(self) -> None:
+        """Closes a warm stream; recording reopens it on demand."""
+        if self._stream is not None and not self._capturing:
+            self._close_stream()
 
     def start(self) -> None:
-        if self._stream is not None:
+        if self._capturing:
             raise RecordingError("Recorder already running")
-        self._stop_event.clear()
-        self._queue = queue.Queue()
-        self._temp_file = NamedTemporaryFile(delete=False, suffix=".flac")
+        self._final_result = None
+        self._writer_error = None
+        self._codec = resolve_codec(self._settings, self._uplink)
         self._start_time = time.monotonic()
-        self._stream = sd.InputStream(
-            samplerate=self._settings.sample_rate,
-            channels=self._settings.channels,
-            dtype=self._settings.dtype,
-            blocksize=self._settings.block_size,
-            callback=self._callback,
-        )
-        self._stream.start()
+        if self._settings.warm_stream:
+            if self._stream is not None and not self._stream.active:
+                logger.warning("Warm input stream stopped unexpectedly; reopening")
+                self._close_stream()
+            self._open_stream()
+            assert self._buffer is not None
+            if self._first_frame_at is not None:
+                # Audio is already flowing; the capture starts with the pre-roll.
+                self._first_frame_at = self._start_time
+            self._buffer.begin_capture(int(self._settings.preroll_ms * self._capture_rate / 1000))
+        else:
+            self._close_stream()
+            self._open_stream()
+        self._capturing = True
         self._recording_thread = threading.Thread(target=self._writer_loop, daemon=True)
         self._recording_thread.start()
 
+    @property
+    def first_frame_at(self) -> Optional[float]:
+        """Monotonic time at which the current recording received its first audio block."""
+        return self._first_frame_at
+
     def stop(self) -> RecordingResult:
-        if self._stream is None:
+        if not self._capturing:
             raise RecordingError("Recorder is not running")
-        self._stop_event.set()
-        self._stream.stop()
-        self._stream.close()
-        self._stream = None
+        self._capturing = False
+        warm = self._settings.warm_stream and self._stream is not None
+        if not warm:
+            self._close_stream()
+        buffer = self._buffer
+        assert buffer is not None
+        buffer.close()
+        overruns, dropped_frames = buffer.overruns, buffer.dropped_frames
         if self._recording_thread:
             self._recording_thread.join()
-        if self._temp_file is None:
-            raise RecordingError("No recording file created")
-        duration = 0.0
+        if warm:
+            buffer.overwrite()
+        if overruns:
+            logger.warning("Audio ring buffer overran %d times; %d frames dropped", overruns, dropped_frames)
+        if self._writer_error is not None:
+            raise RecordingError(f"Failed to write recording: {self._writer_error}") from self._writer_error
+        if self._final_result is None:
+            raise RecordingError("No recording created")
+        self._final_result.dropped_frames = dropped_frames
         if self._start_time is not None:
-            duration = time.monotonic() - self._start_time
-        return RecordingResult(path=Path(self._temp_file.name), duration_seconds=duration)
+            logger.debug("Recording stopped after %.2fs", time.monotonic() - self._start_time)
+        return self._final_result
 
     def _callback(self, indata: np.ndarray, frames: int, time_info: dict, status: sd.CallbackFlags) -> None:  # type: ignore[override]
         if status:
             logger.warning("Audio stream status: %s", status)
-        # Copy the buffer to avoid referencing the original data once the callback returns
-        self._queue.put(indata.copy())
-        if self._waveform_callback:
-            amplitude = float(np.abs(indata).mean())
-            self._waveform_callback(amplitude)
+        if self._first_frame_at is None:
+            self._first_frame_at = time.monotonic()
+        assert self._buffer is not None
+        self._buffer.write(indata)
+
+    def _current_stream_config(self) -> tuple:
+        """The settings that shape the stream and its ring buffer."""
+        settings = self._settings
+        return (
+            settings.sample_rate,
+            settings.channels,
+            settings.dtype,
+            settings.block_size,
+            settings.buffer_seconds,
+            settings.warm_stream,
+            settings.preroll_ms,
+            settings.native_format,
+            settings.max_capture_channels,
+        )
+
+    def _open_stream(self) -> None:
+        config = self._current_stream_config()
+        if self._stream is not None:
+            if config == self._stream_config:
+                return
+            logger.info("Audio settings changed; reopening the input stream")
+            self._close_stream()
+        self._capture_rate, self._capture_channels = self._capture_format()
+        self._prepare_buffer()
+        self._first_frame_at = None
+        if self._settings.warm_stream:
+            assert self._buffer is not None
+            self._buffer.overwrite()
+        stream = sd.InputStream(
+            samplerate=self._capture_rate,
+            channels=self._capture_channels,
+            dtype=self._settings.dtype,
+            blocksize=self._settings.block_size,
+            callback=self._callback,
+        )
+        stream.start()
+        self._stream = stream
+        self._stream_config = config
+
+    def _capture_format(self) -> tuple[int, int]:
+        """Rate and channel count to open the input device with."""
+        if not self._settings.native_format:
+            return self._settings.sample_rate, self._settings.channels
+        try:
+            info = sd.query_devices(kind="input")
+            rate = int(info["default_samplerate"])
+            channels = min(int(info["max_input_channels"]), max(self._settings.max_capture_channels, 1))
+        except Exception as exc:
+            logger.warning("Unable to query the input device; capturing at %d Hz: %s", self._settings.sample_rate, exc)
+            return self._settings.sample_rate, self._settings.channels
+        if rate <= 0 or channels <= 0:
+            return self._settings.sample_rate, self._settings.channels
+        logger.debug("Capturing at the device's native %d Hz, %d channel(s)", rate, channels)
+        return rate, channels
+
+    def _close_stream(self) -> None:
+        if self._stream is None:
+            return
+        self._stream.stop()
+        self._stream.close()
+        self._stream = None
+
+    def _prepare_buffer(self) -> None:
+        block_size = max(self._settings.block_size, 1)
+        preroll = self._settings.preroll_ms / 1000 if self._settings.warm_stream else 0.0
+        seconds = self._settings.buffer_seconds + preroll
+        blocks = max(math.ceil(seconds * self._capture_rate / block_size), 2)
+        capacity = blocks * block_size
+        buffer = self._buffer
+        if (
+            buffer is None
+            or buffer.capacity != capacity
+            or buffer.channels != self._capture_channels
+            or buffer.dtype != np.dtype(self._settings.dtype)
+        ):
+            self._buffer = RingBuffer(capacity, self._capture_channels, self._settings.dtype)
+        else:
+            buffer.reset()
 
     def _writer_loop(self) -> None:
-        assert self._temp_file is not None
-        with sf.SoundFile(
-            self._temp_file.name,
-            mode="w",
-            samplerate=self._settings.sample_rate,
-            channels=self._settings.channels,
-            subtype="PCM_16",
-            format="FLAC",
-        ) as file:
-            while not self._stop_event.is_set() or not self._queue.empty():
-                try:
-                    data = self._queue.get(timeout=0.1)
-                except queue.Empty:
+        try:
+            self._final_result = self._write_segments()
+        except Exception as exc:  # pragma: no cover - surfaced through stop()
+            logger.exception("Audio writer failed: %s", exc)
+            self._writer_error = exc
+
+    def _write_segments(self) -> RecordingResult:
+        segmenting = self._segment_callback is not None and self._settings.segment_on_pause
+        pause_frames = int(self._settings.segment_pause_ms * self._settings.sample_rate / 1000)
+        min_frames = int(self._settings.segment_min_seconds * self._settings.sample_rate)
+        buffer = self._buffer
+        assert buffer is not None
+        gate = SpeechGate(self._settings, trim=self._settings.vad_enabled)
+        meter = LevelMeter(self._settings.sample_rate) if self._waveform_callback else None
+        resampler = StreamingResampler(
+            self._capture_rate, self._settings.sample_rate, self._capture_channels, self._settings.channels
+        )
+        segment = _SegmentSink(self._settings, index=0, codec=self._codec)
+        while buffer.wait():
+            for block in buffer.drain():
+                data = resampler.process(block)
+                if not len(data):
+                    continue
+                if meter is not None:
+                    frames = meter.feed(data)
+                    if frames:
+                        assert self._waveform_callback is not None
+                        self._waveform_callback(frames[-1])
+                for part in gate.feed(data):
+                    segment.write(part)
+                if not segmenting or not gate.has_speech:
                     continue
-                file.write(data)
+                if segment.frames >= min_frames and gate.trailing_silence >= pause_frames:
+                    for part in gate.finish():
+                        segment.write(part)
+                    gate.reset()
+                    finished = segment.close()
+                    logger.debug("Segment %d finished (%.2fs)", finished.index, finished.duration_seconds)
+                    assert self._segment_callback is not None
+                    self._segment_callback(finished)
+                    segment = _SegmentSink(self._settings, index=finished.index + 1, codec=self._codec)
+        for part in gate.finish():
+            segment.write(part)
+        return segment.close(has_speech=gate.has_speech or not self._settings.vad_enabled)
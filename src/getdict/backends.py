@@ -0,0 +1,387 @@
+from __future__ import annotations
+
+import abc
+import hashlib
+import io
+import logging
+import multiprocessing
+import threading
+import time
+from contextlib import contextmanager
+from multiprocessing.connection import Connection
+from typing import IO, Any, Dict, Hashable, Iterator, List, Optional, Tuple, Type, Union
+
+from openai import APIConnectionError, APIStatusError, DefaultHttpxClient, OpenAI, OpenAIError
+
+try:  # openai>=3 is built on httpx2; earlier releases use httpx
+    import httpx2 as httpx
+except ImportError:  # pragma: no cover
+    import httpx
+
+from .models import RetryableError, TranscriptionError, TranscriptionRequest
+from .resilience import parse_retry_after
+from .settings import Settings, TranscriptionSettings
+
+logger = logging.getLogger(__name__)
+
+LOCAL_SAMPLE_RATE = 16000
+LOCAL_STARTUP_TIMEOUT = 300.0
+KEEPALIVE_SECONDS = 120.0
+CONNECT_TIMEOUT = 5.0
+REQUEST_TIMEOUT = 60.0
+# Statuses worth retrying; other 4xx responses mean the request itself is wrong.
+RETRYABLE_STATUSES = frozenset({408, 409, 429})
+
+
+@contextmanager
+def _open_audio(request: TranscriptionRequest) -> Iterator[Union[IO[bytes], Tuple[str, IO[bytes]]]]:
+    if request.audio_data is not None:
+        yield (request.filename, io.BytesIO(request.audio_data))
+        return
+    if request.audio_path is None:
+        raise TranscriptionError("Transcription request has no audio")
+    with open(request.audio_path, "rb") as fh:
+        yield fh
+
+
+def _read_audio(request: TranscriptionRequest) -> bytes:
+    if request.audio_data is not None:
+        return bytes(request.audio_data)
+    if request.audio_path is None:
+        raise TranscriptionError("Transcription request has no audio")
+    return request.audio_path.read_bytes()
+
+
+class TranscriptionBackend(abc.ABC):
+    """Engine that turns one request into text; selected by ``TranscriptionSettings.provider``."""
+
+    # Whether requests cross the network, so their timing says something about the uplink.
+    remote = False
+
+    def __init__(self, settings: Settings) -> None:
+        self._settings = settings
+
+    @staticmethod
+    def connection_key(settings: Settings) -> Hashable:
+        """Settings that require a new backend when they change; others are read per request."""
+        return settings.transcription.provider
+
+    @property
+    def is_configured(self) -> bool:
+        return True
+
+    @abc.abstractmethod
+    def transcribe(self, request: TranscriptionRequest) -> str:
+        """Returns the text for ``request``; raises :class:`RetryableError` for failures worth retrying."""
+
+    def warm_up(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class OpenAIBackend(TranscriptionBackend):
+    """Calls the OpenAI (or a compatible) Whisper endpoint.
+
+    Requests share one keep-alive connection pool for the lifetime of the backend,
+    and :meth:`warm_up` opens a connection ahead of the upload so DNS and the
+    TCP/TLS handshake overlap with the user speaking.
+    """
+
+    remote = True
+
+    def __init__(self, settings: Settings) -> None:
+        super().__init__(settings)
+        self._last_used = 0.0
+        self._warming = threading.Lock()
+        self._http: Any = None
+        self._client = self._create_client()
+
+    @staticmethod
+    def connection_key(settings: Settings) -> Hashable:
+        return (settings.transcription.provider, settings.api_key, settings.transcription.api_base_url)
+
+    @property
+    def is_configured(self) -> bool:
+        return self._client is not None
+
+    def _create_client(self) -> Optional[OpenAI]:
+        if not self._settings.api_key:
+            logger.warning("No API key configured; transcription will be disabled")
+            return None
+        self._http = DefaultHttpxClient(
+            limits=httpx.Limits(
+                max_connections=8,
+                max_keepalive_connections=4,
+                keepalive_expiry=KEEPALIVE_SECONDS,
+            ),
+            timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+        )
+        # Retries and Retry-After are handled by TranscriptionClient, not the SDK.
+        kwargs = {"api_key": self._settings.api_key, "http_client": self._http, "max_retries": 0}
+        if self._settings.transcription.api_base_url:
+            kwargs["base_url"] = self._settings.transcription.api_base_url
+        return OpenAI(**kwargs)
+
+    def warm_up(self) -> None:
+        if self._client is None:
+            return
+        # A connection used recently is still in the pool; don't add traffic.
+        if time.monotonic() - self._last_used < KEEPALIVE_SECONDS / 2:
+            return
+        if not self._warming.acquire(blocking=False):
+            return
+        threading.Thread(target=self._warm_connection, name="getdict-warm-up", daemon=True).start()
+
+    def _warm_connection(self) -> None:
+        assert self._client is not None
+        start = time.monotonic()
+        try:
+            # Any response leaves a live, authenticated TLS connection in the pool.
+            self._http.head(str(self._client.base_url))
+            self._last_used = time.monotonic()
+            logger.debug("Connection warm-up finished in %.3fs", self._last_used - start)
+        except Exception as exc:
+            logger.debug("Connection warm-up failed: %s", exc)
+        finally:
+            self._warming.release()
+
+    def transcribe(self, request: TranscriptionRequest) -> str:
+        if self._client is None:
+            raise TranscriptionError("Transcription client is not configured")
+        self._last_used = time.monotonic()
+        try:
+            with _open_audio(request) as fh:
+                response = self._client.audio.transcriptions.create(
+                    model=self._settings.transcription.model,
+                    file=fh,
+                    temperature=self._settings.transcription.temperature,
+                    language=self._settings.transcription.language,
+                    prompt=request.prompt,
+                    response_format="text",
+                )
+        except APIStatusError as exc:
+            logger.error("OpenAI transcription error: %s", exc)
+            if exc.status_code in RETRYABLE_STATUSES or exc.status_code >= 500:
+                raise RetryableError(str(exc), parse_retry_after(exc.response.headers)) from exc
+            raise TranscriptionError(f"Transcription rejected ({exc.status_code}): {exc.message}") from exc
+        except APIConnectionError as exc:
+            logger.error("OpenAI transcription error: %s", exc)
+            raise RetryableError(str(exc)) from exc
+        except OpenAIError as exc:
+            logger.exception("OpenAI transcription error: %s", exc)
+            raise
+        self._last_used = time.monotonic()
+        logger.debug("Transcription response received: %s", response)
+        return getattr(response, "text", str(response))
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+
+
+def _load_local_model(settings: TranscriptionSettings) -> Any:
+    try:
+        from faster_whisper import WhisperModel
+    except ImportError as exc:
+        raise TranscriptionError("Local transcription requires the 'faster-whisper' package") from exc
+    logger.info("Loading local Whisper model %s on %s", settings.local_model, settings.local_device)
+    return WhisperModel(settings.local_model, device=settings.local_device, compute_type=settings.local_compute_type)
+
+
+def _run_local_model(model: Any, audio: bytes, language: Optional[str], temperature: float, prompt: Optional[str]) -> str:
+    import soundfile as sf
+
+    source: Any = io.BytesIO(audio)
+    samples, rate = sf.read(source, dtype="float32", always_2d=True)
+    if rate == LOCAL_SAMPLE_RATE:
+        # Decoded PCM skips faster-whisper's own (PyAV) decoding step.
+        source = samples.mean(axis=1)
+    else:
+        source.seek(0)
+    segments, _ = model.transcribe(
+        source,
+        language=language,
+        temperature=temperature,
+        initial_prompt=prompt,
+    )
+    return "".join(segment.text for segment in segments).strip()
+
+
+def _serve_local_model(model: Any, conn: Connection) -> None:
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        try:
+            conn.send(("ok", _run_local_model(model, *message)))
+        except Exception as exc:  # pragma: no cover - reported to the parent
+            conn.send(("error", f"{type(exc).__name__}: {exc}"))
+
+
+def _local_worker_main(settings: TranscriptionSettings, conn: Connection) -> None:
+    try:
+        model = _load_local_model(settings)
+    except Exception as exc:
+        conn.send(("error", f"{type(exc).__name__}: {exc}"))
+        return
+    conn.send(("ready", None))
+    _serve_local_model(model, conn)
+
+
+class LocalBackend(TranscriptionBackend):
+    """Runs Whisper locally through faster-whisper.
+
+    The model is loaded once, by :meth:`warm_up` or else the first request, and
+    kept warm: by default in a persistent worker process (so inference never
+    blocks the GUI's interpreter), or in a background thread of this process
+    when ``local_in_process`` is set. Requests are serialised to the engine
+    rather than reloading anything.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        super().__init__(settings)
+        self._config = settings.transcription
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._load_error: Optional[str] = None
+        self._model: Any = None
+        self._process: Optional[multiprocessing.process.BaseProcess] = None
+        self._conn: Optional[Connection] = None
+        self._loader: Optional[threading.Thread] = None
+
+    @staticmethod
+    def connection_key(settings: Settings) -> Hashable:
+        config = settings.transcription
+        return (config.provider, config.local_model, config.local_device, config.local_compute_type, config.local_in_process)
+
+    def warm_up(self) -> None:
+        """Starts loading the model in the background if it is not loaded or loading yet."""
+        # A request holding the lock has already started the engine.
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._start()
+        finally:
+            self._lock.release()
+
+    def _start(self) -> None:
+        if self._config.local_in_process:
+            if self._loader is None:
+                self._loader = threading.Thread(target=self._load_in_process, name="getdict-local-model", daemon=True)
+                self._loader.start()
+        elif self._process is None:
+            self._start_worker()
+
+    def _load_in_process(self) -> None:
+        try:
+            self._model = _load_local_model(self._config)
+        except Exception as exc:
+            logger.exception("Failed to load local model: %s", exc)
+            self._load_error = f"{type(exc).__name__}: {exc}"
+        finally:
+            self._ready.set()
+
+    def _start_worker(self) -> None:
+        context = multiprocessing.get_context("spawn")
+        parent, child = context.Pipe()
+        self._process = context.Process(
+            target=_local_worker_main,
+            args=(self._config, child),
+            name="getdict-local-engine",
+            daemon=True,
+        )
+        self._process.start()
+        child.close()
+        self._conn = parent
+        self._ready.clear()
+        self._load_error = None
+
+    def _await_worker(self) -> Connection:
+        if self._process is None:
+            self._start_worker()
+        elif not self._process.is_alive():
+            logger.warning("Local engine worker is not running; restarting it")
+            self._start_worker()
+        assert self._conn is not None
+        if not self._ready.is_set():
+            if not self._conn.poll(LOCAL_STARTUP_TIMEOUT):
+                raise TranscriptionError("Local engine did not start in time")
+            status, detail = self._conn.recv()
+            self._ready.set()
+            if status != "ready":
+                self._load_error = detail
+        if self._load_error:
+            raise TranscriptionError(f"Local engine failed to load: {self._load_error}")
+        return self._conn
+
+    def transcribe(self, request: TranscriptionRequest) -> str:
+        job = (_read_audio(request), self._config.language, self._config.temperature, request.prompt)
+        with self._lock:
+            if self._config.local_in_process:
+                self._start()
+                self._ready.wait()
+                if self._load_error:
+                    raise TranscriptionError(f"Local engine failed to load: {self._load_error}")
+                return _run_local_model(self._model, *job)
+            conn = self._await_worker()
+            try:
+                conn.send(job)
+                status, detail = conn.recv()
+            except (EOFError, OSError) as exc:
+                self._process = None
+                raise TranscriptionError("Local engine worker exited unexpectedly") from exc
+        if status != "ok":
+            raise TranscriptionError(f"Local transcription failed: {detail}")
+        return detail
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.send(None)
+                except (OSError, ValueError):
+                    pass
+                self._conn.close()
+                self._conn = None
+            if self._process is not None:
+                self._process.join(timeout=2)
+                if self._process.is_alive():
+                    self._process.terminate()
+                self._process = None
+            self._model = None
+
+
+class StubBackend(TranscriptionBackend):
+    """Deterministic engine for tests: echoes ``stub_text`` or a digest of the audio."""
+
+    def __init__(self, settings: Settings) -> None:
+        super().__init__(settings)
+        self.requests: List[TranscriptionRequest] = []
+
+    def transcribe(self, request: TranscriptionRequest) -> str:
+        audio = _read_audio(request)
+        self.requests.append(request)
+        if self._settings.transcription.stub_text is not None:
+            return self._settings.transcription.stub_text
+        return f"stub-{hashlib.sha1(audio).hexdigest()[:12]}"
+
+
+BACKENDS: Dict[str, Type[TranscriptionBackend]] = {
+    "openai": OpenAIBackend,
+    "local": LocalBackend,
+    "stub": StubBackend,
+}
+
+
+def create_backend(settings: Settings) -> TranscriptionBackend:
+    provider = settings.transcription.provider
+    try:
+        backend_cls = BACKENDS[provider]
+    except KeyError:
+        raise TranscriptionError(f"Unknown transcription provider {provider!r}") from None
+    return backend_cls(settings)
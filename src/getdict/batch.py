@@ -0,0 +1,387 @@
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from .models import TranscriptionError, TranscriptionRequest, TranscriptionResult
+from .segments import join_segments
+from .settings import Settings
+
+if TYPE_CHECKING:
+    from .transcription import TranscriptionClient
+
+logger = logging.getLogger(__name__)
+
+AUDIO_SUFFIXES = frozenset({".flac", ".wav", ".ogg", ".oga", ".opus", ".mp3", ".mpga", ".mpeg", ".m4a", ".mp4", ".webm"})
+# The OpenAI transcription endpoint rejects uploads over 25 MB.
+MAX_UPLOAD_BYTES = 25 * 1000 * 1000
+CHUNK_SAMPLE_RATE = 16000
+# Ten minutes of 16 kHz mono PCM is 19.2 MB, so a chunk fits even if it does not compress.
+CHUNK_SECONDS = 600.0
+# Chunks are cut at the quietest 30 ms frame within this many seconds before the limit.
+CUT_SEARCH_SECONDS = 5.0
+CUT_FRAME_SECONDS = 0.03
+MANIFEST_SUFFIX = ".manifest.jsonl"
+
+
+@dataclass
+class BatchOptions:
+    output: Optional[Path] = None
+    manifest: Optional[Path] = None
+    concurrency: int = 4
+    # Requests started per minute across all workers; 0 disables the limit.
+    rate_per_minute: float = 0.0
+    max_upload_bytes: int = MAX_UPLOAD_BYTES
+    chunk_seconds: float = CHUNK_SECONDS
+
+
+@dataclass
+class BatchResult:
+    path: str
+    text: str = ""
+    chunks: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchSummary:
+    done: int = 0
+    skipped: int = 0
+    failed: int = 0
+    results: List[BatchResult] = field(default_factory=list)
+
+
+class RateLimiter:
+    """Spaces request starts evenly so at most ``rate_per_minute`` begin per minute."""
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def acquire(self) -> None:
+        if not self._interval:
+            return
+        with self._lock:
+            now = self._clock()
+            start = max(now, self._next)
+            self._next = start + self._interval
+        if start > now:
+            self._sleep(start - now)
+
+
+class Manifest:
+    """Append-only record of finished files, keyed by path, size and modification time.
+
+    A file that changed since it was transcribed is done again.
+    """
+
+    def __init__(self, path: Optional[Path]) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+        self._done: Dict[str, tuple] = {}
+        if path is not None and path.exists():
+            for line in path.read_text(encoding="utf-8").splitlines():
+                try:
+                    entry = json.loads(line)
+                    self._done[entry["path"]] = (entry["size"], entry["mtime"])
+                except (ValueError, KeyError, TypeError):
+                    logger.warning("Ignoring unreadable manifest line in %s", path)
+
+    def is_done(self, path: Path) -> bool:
+        return self._done.get(str(path)) == _signature(path)
+
+    def mark_done(self, path: Path) -> None:
+        if self._path is None:
+            return
+        size, mtime = _signature(path)
+        line = json.dumps({"path": str(path), "size": size, "mtime": mtime, "finished": time.time()})
+        with self._lock:
+            self._done[str(path)] = (size, mtime)
+            with self._path.open("a", encoding="utf-8") as fh:
+                fh.write(line + "\n")
+
+
+def _signature(path: Path) -> tuple:
+    stat = path.stat()
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def find_audio_files(paths: Iterable[Path]) -> List[Path]:
+    """Expands directories recursively and keeps files with a known audio suffix, in a stable order."""
+    found: List[Path] = []
+    seen = set()
+    for path in paths:
+        candidates = sorted(path.rglob("*")) if path.is_dir() else [path]
+        for candidate in candidates:
+            if not candidate.is_file():
+                if candidate == path:
+                    logger.warning("Skipping %s: not a file", path)
+                continue
+            if candidate != path and candidate.suffix.lower() not in AUDIO_SUFFIXES:
+                continue
+            resolved = candidate.resolve()
+            if resolved not in seen:
+                seen.add(resolved)
+                found.append(resolved)
+    return found
+
+
+def split_audio(path: Path, chunk_seconds: float = CHUNK_SECONDS) -> Iterator[TranscriptionRequest]:
+    """Decodes ``path`` and yields 16 kHz mono FLAC chunks of at most ``chunk_seconds``.
+
+    Each cut is placed at the quietest frame shortly before the limit, so words are
+    rarely split between chunks.
+    """
+    import soundfile as sf
+
+    from .resample import StreamingResampler
+
+    limit = int(chunk_seconds * CHUNK_SAMPLE_RATE)
+    search = min(int(CUT_SEARCH_SECONDS * CHUNK_SAMPLE_RATE), limit // 2)
+    frame = int(CUT_FRAME_SECONDS * CHUNK_SAMPLE_RATE)
+    try:
+        source = sf.SoundFile(str(path))
+    except RuntimeError as exc:
+        raise TranscriptionError(f"{path.name} is too large to upload and cannot be decoded for splitting: {exc}") from exc
+    with source:
+        resampler = StreamingResampler(source.samplerate, CHUNK_SAMPLE_RATE, source.channels, 1)
+        pending = np.zeros(0, dtype=np.int16)
+        index = 0
+        for block in source.blocks(blocksize=source.samplerate * 10, dtype="int16", always_2d=True):
+            pending = np.concatenate((pending, resampler.process(block)[:, 0]))
+            while len(pending) > limit:
+                cut = _quiet_cut(pending, limit, search, frame)
+                yield _encode_chunk(pending[:cut], path, index)
+                pending = pending[cut:]
+                index += 1
+        if len(pending) or index == 0:
+            yield _encode_chunk(pending, path, index)
+
+
+def _quiet_cut(samples: np.ndarray, limit: int, search: int, frame: int) -> int:
+    window = samples[limit - search : limit].astype(np.float32)
+    frames = len(window) // frame
+    if frames < 2:
+        return limit
+    energy = np.square(window[: frames * frame].reshape(frames, frame)).mean(axis=1)
+    return limit - search + int(np.argmin(energy)) * frame + frame // 2
+
+
+def _encode_chunk(samples: np.ndarray, path: Path, index: int) -> TranscriptionRequest:
+    import soundfile as sf
+
+    buffer = io.BytesIO()
+    sf.write(buffer, samples, CHUNK_SAMPLE_RATE, subtype="PCM_16", format="FLAC")
+    return TranscriptionRequest(audio_data=buffer.getbuffer(), filename=f"{path.stem}.part{index:03d}.flac")
+
+
+def file_requests(
+    path: Path, max_upload_bytes: int = MAX_UPLOAD_BYTES, chunk_seconds: float = CHUNK_SECONDS
+) -> Iterator[TranscriptionRequest]:
+    """Requests for one file: the file itself, or its chunks when it is over ``max_upload_bytes``."""
+    if path.stat().st_size <= max_upload_bytes:
+        yield TranscriptionRequest(audio_path=path, filename=path.name)
+        return
+    logger.info("Splitting %s into %.0f-second chunks", path, chunk_seconds)
+    yield from split_audio(path, chunk_seconds)
+
+
+class _FileJob:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.started = time.monotonic()
+        self.texts: Dict[int, str] = {}
+        self.bytes = 0
+        self.chunks = 0
+        self.remaining = 0
+        self.error: Optional[str] = None
+        self.submitted_all = False
+
+
+class BatchTranscriber:
+    """Transcribes many files through one :class:`TranscriptionClient`.
+
+    Files (and the chunks of files over ``max_upload_bytes``) are uploaded by
+    ``concurrency`` workers, with request starts throttled by a :class:`RateLimiter`.
+    Each file's result is appended to the JSONL output as soon as its last chunk
+    finishes, and recorded in the manifest so a rerun skips it. ``postprocess``
+    is applied to each file's joined transcript.
+    """
+
+    def __init__(
+        self,
+        client: TranscriptionClient,
+        options: BatchOptions,
+        sink: IO[str],
+        postprocess: Optional[Callable[[str], str]] = None,
+    ) -> None:
+        self._client = client
+        self._options = options
+        self._sink = sink
+        self._postprocess = postprocess
+        self._manifest = Manifest(options.manifest)
+        self._limiter = RateLimiter(options.rate_per_minute)
+        self._lock = threading.Lock()
+        # Bounds the chunks decoded ahead of the workers.
+        self._slots = threading.Semaphore(max(options.concurrency, 1) * 2)
+        self._summary = BatchSummary()
+        self._total = 0
+
+    def run(self, paths: Sequence[Path]) -> BatchSummary:
+        self._total = len(paths)
+        workers = max(self._options.concurrency, 1)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="getdict-batch") as executor:
+            for path in paths:
+                if self._manifest.is_done(path):
+                    logger.info("Skipping %s: already transcribed", path)
+                    self._summary.skipped += 1
+                    continue
+                self._submit_file(executor, path)
+        return self._summary
+
+    def _submit_file(self, executor: ThreadPoolExecutor, path: Path) -> None:
+        job = _FileJob(path)
+        try:
+            for index, request in enumerate(self._requests(path)):
+                self._slots.acquire()
+                with self._lock:
+                    job.remaining += 1
+                    job.chunks += 1
+                future = executor.submit(self._transcribe, request)
+                future.add_done_callback(lambda done, index=index, size=request.size: self._chunk_done(job, index, size, done))
+        except Exception as exc:
+            with self._lock:
+                job.error = job.error or f"{type(exc).__name__}: {exc}"
+        with self._lock:
+            job.submitted_all = True
+            finished = job.remaining == 0
+        if finished:
+            self._finish(job)
+
+    def _requests(self, path: Path) -> Iterator[TranscriptionRequest]:
+        return file_requests(path, self._options.max_upload_bytes, self._options.chunk_seconds)
+
+    def _transcribe(self, request: TranscriptionRequest) -> TranscriptionResult:
+        self._limiter.acquire()
+        return self._client.transcribe(request)
+
+    def _chunk_done(self, job: _FileJob, index: int, size: int, future: Future) -> None:
+        self._slots.release()
+        error = future.exception()
+        with self._lock:
+            if error is not None:
+                job.error = job.error or f"{type(error).__name__}: {error}"
+            else:
+                job.texts[index] = future.result().text
+                job.bytes += size
+            job.remaining -= 1
+            finished = job.submitted_all and job.remaining == 0
+        if finished:
+            self._finish(job)
+
+    def _finish(self, job: _FileJob) -> None:
+        result = BatchResult(
+            path=str(job.path),
+            chunks=job.chunks,
+            bytes=job.bytes,
+            seconds=round(time.monotonic() - job.started, 3),
+            error=job.error,
+        )
+        if job.error is None:
+            result.text = join_segments([job.texts[index] for index in sorted(job.texts)])
+            if self._postprocess is not None:
+                result.text = self._postprocess(result.text)
+        with self._lock:
+            self._sink.write(json.dumps(asdict(result), ensure_ascii=False) + "\n")
+            self._sink.flush()
+            if job.error is None:
+                self._manifest.mark_done(job.path)
+                self._summary.done += 1
+            else:
+                self._summary.failed += 1
+            self._summary.results.append(result)
+            finished = self._summary.done + self._summary.failed + self._summary.skipped
+        if job.error is None:
+            logger.info("[%d/%d] %s (%d chunk(s), %.1fs)", finished, self._total, job.path, job.chunks, result.seconds)
+        else:
+            logger.error("[%d/%d] %s failed: %s", finished, self._total, job.path, job.error)
+
+
+def build_parser(parser: Optional[argparse.ArgumentParser] = None) -> argparse.ArgumentParser:
+    parser = parser or argparse.ArgumentParser(prog="getdict transcribe")
+    parser.description = "Transcribe audio files and folders without the tray app."
+    parser.add_argument("paths", nargs="+", type=Path, help="audio files or folders (searched recursively)")
+    parser.add_argument("-o", "--output", type=Path, help="JSONL file to append results to (default: stdout)")
+    parser.add_argument(
+        "--manifest",
+        type=Path,
+        help=f"resume manifest (default: the output path + {MANIFEST_SUFFIX}; none when writing to stdout)",
+    )
+    parser.add_argument("-j", "--concurrency", type=int, default=4, help="parallel uploads (default: 4)")
+    parser.add_argument("--rate-limit", type=float, default=0.0, metavar="PER_MINUTE", help="maximum requests started per minute")
+    parser.add_argument("--chunk-seconds", type=float, default=CHUNK_SECONDS, help="length of the chunks large files are split into")
+    parser.add_argument("--provider", help="override transcription.provider, e.g. 'local'")
+    parser.add_argument("--model", help="override transcription.model")
+    parser.add_argument("--language", help="override transcription.language")
+    return parser
+
+
+def main(args: argparse.Namespace) -> int:
+    from .transcription import TranscriptionClient
+    from .vocabulary import Vocabulary, vocabulary_path
+
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(name)s: %(message)s")
+    settings = Settings.load()
+    for name in ("provider", "model", "language"):
+        if getattr(args, name):
+            setattr(settings.transcription, name, getattr(args, name))
+    manifest = args.manifest
+    if manifest is None and args.output is not None:
+        manifest = args.output.with_name(args.output.name + MANIFEST_SUFFIX)
+    options = BatchOptions(
+        output=args.output,
+        manifest=manifest,
+        concurrency=args.concurrency,
+        rate_per_minute=args.rate_limit,
+        chunk_seconds=args.chunk_seconds,
+    )
+    paths = find_audio_files(args.paths)
+    if not paths:
+        logger.error("No audio files found")
+        return 2
+    client = TranscriptionClient(settings)
+    if not client.is_configured:
+        logger.error("Transcription is not configured; set an API key in settings.json or use --provider local")
+        return 2
+    vocabulary = Vocabulary(vocabulary_path(settings))
+    try:
+        if args.output is None:
+            summary = BatchTranscriber(client, options, sys.stdout, vocabulary.apply).run(paths)
+        else:
+            with args.output.open("a", encoding="utf-8") as sink:
+                summary = BatchTranscriber(client, options, sink, vocabulary.apply).run(paths)
+    finally:
+        client.close()
+    logger.info("Transcribed %d, skipped %d, failed %d", summary.done, summary.skipped, summary.failed)
+    return 1 if summary.failed else 0
@@ -0,0 +1,477 @@
+"""Local IPC for the dictation engine.
+
+A :class:`DaemonServer` serves one :class:`~getdict.engine.DictationEngine` on a
+Unix-domain socket, so the tray, scripts and editor plugins share a single warm
+engine. The protocol is JSON lines in both directions:
+
+* request: ``{"id": 1, "command": "start", "params": {"insert": false}}``
+* response: ``{"id": 1, "ok": true, "result": {...}}`` or
+  ``{"id": 1, "ok": false, "error": "...", "title": "..."}``
+* event, after ``subscribe``: ``{"event": "transcript", "sequence": 3, "text": "..."}``
+
+Requests on one connection are handled in order; open more connections for
+concurrent work such as file transcription.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import queue
+import signal
+import socket
+import sys
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .history import SEARCH_LIMIT
+from .models import EngineError
+from .settings import Settings
+
+logger = logging.getLogger(__name__)
+
+SOCKET_NAME = "getdict.sock"
+PROTOCOL_VERSION = 1
+CALL_TIMEOUT = 30.0
+# Events queued per connection before a slow reader starts losing them.
+EVENT_QUEUE_SIZE = 256
+
+Handler = Callable[[Any, Dict[str, Any]], Any]
+
+COMMANDS: Dict[str, Handler] = {
+    "start": lambda engine, params: engine.start_recording(insert=params.get("insert", True)),
+    "stop": lambda engine, params: engine.stop_recording(),
+    "toggle": lambda engine, params: engine.toggle_recording(insert=params.get("insert", True)),
+    "cancel": lambda engine, params: engine.cancel_recording(),
+    "transcribe": lambda engine, params: engine.transcribe_file(params["path"]),
+    "status": lambda engine, params: engine.status(),
+    "stats": lambda engine, params: engine.stats(),
+    "dismiss": lambda engine, params: engine.dismiss_pickup(params["result_id"]),
+    "history": lambda engine, params: engine.history(params.get("query", ""), params.get("limit", SEARCH_LIMIT)),
+    "reinsert": lambda engine, params: engine.reinsert(params["entry_id"]),
+    "reconfigure": lambda engine, params: engine.reconfigure(),
+}
+
+
+def default_socket_path(settings: Settings) -> Path:
+    if settings.daemon.socket_path:
+        return Path(settings.daemon.socket_path).expanduser()
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    return Path(runtime_dir) / SOCKET_NAME if runtime_dir else Settings.config_dir() / SOCKET_NAME
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    return (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+class _Connection:
+    """One client: requests are read and answered on a reader thread, output is written by a writer thread.
+
+    Replies are always queued, so a client that stops reading never blocks the
+    reader; only events are limited, to ``EVENT_QUEUE_SIZE`` waiting to be sent.
+    """
+
+    def __init__(self, server: DaemonServer, sock: socket.socket) -> None:
+        self._server = server
+        self._sock = sock
+        # (data, is_event) pairs; None stops the writer.
+        self._outgoing: queue.Queue[Optional[Tuple[bytes, bool]]] = queue.Queue()
+        self._event_slots = threading.Semaphore(EVENT_QUEUE_SIZE)
+        self._unsubscribe: Optional[Callable[[], None]] = None
+        self._events: Optional[frozenset] = None
+        self._dropped = 0
+
+    def start(self) -> None:
+        threading.Thread(target=self._read_loop, name="getdict-ipc-read", daemon=True).start()
+        threading.Thread(target=self._write_loop, name="getdict-ipc-write", daemon=True).start()
+
+    def close(self) -> None:
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._outgoing.put(None)
+
+    def _read_loop(self) -> None:
+        try:
+            with self._sock.makefile("rb") as stream:
+                for line in stream:
+                    if line.strip():
+                        self._handle(line)
+        except OSError:
+            pass
+        finally:
+            self.close()
+            self._server._forget(self)
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._outgoing.get()
+            if item is None:
+                break
+            data, is_event = item
+            if is_event:
+                self._event_slots.release()
+            try:
+                self._sock.sendall(data)
+            except OSError:
+                break
+        self._sock.close()
+
+    def _reply(self, message: Dict[str, Any]) -> None:
+        self._outgoing.put((_encode(message), False))
+
+    def _send_event(self, event: Dict[str, Any]) -> None:
+        if self._events is not None and event["event"] not in self._events:
+            return
+        if self._event_slots.acquire(blocking=False):
+            self._outgoing.put((_encode(event), True))
+        else:
+            self._dropped += 1
+            if self._dropped == 1 or self._dropped % 100 == 0:
+                logger.warning("Client is not reading events; %d dropped", self._dropped)
+
+    def _handle(self, line: bytes) -> None:
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            command = request["command"]
+            params = request.get("params") or {}
+            result = self._dispatch(command, params)
+        except EngineError as exc:
+            self._reply({"id": request_id, "ok": False, "error": str(exc), "title": exc.title})
+            return
+        except Exception as exc:
+            logger.debug("IPC request failed", exc_info=True)
+            self._reply({"id": request_id, "ok": False, "error": f"{type(exc).__name__}: {exc}", "title": "Request failed"})
+            return
+        self._reply({"id": request_id, "ok": True, "result": result})
+        if command == "subscribe" and self._unsubscribe is None:
+            # After the reply, so the client sees it before the first (state) event.
+            self._unsubscribe = self._server.engine.subscribe(self._send_event)
+
+    def _dispatch(self, command: str, params: Dict[str, Any]) -> Any:
+        if command == "ping":
+            return {"version": PROTOCOL_VERSION, "pid": os.getpid()}
+        if command == "subscribe":
+            events = params.get("events")
+            self._events = frozenset(events) if events else None
+            return {"subscribed": sorted(self._events) if self._events else "all"}
+        if command == "unsubscribe":
+            if self._unsubscribe is not None:
+                self._unsubscribe()
+                self._unsubscribe = None
+            return {"subscribed": False}
+        if command == "shutdown":
+            if self._server.on_shutdown is None:
+                raise EngineError("This engine is hosted by the tray; quit it from there.", "Not supported")
+            self._server.on_shutdown()
+            return {"stopping": True}
+        handler = COMMANDS.get(command)
+        if handler is None:
+            raise EngineError(f"Unknown command {command!r}", "Unknown command")
+        return handler(self._server.engine, params)
+
+
+class DaemonServer:
+    """Serves a :class:`~getdict.engine.DictationEngine` on a Unix-domain socket readable only by this user."""
+
+    def __init__(self, engine: Any, path: Path, on_shutdown: Optional[Callable[[], None]] = None) -> None:
+        self.engine = engine
+        self.path = path
+        self.on_shutdown = on_shutdown
+        self._sock: Optional[socket.socket] = None
+        self._connections: List[_Connection] = []
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        if not hasattr(socket, "AF_UNIX"):
+            raise EngineError("Unix-domain sockets are not available on this platform.", "Daemon unavailable")
+        if self.path.exists():
+            probe = DaemonClient.connect(self.path)
+            if probe is not None:
+                probe.close()
+                raise EngineError(f"Another GetDict engine is already serving {self.path}.", "Daemon running")
+            self.path.unlink()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.bind(str(self.path))
+            # Nobody can connect before listen(), so restricting the socket here leaves no window.
+            # The umask is process-wide and other threads may be creating files, so it is left alone.
+            os.chmod(self.path, 0o600)
+            sock.listen()
+        except OSError:
+            sock.close()
+            raise
+        self._sock = sock
+        threading.Thread(target=self._accept_loop, name="getdict-ipc", daemon=True).start()
+        logger.info("Serving the dictation engine on %s", self.path)
+
+    def close(self) -> None:
+        sock, self._sock = self._sock, None
+        if sock is None:
+            return
+        sock.close()
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+
+    def _accept_loop(self) -> None:
+        while self._sock is not None:
+            try:
+                client, _ = self._sock.accept()
+            except OSError:
+                return
+            connection = _Connection(self, client)
+            with self._lock:
+                self._connections.append(connection)
+            connection.start()
+
+    def _forget(self, connection: _Connection) -> None:
+        with self._lock:
+            if connection in self._connections:
+                self._connections.remove(connection)
+
+
+class DaemonClient:
+    """Client for :class:`DaemonServer` with the same command methods as the engine.
+
+    Calls block until the daemon answers and raise :class:`EngineError` on failure.
+    Events are delivered to subscribed listeners on the client's reader thread;
+    when the connection drops they receive ``{"event": "disconnected"}``.
+    """
+
+    def __init__(self, path: Path, timeout: float = CALL_TIMEOUT) -> None:
+        self.path = path
+        self._timeout = timeout
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(str(path))
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, Future] = {}
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._closed = False
+        threading.Thread(target=self._read_loop, name="getdict-ipc-client", daemon=True).start()
+
+    @classmethod
+    def connect(cls, path: Path, timeout: float = CALL_TIMEOUT) -> Optional["DaemonClient"]:
+        """Connects to a running daemon, or returns ``None`` if nothing is listening at ``path``."""
+        if not hasattr(socket, "AF_UNIX") or not path.exists():
+            return None
+        try:
+            return cls(path, timeout)
+        except OSError:
+            return None
+
+    def call(self, command: str, **params: Any) -> Any:
+        request_id = next(self._ids)
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise EngineError("The GetDict daemon is not connected.", "Daemon disconnected")
+            self._pending[request_id] = future
+        try:
+            with self._send_lock:
+                self._sock.sendall(_encode({"id": request_id, "command": command, "params": params}))
+            return future.result(self._timeout)
+        except FutureTimeoutError:
+            # The request id is forgotten below, so a late reply is dropped.
+            future.cancel()
+            raise EngineError(
+                f"The GetDict daemon did not respond to {command!r} within {self._timeout:g} seconds.", "Daemon not responding"
+            ) from None
+        except OSError as exc:
+            raise EngineError(f"Lost connection to the GetDict daemon: {exc}", "Daemon disconnected") from exc
+        finally:
+            with self._lock:
+                self._pending.pop(request_id, None)
+
+    def subscribe(self, listener: Callable[[Dict[str, Any]], None], events: Optional[Iterable[str]] = None) -> Callable[[], None]:
+        with self._lock:
+            self._listeners.append(listener)
+        self.call("subscribe", events=sorted(events) if events else None)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if listener in self._listeners:
+                    self._listeners.remove(listener)
+
+        return unsubscribe
+
+    def start_recording(self, insert: bool = True) -> Dict[str, Any]:
+        return self.call("start", insert=insert)
+
+    def stop_recording(self) -> Dict[str, Any]:
+        return self.call("stop")
+
+    def toggle_recording(self, insert: bool = True) -> Dict[str, Any]:
+        return self.call("toggle", insert=insert)
+
+    def cancel_recording(self) -> Dict[str, Any]:
+        return self.call("cancel")
+
+    def transcribe_file(self, path: str) -> Dict[str, Any]:
+        return self.call("transcribe", path=str(path))
+
+    def status(self) -> Dict[str, Any]:
+        return self.call("status")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return self.call("stats")
+
+    def dismiss_pickup(self, result_id: str) -> Dict[str, Any]:
+        return self.call("dismiss", result_id=result_id)
+
+    def history(self, query: str = "", limit: int = SEARCH_LIMIT) -> Dict[str, Any]:
+        return self.call("history", query=query, limit=limit)
+
+    def reinsert(self, entry_id: int) -> Dict[str, Any]:
+        return self.call("reinsert", entry_id=entry_id)
+
+    def reconfigure(self) -> None:
+        self.call("reconfigure")
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+
+    def _read_loop(self) -> None:
+        try:
+            with self._sock.makefile("rb") as stream:
+                for line in stream:
+                    self._dispatch(json.loads(line))
+        except (OSError, ValueError):
+            pass
+        with self._lock:
+            self._closed = True
+            pending, self._pending = self._pending, {}
+            listeners = list(self._listeners)
+        for future in pending.values():
+            future.set_exception(EngineError("The GetDict daemon closed the connection.", "Daemon disconnected"))
+        for listener in listeners:
+            listener({"event": "disconnected"})
+
+    def _dispatch(self, message: Dict[str, Any]) -> None:
+        if "event" in message:
+            with self._lock:
+                listeners = list(self._listeners)
+            for listener in listeners:
+                try:
+                    listener(message)
+                except Exception as exc:  # pragma: no cover - keeps the connection alive
+                    logger.exception("Event listener failed: %s", exc)
+            return
+        with self._lock:
+            future = self._pending.pop(message.get("id"), None)
+        if future is None:
+            return
+        if message.get("ok"):
+            future.set_result(message.get("result"))
+        else:
+            future.set_exception(EngineError(message.get("error", "Request failed"), message.get("title", "GetDict")))
+
+
+def build_parser(parser: Optional[argparse.ArgumentParser] = None) -> argparse.ArgumentParser:
+    parser = parser or argparse.ArgumentParser(prog="getdict daemon")
+    parser.description = "Run the dictation engine headless and serve it on a Unix socket."
+    parser.add_argument("--socket", type=Path, help="socket path (default: $XDG_RUNTIME_DIR/getdict.sock)")
+    return parser
+
+
+def main(args: argparse.Namespace) -> int:
+    from .engine import DictationEngine
+
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(name)s: %(message)s")
+    settings = Settings.load()
+    stopping = threading.Event()
+    engine = DictationEngine(settings)
+    server = DaemonServer(engine, args.socket or default_socket_path(settings), on_shutdown=stopping.set)
+    try:
+        server.start()
+    except (EngineError, OSError) as exc:
+        logger.error("%s", exc)
+        return 1
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stopping.set())
+    try:
+        engine.start()
+        # The model or connection is ready before the first request, while commands are already served.
+        threading.Thread(target=engine.warm_up, name="getdict-warm-up", daemon=True).start()
+        while not stopping.wait(1.0):
+            pass
+    finally:
+        server.close()
+        engine.close()
+    return 0
+
+
+def ctl_main(argv: List[str]) -> int:
+    """``python -m getdict ctl COMMAND [ARG]``: sends one command to a running daemon and prints the JSON result."""
+    parser = argparse.ArgumentParser(prog="getdict ctl", description="Send a command to a running GetDict engine.")
+    parser.add_argument("command", choices=sorted([*COMMANDS, "ping", "shutdown", "events"]))
+    parser.add_argument(
+        "argument",
+        nargs="?",
+        help="audio path for 'transcribe', result id for 'dismiss', search text for 'history', entry id for 'reinsert'",
+    )
+    parser.add_argument("--no-insert", action="store_true", help="for 'start'/'toggle': return the text instead of pasting it")
+    parser.add_argument("--socket", type=Path)
+    args = parser.parse_args(argv)
+    client = DaemonClient.connect(args.socket or default_socket_path(Settings.load()), timeout=None)  # type: ignore[arg-type]
+    if client is None:
+        print("No GetDict engine is running", file=sys.stderr)
+        return 2
+    try:
+        if args.command == "events":
+            done = threading.Event()
+
+            def show(event: Dict[str, Any]) -> None:
+                print(json.dumps(event, ensure_ascii=False), flush=True)
+                if event["event"] == "disconnected":
+                    done.set()
+
+            client.subscribe(show)
+            done.wait()
+            return 0
+        params: Dict[str, Any] = {}
+        if args.command in ("start", "toggle"):
+            params["insert"] = not args.no_insert
+        elif args.command == "transcribe":
+            params["path"] = str(Path(args.argument or "").resolve())
+        elif args.command == "dismiss":
+            params["result_id"] = args.argument
+        elif args.command == "history":
+            params["query"] = args.argument or ""
+        elif args.command == "reinsert":
+            params["entry_id"] = int(args.argument or 0)
+        print(json.dumps(client.call(args.command, **params), ensure_ascii=False, indent=2))
+        return 0
+    except EngineError as exc:
+        print(f"{exc.title}: {exc}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        client.close()
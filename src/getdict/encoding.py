@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .models import AudioCodec
+from .settings import AudioSettings
+
+logger = logging.getLogger(__name__)
+
+CODEC_AUTO = "auto"
+FLAC_MAX_LEVEL = 8
+# libsndfile sets the Opus bitrate only through the compression level, mapping
+# 0.0 to 256 kbps and 1.0 to 6 kbps linearly.
+OPUS_MIN_BITRATE_KBPS = 6
+OPUS_MAX_BITRATE_KBPS = 256
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+# Uploads smaller than this mostly measure request latency, not the link.
+UPLINK_MIN_SAMPLE_BYTES = 32 * 1024
+UPLINK_EWMA_ALPHA = 0.3
+UPLINK_MAX_AGE = 600.0
+
+
+class UplinkEstimator:
+    """Smoothed effective upload throughput, measured from completed transcriptions.
+
+    Each sample is the request size over the full request time, so server-side
+    processing is included and the estimate is a lower bound on the raw link
+    speed. Samples older than ``max_age`` are forgotten, so a link that recovers
+    while small Opus uploads are being sent is eventually measured again with FLAC.
+    """
+
+    def __init__(self, max_age: float = UPLINK_MAX_AGE) -> None:
+        self._max_age = max_age
+        self._lock = threading.Lock()
+        self._kbps: Optional[float] = None
+        self._updated = 0.0
+
+    def observe(self, size_bytes: int, seconds: float) -> None:
+        if size_bytes < UPLINK_MIN_SAMPLE_BYTES or seconds <= 0:
+            return
+        kbps = size_bytes * 8 / 1000 / seconds
+        with self._lock:
+            if self._kbps is None or self._expired():
+                self._kbps = kbps
+            else:
+                self._kbps += UPLINK_EWMA_ALPHA * (kbps - self._kbps)
+            self._updated = time.monotonic()
+
+    @property
+    def kbps(self) -> Optional[float]:
+        with self._lock:
+            return None if self._kbps is None or self._expired() else self._kbps
+
+    def _expired(self) -> bool:
+        return time.monotonic() - self._updated > self._max_age
+
+
+def resolve_codec(settings: AudioSettings, uplink: Optional[UplinkEstimator] = None) -> AudioCodec:
+    """Picks the codec for the next recording, resolving ``"auto"`` from the measured uplink."""
+    name = settings.codec.lower()
+    if name == CODEC_AUTO:
+        kbps = uplink.kbps if uplink is not None else None
+        codec = AudioCodec.OPUS if kbps is not None and kbps < settings.auto_opus_below_kbps else AudioCodec.FLAC
+        logger.debug("Auto codec picked %s (uplink %s kbps)", codec.value, "unknown" if kbps is None else f"{kbps:.0f}")
+    else:
+        try:
+            codec = AudioCodec(name)
+        except ValueError:
+            logger.warning("Unknown audio codec %r; using FLAC", settings.codec)
+            return AudioCodec.FLAC
+    if codec is AudioCodec.OPUS and settings.sample_rate not in OPUS_SAMPLE_RATES:
+        logger.warning("Opus does not support %d Hz; using FLAC", settings.sample_rate)
+        return AudioCodec.FLAC
+    return codec
+
+
+def soundfile_options(codec: AudioCodec, settings: AudioSettings) -> Dict[str, Any]:
+    """Keyword arguments for ``soundfile.SoundFile`` to write ``codec``."""
+    if codec is AudioCodec.FLAC:
+        level = min(max(settings.flac_level, 0), FLAC_MAX_LEVEL)
+        return {"format": "FLAC", "subtype": "PCM_16", "compression_level": level / FLAC_MAX_LEVEL}
+    if codec is AudioCodec.OPUS:
+        bitrate = min(max(settings.opus_bitrate_kbps, OPUS_MIN_BITRATE_KBPS), OPUS_MAX_BITRATE_KBPS)
+        level = (OPUS_MAX_BITRATE_KBPS - bitrate) / (OPUS_MAX_BITRATE_KBPS - OPUS_MIN_BITRATE_KBPS)
+        return {"format": "OGG", "subtype": "OPUS", "compression_level": level}
+    return {"format": "WAV", "subtype": "PCM_16"}
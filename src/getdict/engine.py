@@ -0,0 +1,462 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import asdict, fields
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from .encoding import UplinkEstimator
+from .history import SEARCH_LIMIT, HistoryEntry
+from .models import AppState, EngineError, JobStatus, LevelFrame, RecordingError, RecordingResult, TranscriptionError
+from .segments import discard_recording, join_segments
+from .settings import Settings
+from .spool import SpooledResult, SpoolEntry
+from .vocabulary import Vocabulary, vocabulary_path
+
+if TYPE_CHECKING:
+    from .audio import AudioRecorder
+    from .history import HistoryStore
+    from .insertion import TextInserter
+    from .jobs import DictationJob, JobQueue
+    from .metrics import MetricsRegistry
+    from .spool import Spool, SpoolDrainer
+    from .transcription import TranscriptionClient
+
+logger = logging.getLogger(__name__)
+
+Event = Dict[str, Any]
+EventListener = Callable[[Event], None]
+
+PREVIEW_CHARS = 120
+# Settings sections the engine applies on reconfigure; hotkeys and UI belong to the front-end.
+SECTIONS = ("audio", "transcription", "pipeline", "insertion", "history")
+
+
+class DictationEngine:
+    """Capture, transcription and insertion without any UI.
+
+    The engine owns the audio device, the transcription client (and so its HTTP
+    pool or local model), the job queue, the spool and the metrics. Front-ends
+    drive it through the command methods and follow it through events: plain
+    dicts with an ``"event"`` key (``state``, ``levels``, ``jobs``, ``transcript``,
+    ``notice``, ``pickups``) passed to every subscribed listener. Listeners run on
+    engine threads, including the audio writer thread for ``levels``, and must not
+    block.
+
+    The tray uses an engine in-process; :mod:`getdict.daemon` serves the same
+    commands and events over a Unix socket.
+    """
+
+    def __init__(self, settings: Settings, recorder: Optional[AudioRecorder] = None) -> None:
+        self.settings = settings
+        self.state = AppState.IDLE
+        self.tooltip = "Starting..."
+        self._recorder_override = recorder
+        self._listeners: List[EventListener] = []
+        self._listeners_lock = threading.Lock()
+        self._state_lock = threading.RLock()
+        self._client_lock = threading.Lock()
+        self._keys_released = threading.Event()
+        self._keys_released.set()
+        self._uplink = UplinkEstimator()
+        self._transcription_client: Optional[TranscriptionClient] = None
+        self._job: Optional[DictationJob] = None
+        self._vocabulary = Vocabulary(self._vocabulary_path())
+        self._started = False
+
+    def start(self) -> None:
+        """Builds the services and opens a warm stream if configured; safe to call off the GUI thread."""
+        from .audio import AudioRecorder
+        from .history import HISTORY_DB_NAME, HistoryStore
+        from .insertion import TextInserter
+        from .jobs import JobQueue
+        from .metrics import METRICS_DIR_NAME, MetricsRegistry
+        from .spool import SPOOL_DIR_NAME, Spool, SpoolDrainer
+
+        self._recorder = self._recorder_override or AudioRecorder(
+            self.settings.audio,
+            waveform_callback=self._handle_levels,
+            segment_callback=self._handle_segment,
+            uplink=self._uplink,
+        )
+        self._inserter: TextInserter = TextInserter(self.settings.insertion)
+        self._metrics: MetricsRegistry = MetricsRegistry(Settings.config_dir() / METRICS_DIR_NAME)
+        self._jobs: JobQueue = JobQueue(
+            client=self._client,
+            deliver=self._deliver_job,
+            on_change=self._handle_jobs_changed,
+            workers=self.settings.pipeline.workers,
+            max_pending=self.settings.pipeline.max_pending_jobs,
+        )
+        self._spool: Spool = Spool(Settings.config_dir() / SPOOL_DIR_NAME)
+        self._history: HistoryStore = HistoryStore(Settings.config_dir() / HISTORY_DB_NAME, self.settings.history)
+        self._drainer: SpoolDrainer = SpoolDrainer(
+            self._spool,
+            client=self._client,
+            on_result=self._handle_spooled_result,
+            concurrency=self.settings.pipeline.spool_concurrency,
+            on_failed=self._handle_spool_failure,
+            postprocess=lambda text: self._vocabulary.apply(text),
+        )
+        self._drainer.start()
+        self._recorder.prepare()
+        self._vocabulary.refresh()
+        self._started = True
+        self._settle_state()
+
+    def warm_up(self) -> None:
+        """Builds the transcription client, loading a local model, and opens a connection; blocks for the imports."""
+        try:
+            self._client().warm_up()
+        except TranscriptionError as exc:
+            logger.warning("Unable to prepare transcription: %s", exc)
+
+    def watch_keys(self, keys_released: Callable[[float], bool]) -> None:
+        """Makes insertion wait until ``keys_released(timeout)`` reports the front-end's modifier keys are up."""
+        self._inserter.keys_released = keys_released
+
+    def close(self) -> None:
+        if self._started:
+            self._started = False
+            self._jobs.shutdown()
+            self._drainer.stop()
+            self._recorder.close()
+            self._inserter.close()
+            self._history.close()
+        if self._transcription_client is not None:
+            self._transcription_client.close()
+
+    def reconfigure(self) -> None:
+        """Reloads ``settings.json`` and applies it to the running services."""
+        settings = Settings.load()
+        with self._state_lock:
+            self.settings.api_key = settings.api_key
+            # Updated in place: the recorder, inserter and client hold references to these sections.
+            for name in SECTIONS:
+                section = getattr(self.settings, name)
+                for item in fields(section):
+                    setattr(section, item.name, getattr(getattr(settings, name), item.name))
+            if self.state != AppState.RECORDING:
+                self._recorder.prepare()
+            if self._transcription_client is not None:
+                self._transcription_client.reconfigure()
+            self._jobs.resize(self.settings.pipeline.workers, self.settings.pipeline.max_pending_jobs)
+            if self._vocabulary_path() != self._vocabulary.path:
+                self._vocabulary = Vocabulary(self._vocabulary_path())
+        self._settle_state()
+
+    def subscribe(self, listener: EventListener) -> Callable[[], None]:
+        """Registers ``listener`` and sends it the current state; returns a function that unsubscribes it."""
+        with self._listeners_lock:
+            self._listeners.append(listener)
+        listener({"event": "state", "state": self.state.value, "tooltip": self.tooltip})
+
+        def unsubscribe() -> None:
+            with self._listeners_lock:
+                if listener in self._listeners:
+                    self._listeners.remove(listener)
+
+        return unsubscribe
+
+    def _emit(self, event: str, **payload: Any) -> None:
+        message = {"event": event, **payload}
+        with self._listeners_lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(message)
+            except Exception as exc:  # pragma: no cover - one bad front-end must not stop the others
+                logger.exception("Event listener failed: %s", exc)
+
+    def _notice(self, title: str, message: str) -> None:
+        self._emit("notice", title=title, message=message)
+
+    def start_recording(self, insert: bool = True) -> Dict[str, Any]:
+        hotkey_at = time.monotonic()
+        self._require_started()
+        # Built before taking the state lock: the first build imports the backend
+        # or starts a local model, and must not hold up stop or cancel.
+        client = self._client()
+        with self._state_lock:
+            if self.state == AppState.RECORDING:
+                raise EngineError("A recording is already in progress.", "Already recording")
+            if not client.is_configured:
+                raise EngineError("Set your OpenAI API key in Settings before recording.", "Configuration required")
+            job = self._jobs.open_job()
+            if job is None:
+                raise EngineError("Too many dictations are still being transcribed.", "Please wait")
+            job.insert = insert
+            job.timeline.mark("hotkey", hotkey_at)
+            # Connects (or wakes the local model) while the user speaks.
+            threading.Thread(target=client.warm_up, name="getdict-warm-up", daemon=True).start()
+            self._job = job
+            self._keys_released.clear()
+            try:
+                self._recorder.start()
+            except RecordingError as exc:
+                logger.exception("Failed to start recording: %s", exc)
+                self._job = None
+                self._keys_released.set()
+                self._jobs.cancel_job(job)
+                self._update_state(AppState.ERROR, "Recording error")
+                raise EngineError(str(exc), "Recording failed") from exc
+            job.timeline.mark("stream_opened")
+            self._update_state(AppState.RECORDING, "Listening...")
+            return {"sequence": job.sequence}
+
+    def stop_recording(self) -> Dict[str, Any]:
+        stop_at = time.monotonic()
+        self._require_started()
+        with self._state_lock:
+            if self.state != AppState.RECORDING:
+                raise EngineError("No recording is in progress.", "Not recording")
+            job = self._job
+            self._job = None
+            assert job is not None
+            try:
+                result = self._recorder.stop()
+            except RecordingError as exc:
+                logger.exception("Failed to stop recording: %s", exc)
+                self._jobs.cancel_job(job)
+                self._update_state(AppState.ERROR, "Recording error")
+                raise EngineError(str(exc), "Recording error") from exc
+            finally:
+                self._keys_released.set()
+            job.timeline.mark("stop", stop_at)
+            job.timeline.mark("encoded")
+            if self._recorder.first_frame_at is not None:
+                job.timeline.mark("first_frame", self._recorder.first_frame_at)
+            self.state = AppState.PROCESSING
+            self._jobs.close_job(job, result)
+            if job.status is JobStatus.EMPTY:
+                logger.info("No speech detected; skipping transcription")
+                self._notice("No speech detected", "Nothing was sent for transcription.")
+            return {"sequence": job.sequence, "status": job.status.value}
+
+    def toggle_recording(self, insert: bool = True) -> Dict[str, Any]:
+        with self._state_lock:
+            if self.state == AppState.RECORDING:
+                return self.stop_recording()
+            return self.start_recording(insert=insert)
+
+    def cancel_recording(self) -> Dict[str, Any]:
+        """Stops the current recording and drops it, including segments already sent."""
+        self._require_started()
+        with self._state_lock:
+            if self.state != AppState.RECORDING:
+                return {"cancelled": False}
+            job = self._job
+            self._job = None
+            assert job is not None
+            try:
+                discard_recording(self._recorder.stop())
+            except RecordingError as exc:
+                logger.warning("Error while cancelling recording: %s", exc)
+            finally:
+                self._keys_released.set()
+            logger.info("Recording cancelled")
+            self.state = AppState.IDLE
+            self._jobs.cancel_job(job)
+            return {"cancelled": True, "sequence": job.sequence}
+
+    def transcribe_file(self, path: str) -> Dict[str, Any]:
+        """Transcribes an audio file with the warm client, splitting it if it is over the upload limit."""
+        from .batch import file_requests
+
+        client = self._client()
+        if not client.is_configured:
+            raise EngineError("Transcription is not configured.", "Configuration required")
+        audio = Path(path).expanduser()
+        if not audio.is_file():
+            raise EngineError(f"No such file: {audio}", "Transcription failed")
+        results = [client.transcribe(request) for request in file_requests(audio)]
+        raw_text = join_segments([result.text for result in results])
+        text = self._vocabulary.apply(raw_text)
+        if self._started:
+            self._history.record(
+                HistoryEntry(
+                    text=text,
+                    raw_text=raw_text,
+                    source="file",
+                    audio_seconds=sum(result.duration_seconds for result in results),
+                    segments=len(results),
+                )
+            )
+        return {"path": str(audio), "text": text, "chunks": len(results)}
+
+    def status(self) -> Dict[str, Any]:
+        self._require_started()
+        return {
+            "state": self.state.value,
+            "tooltip": self.tooltip,
+            "jobs": [_job_dict(info) for info in self._jobs.jobs()],
+            "pickups": [asdict(result) for result in self._spool.results()],
+        }
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage latency percentiles and the transcription client's request counters."""
+        self._require_started()
+        return {"latency": self._metrics.summary(), "requests": self._client().stats()}
+
+    def dismiss_pickup(self, result_id: str) -> Dict[str, Any]:
+        self._require_started()
+        self._spool.dismiss(result_id)
+        self._emit_pickups()
+        return {"dismissed": result_id}
+
+    def history(self, query: str = "", limit: int = SEARCH_LIMIT) -> Dict[str, Any]:
+        """Past transcripts matching ``query``, or the newest ones if it is empty."""
+        self._require_started()
+        return {"entries": [asdict(entry) for entry in self._history.search(query, limit)]}
+
+    def reinsert(self, entry_id: int) -> Dict[str, Any]:
+        """Pastes a transcript from the history into the focused window."""
+        self._require_started()
+        entry = self._history.get(entry_id)
+        if entry is None:
+            raise EngineError("That transcript is no longer in the history.", "Not found")
+        self._keys_released.wait()
+        insertion = self._inserter.insert(entry.text)
+        if not insertion.success:
+            raise EngineError(insertion.message or "Unable to insert text", "Insertion failed")
+        return {"entry_id": entry_id, "characters": len(entry.text)}
+
+    def _vocabulary_path(self) -> Path:
+        return vocabulary_path(self.settings)
+
+    def _require_started(self) -> None:
+        if not self._started:
+            raise EngineError("GetDict is still starting.", "Please wait")
+
+    def _client(self) -> TranscriptionClient:
+        with self._client_lock:
+            if self._transcription_client is None:
+                from .transcription import TranscriptionClient
+
+                self._transcription_client = TranscriptionClient(self.settings, uplink=self._uplink)
+            return self._transcription_client
+
+    def _handle_levels(self, frame: LevelFrame) -> None:
+        self._emit("levels", rms=frame.rms, bands=list(frame.bands))
+
+    def _handle_segment(self, segment: RecordingResult) -> None:
+        job = self._job
+        if job is not None:
+            job.add_segment(segment)
+        else:
+            discard_recording(segment)
+
+    def _update_state(self, state: AppState, tooltip: str) -> None:
+        with self._state_lock:
+            logger.debug("State transition: %s -> %s", self.state, state)
+            self.state = state
+            self.tooltip = tooltip
+        self._emit("state", state=state.value, tooltip=tooltip)
+
+    def _settle_state(self) -> None:
+        with self._state_lock:
+            if self.state == AppState.RECORDING:
+                return
+            jobs = self._jobs.jobs()
+            # A job still recording is not queued; start_recording reports it once the stream is open.
+            depth = sum(1 for job in jobs if not job.status.is_finished and job.status is not JobStatus.RECORDING)
+            if depth:
+                state, tooltip = AppState.PROCESSING, f"Transcribing ({depth} queued)..."
+            elif jobs and jobs[-1].status is JobStatus.FAILED:
+                state, tooltip = AppState.ERROR, "Last dictation failed"
+            else:
+                state, tooltip = AppState.IDLE, "Ready"
+            if (state, tooltip) != (self.state, self.tooltip):
+                self._update_state(state, tooltip)
+
+    def _handle_jobs_changed(self) -> None:
+        self._emit("jobs", jobs=[_job_dict(info) for info in self._jobs.jobs()])
+        self._settle_state()
+
+    def _deliver_job(self, job: DictationJob) -> None:
+        if job.status is not JobStatus.INSERTING:
+            if job.error is not None:
+                self._spool_failed_job(job)
+            return
+        assert job.transcription is not None
+        text = self._vocabulary.apply(job.transcription.text)
+        inserted = False
+        if job.insert:
+            # Never paste while the hotkey of a newer recording is still held down.
+            self._keys_released.wait()
+            insertion = self._inserter.insert(text)
+            logger.debug(
+                "Inserted %d characters by %s in %.0f ms",
+                len(text),
+                insertion.strategy.value if insertion.strategy else "none",
+                insertion.elapsed_seconds * 1000,
+            )
+            job.timeline.mark("pasted")
+            inserted = insertion.success
+        self._metrics.record(job.timeline)
+        self._record_history(job, text, inserted)
+        # A live success means the backend is reachable again.
+        self._drainer.wake(reachable=True)
+        self._emit("transcript", sequence=job.sequence, text=text, inserted=inserted)
+        if job.insert and not inserted:
+            job.status = JobStatus.FAILED
+            self._notice("Insertion failed", insertion.message or "Unable to insert text")
+            return
+        preview = text.strip()
+        if len(preview) > PREVIEW_CHARS:
+            preview = preview[: PREVIEW_CHARS - 3] + "…"
+        self._notice("Transcription complete", preview or "(No text recognised)")
+
+    def _record_history(self, job: DictationJob, text: str, inserted: bool) -> None:
+        assert job.transcription is not None
+        timeline = job.timeline
+        intervals = timeline.intervals()
+        self._history.record(
+            HistoryEntry(
+                text=text,
+                created=timeline.created,
+                raw_text=job.transcription.text,
+                sequence=job.sequence,
+                audio_seconds=timeline.audio_seconds,
+                segments=timeline.segments,
+                codec=timeline.codec,
+                audio_bytes=timeline.audio_bytes,
+                transcribe_seconds=intervals.get("transcribe"),
+                release_to_paste=intervals.get("release_to_paste"),
+                inserted=inserted,
+            )
+        )
+
+    def _spool_failed_job(self, job: DictationJob) -> None:
+        logger.error("Transcription failed: %s", job.error)
+        try:
+            self._spool.put(job.recordings, reason=str(job.error))
+        except OSError as exc:
+            logger.exception("Unable to spool failed dictation: %s", exc)
+            self._notice("Transcription failed", str(job.error))
+            return
+        self._drainer.wake()
+        self._notice(
+            "Transcription deferred",
+            f"{job.error}\nThe recording was saved and will be transcribed when the service is reachable.",
+        )
+
+    def _handle_spooled_result(self, result: SpooledResult) -> None:
+        self._history.record(HistoryEntry(text=result.text, created=result.recorded, source="recovered"))
+        self._emit_pickups()
+        self._notice("Deferred dictation ready", "Pick it up from the tray's Recovered menu.")
+
+    def _handle_spool_failure(self, entry: SpoolEntry, location: Path) -> None:
+        self._notice(
+            "Deferred dictation failed",
+            f"{entry.reason}\nIts audio was kept in {location}.",
+        )
+
+    def _emit_pickups(self) -> None:
+        self._emit("pickups", results=[asdict(result) for result in self._spool.results()])
+
+
+def _job_dict(info: Any) -> Dict[str, Any]:
+    return {"sequence": info.sequence, "status": info.status.value, "segments": info.segments}
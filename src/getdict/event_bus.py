@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, ClassVar, Dict, List, Optional, Tuple, Type, TypeVar, Union
+
+from PySide6.QtCore import QObject, Qt, QTimer, Signal
+
+from .models import AppState, JobInfo, JobStatus, LevelFrame
+from .spool import SpooledResult
+
+logger = logging.getLogger(__name__)
+
+# One display frame at levels.DISPLAY_RATE; events are delivered at most this often.
+FRAME_INTERVAL_MS = 33
+
+
+@dataclass(frozen=True)
+class StateChanged:
+    COALESCE: ClassVar[bool] = True
+    state: AppState
+    tooltip: str
+
+
+@dataclass(frozen=True)
+class LevelsChanged:
+    COALESCE: ClassVar[bool] = True
+    frame: LevelFrame
+
+
+@dataclass(frozen=True)
+class JobsChanged:
+    COALESCE: ClassVar[bool] = True
+    jobs: Tuple[JobInfo, ...]
+
+
+@dataclass(frozen=True)
+class PickupsChanged:
+    COALESCE: ClassVar[bool] = True
+    results: Tuple[SpooledResult, ...]
+
+
+@dataclass(frozen=True)
+class Notice:
+    COALESCE: ClassVar[bool] = False
+    title: str
+    message: str
+
+
+@dataclass(frozen=True)
+class Disconnected:
+    COALESCE: ClassVar[bool] = False
+
+
+BusEvent = Union[StateChanged, LevelsChanged, JobsChanged, PickupsChanged, Notice, Disconnected]
+_Event = TypeVar("_Event", bound=BusEvent)
+
+
+def parse_engine_event(event: Dict[str, Any]) -> Optional[BusEvent]:
+    """Converts an engine event dict into its bus event; ``None`` for events the front-end does not follow."""
+    kind = event["event"]
+    if kind == "state":
+        return StateChanged(AppState(event["state"]), event["tooltip"])
+    if kind == "levels":
+        return LevelsChanged(LevelFrame(event["rms"], tuple(event["bands"])))
+    if kind == "jobs":
+        return JobsChanged(tuple(JobInfo(job["sequence"], JobStatus(job["status"]), job["segments"]) for job in event["jobs"]))
+    if kind == "pickups":
+        return PickupsChanged(tuple(SpooledResult(**result) for result in event["results"]))
+    if kind == "notice":
+        return Notice(event["title"], event["message"])
+    if kind == "disconnected":
+        return Disconnected()
+    return None
+
+
+class EventBus(QObject):
+    """Delivers events posted from any thread to handlers on the GUI thread.
+
+    :meth:`post` only queues the event and, if nothing is pending yet, wakes the
+    GUI thread through a queued signal. Pending events are delivered together,
+    at most once per display frame. Only the newest event of a coalescing type
+    (state, levels, jobs, pickups) is kept, since each one supersedes the
+    previous; notices are delivered in order. The bus must be created on the
+    GUI thread.
+    """
+
+    _wake = Signal()
+
+    def __init__(self, interval_ms: int = FRAME_INTERVAL_MS, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        # Keyed by event type for coalescing events and by sequence number otherwise.
+        self._pending: Dict[Any, BusEvent] = {}
+        self._sequence = 0
+        self._scheduled = False
+        self._handlers: Dict[type, List[Callable[[Any], None]]] = {}
+        self._interval = interval_ms / 1000
+        self._delivered = 0.0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._deliver)
+        self._wake.connect(self._schedule, Qt.ConnectionType.QueuedConnection)
+
+    def subscribe(self, event_type: Type[_Event], handler: Callable[[_Event], None]) -> None:
+        """Registers ``handler`` for ``event_type``; call from the GUI thread."""
+        self._handlers.setdefault(event_type, []).append(handler)
+
+    def post(self, event: BusEvent) -> None:
+        """Queues ``event`` for delivery on the GUI thread; safe to call from any thread."""
+        with self._lock:
+            if event.COALESCE:
+                key: Any = type(event)
+                # Moved to the end, so it stays ordered after the notices posted before it.
+                self._pending.pop(key, None)
+            else:
+                self._sequence += 1
+                key = self._sequence
+            self._pending[key] = event
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._wake.emit()
+
+    def _schedule(self) -> None:
+        wait = self._delivered + self._interval - time.monotonic()
+        if wait > 0:
+            self._timer.start(int(wait * 1000) + 1)
+        else:
+            self._deliver()
+
+    def _deliver(self) -> None:
+        self._delivered = time.monotonic()
+        with self._lock:
+            events = list(self._pending.values())
+            self._pending.clear()
+            self._scheduled = False
+        for event in events:
+            for handler in self._handlers.get(type(event), ()):
+                try:
+                    handler(event)
+                except Exception as exc:  # pragma: no cover - one failing handler must not drop the other events
+                    logger.exception("Handler for %s failed: %s", type(event).__name__, exc)
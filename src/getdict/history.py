@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import logging
+import queue
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import List, Optional, Union
+
+from .settings import HistorySettings
+
+logger = logging.getLogger(__name__)
+
+HISTORY_DB_NAME = "history.sqlite3"
+# Rows written per transaction at most; a burst is committed together.
+WRITE_BATCH = 64
+# How long the writer waits for more rows before committing a batch.
+WRITE_DELAY = 0.5
+COMPACT_INTERVAL = 3600.0
+SEARCH_LIMIT = 50
+# Queued to ask the writer to compact, or to stop.
+_COMPACT = "compact"
+_STOP = "stop"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    text TEXT NOT NULL,
+    raw_text TEXT NOT NULL DEFAULT '',
+    source TEXT NOT NULL DEFAULT 'dictation',
+    sequence INTEGER NOT NULL DEFAULT 0,
+    audio_seconds REAL NOT NULL DEFAULT 0,
+    segments INTEGER NOT NULL DEFAULT 0,
+    codec TEXT,
+    audio_bytes INTEGER NOT NULL DEFAULT 0,
+    transcribe_seconds REAL,
+    release_to_paste REAL,
+    inserted INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS transcripts_created ON transcripts(created);
+"""
+# Created separately: SQLite can be built without FTS5, and history then
+# falls back to substring search.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS transcripts_fts USING fts5(
+    text, content='transcripts', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS transcripts_ai AFTER INSERT ON transcripts BEGIN
+    INSERT INTO transcripts_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS transcripts_ad AFTER DELETE ON transcripts BEGIN
+    INSERT INTO transcripts_fts(transcripts_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+DROP_FTS_TRIGGERS = """
+DROP TRIGGER IF EXISTS transcripts_ai;
+DROP TRIGGER IF EXISTS transcripts_ad;
+"""
+
+
+@dataclass
+class HistoryEntry:
+    text: str
+    created: float = 0.0
+    raw_text: str = ""
+    source: str = "dictation"
+    sequence: int = 0
+    audio_seconds: float = 0.0
+    segments: int = 0
+    codec: Optional[str] = None
+    audio_bytes: int = 0
+    transcribe_seconds: Optional[float] = None
+    release_to_paste: Optional[float] = None
+    inserted: bool = False
+    entry_id: int = 0
+
+
+COLUMNS = tuple(item.name for item in fields(HistoryEntry) if item.name != "entry_id")
+
+
+def _match_query(query: str) -> str:
+    """Turns free text into an FTS5 query: every word must appear, the last one as a prefix."""
+    words = re.findall(r"\w+", query)
+    if not words:
+        return ""
+    terms = [f'"{word}"' for word in words[:-1]] + [f'"{words[-1]}"*']
+    return " ".join(terms)
+
+
+def _like_patterns(query: str) -> List[str]:
+    """Turns free text into LIKE patterns, one per word, for stores without FTS5."""
+    words = re.findall(r"\w+", query)
+    return ["%" + re.sub(r"([\\%_])", r"\\\1", word) + "%" for word in words]
+
+
+class HistoryStore:
+    """Transcript history in SQLite with a full-text index.
+
+    :meth:`record` only queues the entry; a writer thread commits queued entries
+    in batches, so dictation never waits on the disk. Entries older than
+    ``retention_days``, or beyond the newest ``max_entries``, are deleted when
+    the store opens, hourly after that and on :meth:`compact`, and the freed
+    pages are returned to the file system. If SQLite lacks FTS5, search falls
+    back to matching every word as a substring, newest first.
+    """
+
+    def __init__(self, path: Path, settings: HistorySettings) -> None:
+        self.path = path
+        self._settings = settings
+        self._queue: queue.Queue[Union[HistoryEntry, str]] = queue.Queue()
+        self._read_lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        writer = self._connect()
+        # auto_vacuum only takes effect before the first table is created.
+        writer.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        writer.executescript(SCHEMA)
+        self._fts = self._create_index(writer)
+        self._reader = self._connect()
+        self._compacted = 0.0
+        self._thread = threading.Thread(target=self._write_loop, args=(writer,), name="getdict-history", daemon=True)
+        self._thread.start()
+        self.compact()
+
+    @staticmethod
+    def _create_index(connection: sqlite3.Connection) -> bool:
+        """Creates the full-text index; returns ``False`` if this SQLite has no FTS5."""
+        try:
+            indexed = connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'transcripts_ai'"
+            ).fetchone()
+            connection.executescript(FTS_SCHEMA)
+            if indexed is None:
+                # Rows written while the index was unavailable are not in it yet.
+                connection.execute("INSERT INTO transcripts_fts(transcripts_fts) VALUES ('rebuild')")
+        except sqlite3.OperationalError as exc:
+            logger.warning("Full-text search unavailable (%s); history search matches substrings instead", exc)
+            # Left over from a build with FTS5, they would make every insert fail.
+            connection.executescript(DROP_FTS_TRIGGERS)
+            return False
+        return True
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        return connection
+
+    def record(self, entry: HistoryEntry) -> None:
+        if not self._settings.enabled:
+            return
+        if not entry.created:
+            entry.created = time.time()
+        self._queue.put(entry)
+
+    def compact(self) -> None:
+        """Asks the writer to delete entries outside the retention limits."""
+        self._queue.put(_COMPACT)
+
+    def flush(self) -> None:
+        """Blocks until every recorded entry has been written and queued compactions have run."""
+        self._queue.join()
+
+    def close(self) -> None:
+        self._queue.put(_STOP)
+        self._thread.join(timeout=5)
+        with self._read_lock:
+            self._reader.close()
+
+    def search(self, query: str = "", limit: int = SEARCH_LIMIT) -> List[HistoryEntry]:
+        """Newest entries, or those matching every word of ``query``, best matches first."""
+        match = _match_query(query)
+        columns = ", ".join(f"t.{name}" for name in ("id",) + COLUMNS)
+        with self._read_lock:
+            if match and not self._fts:
+                patterns = _like_patterns(query)
+                where = " AND ".join("t.text LIKE ? ESCAPE '\\'" for _ in patterns)
+                rows = self._reader.execute(
+                    f"SELECT {columns} FROM transcripts t WHERE {where} ORDER BY t.created DESC LIMIT ?",
+                    (*patterns, limit),
+                ).fetchall()
+            elif match:
+                rows = self._reader.execute(
+                    f"SELECT {columns} FROM transcripts_fts JOIN transcripts t ON t.id = transcripts_fts.rowid "
+                    "WHERE transcripts_fts MATCH ? ORDER BY bm25(transcripts_fts), t.created DESC LIMIT ?",
+                    (match, limit),
+                ).fetchall()
+            else:
+                rows = self._reader.execute(
+                    f"SELECT {columns} FROM transcripts t ORDER BY t.created DESC LIMIT ?", (limit,)
+                ).fetchall()
+        return [self._entry(row) for row in rows]
+
+    def get(self, entry_id: int) -> Optional[HistoryEntry]:
+        columns = ", ".join(("id",) + COLUMNS)
+        with self._read_lock:
+            row = self._reader.execute(f"SELECT {columns} FROM transcripts WHERE id = ?", (entry_id,)).fetchone()
+        return self._entry(row) if row else None
+
+    def count(self) -> int:
+        with self._read_lock:
+            return self._reader.execute("SELECT COUNT(*) FROM transcripts").fetchone()[0]
+
+    @staticmethod
+    def _entry(row: tuple) -> HistoryEntry:
+        entry = HistoryEntry(**dict(zip(COLUMNS, row[1:])))
+        entry.entry_id = row[0]
+        entry.inserted = bool(entry.inserted)
+        return entry
+
+    def _write_loop(self, connection: sqlite3.Connection) -> None:
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + WRITE_DELAY
+            while batch[-1] != _STOP and len(batch) < WRITE_BATCH:
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            running = batch[-1] != _STOP
+            entries = [item for item in batch if isinstance(item, HistoryEntry)]
+            try:
+                if entries:
+                    self._write(connection, entries)
+                if _COMPACT in batch or time.monotonic() - self._compacted > COMPACT_INTERVAL:
+                    self._compact(connection)
+            except sqlite3.Error as exc:
+                logger.warning("Unable to save %d history entries: %s", len(entries), exc)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+        connection.close()
+
+    def _write(self, connection: sqlite3.Connection, entries: List[HistoryEntry]) -> None:
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        rows = []
+        for entry in entries:
+            values = asdict(entry)
+            rows.append(tuple(values[name] for name in COLUMNS))
+        with connection:
+            connection.execute("BEGIN")
+            connection.executemany(f"INSERT INTO transcripts ({', '.join(COLUMNS)}) VALUES ({placeholders})", rows)
+
+    def _compact(self, connection: sqlite3.Connection) -> None:
+        self._compacted = time.monotonic()
+        cutoff = time.time() - self._settings.retention_days * 86400
+        try:
+            with connection:
+                connection.execute("BEGIN")
+                deleted = connection.execute("DELETE FROM transcripts WHERE created < ?", (cutoff,)).rowcount
+                deleted += connection.execute(
+                    "DELETE FROM transcripts WHERE id NOT IN (SELECT id FROM transcripts ORDER BY created DESC LIMIT ?)",
+                    (max(self._settings.max_entries, 0),),
+                ).rowcount
+            if deleted:
+                if self._fts:
+                    connection.execute("INSERT INTO transcripts_fts(transcripts_fts) VALUES ('optimize')")
+                connection.execute("PRAGMA incremental_vacuum")
+                logger.info("Removed %d old history entries", deleted)
+        except sqlite3.Error as exc:
+            logger.warning("History compaction failed: %s", exc)
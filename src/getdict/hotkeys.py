@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+import logging
+import queue
 import threading
-from typing import Callable, Optional, Set
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, List, Optional, Set, Union
 
 from pynput import keyboard
 
 from .models import Hotkey
 
+logger = logging.getLogger(__name__)
 
 ALIASES = {
     "ctrl": {"ctrl", "control"},
@@ -15,15 +19,49 @@ ALIASES = {
     "cmd": {"cmd", "win", "super"},
     "space": {"space", " "},
     "enter": {"enter", "return"},
+    "esc": {"esc", "escape"},
+}
+
+# Left/right variants reported by pynput for each canonical modifier.
+SIDED_KEYS = {
+    "ctrl": ("ctrl", "ctrl_l", "ctrl_r"),
+    "alt": ("alt", "alt_l", "alt_r"),
+    "shift": ("shift", "shift_l", "shift_r"),
+    "cmd": ("cmd", "cmd_l", "cmd_r"),
+}
+
+MODIFIERS = frozenset(SIDED_KEYS)
+
+KeyEvent = Union[keyboard.Key, keyboard.KeyCode]
+
+_CANONICAL: Dict[str, str] = {
+    alias: canonical for canonical, aliases in ALIASES.items() for alias in (canonical, *aliases)
 }
 
 
 def _canonical(token: str) -> str:
-    token = token.strip().lower()
-    for canonical, aliases in ALIASES.items():
-        if token == canonical or token in aliases:
-            return canonical
-    return token
+    token = token.lower()
+    if token in _CANONICAL:
+        return _CANONICAL[token]
+    token = token.strip()
+    return _CANONICAL.get(token, token)
+
+
+def _build_key_table() -> Dict[object, str]:
+    table: Dict[object, str] = {}
+    for key in keyboard.Key:
+        table[key] = _canonical(key.name)
+    for canonical, names in SIDED_KEYS.items():
+        for name in names:
+            key = getattr(keyboard.Key, name, None)
+            if key is not None:
+                table[key] = canonical
+    return table
+
+
+# Filled lazily with character keys as they are seen, so every lookup after the
+# first is a single dict access on the hook thread.
+_KEY_NAMES = _build_key_table()
 
 
 def _parse_modifier(modifier: str) -> Set[str]:
@@ -34,47 +72,78 @@ def _parse_key(key: str) -> str:
     return _canonical(key)
 
 
-def _key_name(key: keyboard.Key | keyboard.KeyCode) -> str:
-    if isinstance(key, keyboard.KeyCode):
-        if key.char:
-            return _canonical(key.char)
-        return _canonical(str(key))
-    special_map = {
-        "ctrl": {keyboard.Key.ctrl, keyboard.Key.ctrl_l, keyboard.Key.ctrl_r},
-        "alt": {keyboard.Key.alt, keyboard.Key.alt_l, keyboard.Key.alt_r},
-        "shift": {keyboard.Key.shift, keyboard.Key.shift_l, keyboard.Key.shift_r},
-        "cmd": {keyboard.Key.cmd, keyboard.Key.cmd_l, keyboard.Key.cmd_r} if hasattr(keyboard.Key, "cmd_l") else {keyboard.Key.cmd},
-        "space": {keyboard.Key.space},
-        "enter": {keyboard.Key.enter},
-    }
-    for canonical, options in special_map.items():
-        if key in options:
-            return canonical
-    if key.name:
-        return _canonical(key.name)
-    return _canonical(str(key))
+def _key_name(key: KeyEvent) -> str:
+    name = _KEY_NAMES.get(key)
+    if name is not None:
+        return name
+    if isinstance(key, keyboard.KeyCode) and key.char:
+        name = _canonical(key.char)
+    elif getattr(key, "name", None):
+        name = _canonical(key.name)  # type: ignore[union-attr]
+    else:
+        name = _canonical(str(key))
+    _KEY_NAMES[key] = name
+    return name
+
+
+@dataclass(frozen=True, eq=False)
+class _Binding:
+    keys: FrozenSet[str]
+    on_press: Callable[[], None]
+    on_release: Optional[Callable[[], None]] = None
+
+    @classmethod
+    def compile(
+        cls,
+        hotkey: Hotkey,
+        on_press: Callable[[], None],
+        on_release: Optional[Callable[[], None]] = None,
+    ) -> "_Binding":
+        return cls(frozenset(_parse_modifier(hotkey.modifier) | {_parse_key(hotkey.key)}), on_press, on_release)
 
 
 class HotkeyListener:
+    """Global hotkey listener for push-to-talk plus optional toggle and cancel chords.
+
+    The keyboard hook only updates the set of pressed keys and checks the bindings
+    that the event's key takes part in; callbacks are queued to a dispatcher thread
+    so a slow callback (such as opening the audio device) never delays key events.
+    """
+
     def __init__(
         self,
         hotkey: Hotkey,
         on_start: Callable[[], None],
         on_stop: Callable[[], None],
+        toggle_hotkey: Optional[Hotkey] = None,
+        on_toggle: Optional[Callable[[], None]] = None,
+        cancel_hotkey: Optional[Hotkey] = None,
+        on_cancel: Optional[Callable[[], None]] = None,
     ) -> None:
-        self._hotkey = hotkey
-        self._on_start = on_start
-        self._on_stop = on_stop
+        bindings = [_Binding.compile(hotkey, on_start, on_stop)]
+        if toggle_hotkey is not None and on_toggle is not None:
+            bindings.append(_Binding.compile(toggle_hotkey, on_toggle))
+        if cancel_hotkey is not None and on_cancel is not None:
+            bindings.append(_Binding.compile(cancel_hotkey, on_cancel))
+        # Bindings indexed by each of their keys, so an event only checks chords it can complete.
+        self._by_key: Dict[str, List[_Binding]] = {}
+        for binding in bindings:
+            for name in binding.keys:
+                self._by_key.setdefault(name, []).append(binding)
         self._listener: Optional[keyboard.Listener] = None
         self._pressed: Set[str] = set()
+        self._active: Set[_Binding] = set()
+        self._modifiers_released = threading.Event()
+        self._modifiers_released.set()
         self._lock = threading.Lock()
-        self._active = False
-        self._modifier_keys = _parse_modifier(hotkey.modifier)
-        self._primary_key = _parse_key(hotkey.key)
+        self._calls: queue.SimpleQueue[Optional[Callable[[], None]]] = queue.SimpleQueue()
+        self._dispatcher: Optional[threading.Thread] = None
 
     def start(self) -> None:
         if self._listener is not None:
             return
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="getdict-hotkeys", daemon=True)
+        self._dispatcher.start()
         self._listener = keyboard.Listener(
             on_press=self._on_press,
             on_release=self._on_release,
@@ -85,25 +154,47 @@ class HotkeyListener:
         if self._listener:
             self._listener.stop()
             self._listener = None
+        if self._dispatcher is not None:
+            self._calls.put(None)
+            self._dispatcher = None
         with self._lock:
             self._pressed.clear()
-            self._active = False
+            self._active.clear()
+        self._modifiers_released.set()
+
+    def wait_released(self, timeout: float) -> bool:
+        """Blocks until no modifier key is held, at most ``timeout`` seconds; False if one still is."""
+        return self._modifiers_released.wait(timeout)
 
-    def _on_press(self, key: keyboard.Key | keyboard.KeyCode) -> None:
+    def _on_press(self, key: KeyEvent) -> None:
         key_name = _key_name(key)
         with self._lock:
             self._pressed.add(key_name)
-            if self._is_hotkey_pressed() and not self._active:
-                self._active = True
-                self._on_start()
-
-    def _on_release(self, key: keyboard.Key | keyboard.KeyCode) -> None:
+            if key_name in MODIFIERS:
+                self._modifiers_released.clear()
+            for binding in self._by_key.get(key_name, ()):
+                if binding not in self._active and binding.keys <= self._pressed:
+                    self._active.add(binding)
+                    self._calls.put(binding.on_press)
+
+    def _on_release(self, key: KeyEvent) -> None:
         key_name = _key_name(key)
         with self._lock:
             self._pressed.discard(key_name)
-            if self._active and not self._is_hotkey_pressed():
-                self._active = False
-                self._on_stop()
-
-    def _is_hotkey_pressed(self) -> bool:
-        return self._modifier_keys.issubset(self._pressed) and self._primary_key in self._pressed
+            if not self._pressed & MODIFIERS:
+                self._modifiers_released.set()
+            for binding in self._by_key.get(key_name, ()):
+                if binding in self._active:
+                    self._active.discard(binding)
+                    if binding.on_release is not None:
+                        self._calls.put(binding.on_release)
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            call = self._calls.get()
+            if call is None:
+                return
+            try:
+                call()
+            except Exception as exc:  # pragma: no cover - keeps later hotkeys working
+                logger.exception("Hotkey callback failed: %s", exc)
@@ -1,37 +1,167 @@
 from __future__ import annotations
 
+import logging
 import platform
+import threading
 import time
 from contextlib import suppress
+from typing import Callable, Optional
 
 import pyperclip
 from pynput import keyboard
 
-from .models import InsertionResult
+from .models import InsertionResult, InsertionStrategy
+from .settings import InsertionSettings
 
-PASTE_DELAY = 0.1
+logger = logging.getLogger(__name__)
 
+POLL_INTERVAL = 0.005
+# The restore delay is this multiple of the smoothed clipboard round-trip time.
+RESTORE_FACTOR = 4.0
+EWMA_ALPHA = 0.2
+# The target application reads the clipboard at some point after the paste
+# shortcut, which our own round trip says nothing about; never restore sooner.
+RESTORE_FLOOR = 0.1
+# How long to wait for held modifiers before pasting instead of typing.
+KEY_RELEASE_TIMEOUT = 2.0
 
-def insert_text(text: str) -> InsertionResult:
-    controller = keyboard.Controller()
-    system = platform.system().lower()
-    modifier = keyboard.Key.cmd if system == "darwin" else keyboard.Key.ctrl
 
-    original_clipboard = None
-    with suppress(Exception):
-        original_clipboard = pyperclip.paste()
+def copy_to_clipboard(text: str) -> InsertionResult:
     try:
         pyperclip.copy(text)
     except pyperclip.PyperclipException as exc:  # type: ignore[attr-defined]
-        return InsertionResult(success=False, message=str(exc))
-
-    time.sleep(PASTE_DELAY)
-    with controller.pressed(modifier):
-        controller.press('v')
-        controller.release('v')
-    time.sleep(PASTE_DELAY)
-
-    if original_clipboard is not None:
-        with suppress(Exception):
-            pyperclip.copy(original_clipboard)
-    return InsertionResult(success=True)
+        return InsertionResult(success=False, message=str(exc), strategy=InsertionStrategy.CLIPBOARD)
+    return InsertionResult(success=True, strategy=InsertionStrategy.CLIPBOARD)
+
+
+class _PendingRestore:
+    def __init__(self, original: str, text: str) -> None:
+        self.original = original
+        self.text = text
+        self.timer: Optional[threading.Timer] = None
+
+
+class TextInserter:
+    """Inserts text into the focused application.
+
+    Short plain-ASCII texts are typed directly. Anything else is pasted through
+    the clipboard: the paste shortcut is sent as soon as the clipboard is seen to
+    hold the new text, and the previous contents are restored in the background
+    after a delay that follows the measured clipboard round-trip time, but never
+    less than 100 ms. A restore still pending when the next insertion starts is
+    folded into that insertion.
+
+    ``keys_released(timeout)`` reports whether the user has let go of every
+    modifier key. Insertion waits for that, since a held Ctrl or Alt would turn
+    typed characters into shortcuts; if they stay down, the text is pasted.
+    """
+
+    def __init__(self, settings: InsertionSettings, keys_released: Optional[Callable[[float], bool]] = None) -> None:
+        self._settings = settings
+        self.keys_released = keys_released
+        self._controller: Optional[keyboard.Controller] = None
+        self._modifier = keyboard.Key.cmd if platform.system().lower() == "darwin" else keyboard.Key.ctrl
+        self._lock = threading.Lock()
+        self._pending: Optional[_PendingRestore] = None
+        self._round_trip = settings.restore_delay_ms / 1000 / RESTORE_FACTOR
+
+    @property
+    def restore_delay(self) -> float:
+        delay = self._round_trip * RESTORE_FACTOR
+        delay = min(max(delay, self._settings.min_restore_delay_ms / 1000), self._settings.max_restore_delay_ms / 1000)
+        return max(delay, RESTORE_FLOOR)
+
+    def insert(self, text: str) -> InsertionResult:
+        started = time.monotonic()
+        with self._lock:
+            controller = self._get_controller()
+            if self._wait_for_keys() and self._should_type(text):
+                controller.type(text)
+                return InsertionResult(
+                    success=True,
+                    strategy=InsertionStrategy.TYPE,
+                    elapsed_seconds=time.monotonic() - started,
+                )
+            original = self._take_pending_original()
+            if original is None:
+                with suppress(Exception):
+                    original = pyperclip.paste()
+            copied_at = time.monotonic()
+            try:
+                pyperclip.copy(text)
+            except pyperclip.PyperclipException as exc:  # type: ignore[attr-defined]
+                return InsertionResult(success=False, message=str(exc), strategy=InsertionStrategy.PASTE)
+            waited = self._wait_for_clipboard(text, copied_at)
+            with controller.pressed(self._modifier):
+                controller.press("v")
+                controller.release("v")
+            if original is not None and original != text:
+                self._schedule_restore(original, text)
+        return InsertionResult(
+            success=True,
+            strategy=InsertionStrategy.PASTE,
+            elapsed_seconds=time.monotonic() - started,
+            clipboard_wait_seconds=waited,
+        )
+
+    def close(self) -> None:
+        """Restores the clipboard immediately if a restore is still pending."""
+        with self._lock:
+            original = self._take_pending_original()
+        if original is not None:
+            with suppress(Exception):
+                pyperclip.copy(original)
+
+    def _get_controller(self) -> keyboard.Controller:
+        if self._controller is None:
+            self._controller = keyboard.Controller()
+        return self._controller
+
+    def _should_type(self, text: str) -> bool:
+        return 0 < len(text) <= self._settings.type_max_chars and text.isascii() and text.isprintable()
+
+    def _wait_for_keys(self) -> bool:
+        if self.keys_released is None or self.keys_released(KEY_RELEASE_TIMEOUT):
+            return True
+        logger.warning("Modifier keys still held after %.0f s; pasting instead of typing", KEY_RELEASE_TIMEOUT)
+        return False
+
+    def _wait_for_clipboard(self, text: str, started: float) -> float:
+        deadline = started + self._settings.clipboard_timeout_ms / 1000
+        while True:
+            with suppress(Exception):
+                if pyperclip.paste() == text:
+                    break
+            if time.monotonic() >= deadline:
+                logger.warning("Clipboard did not update within %d ms; pasting anyway", self._settings.clipboard_timeout_ms)
+                break
+            time.sleep(POLL_INTERVAL)
+        waited = time.monotonic() - started
+        self._round_trip += EWMA_ALPHA * (waited - self._round_trip)
+        return waited
+
+    def _take_pending_original(self) -> Optional[str]:
+        pending = self._pending
+        if pending is None:
+            return None
+        self._pending = None
+        if pending.timer is not None:
+            pending.timer.cancel()
+        return pending.original
+
+    def _schedule_restore(self, original: str, text: str) -> None:
+        pending = _PendingRestore(original, text)
+        pending.timer = threading.Timer(self.restore_delay, self._restore, args=(pending,))
+        pending.timer.daemon = True
+        self._pending = pending
+        pending.timer.start()
+
+    def _restore(self, pending: _PendingRestore) -> None:
+        with self._lock:
+            if self._pending is not pending:
+                return
+            self._pending = None
+            with suppress(Exception):
+                # Leave the clipboard alone if something else has been copied since.
+                if pyperclip.paste() == pending.text:
+                    pyperclip.copy(pending.original)
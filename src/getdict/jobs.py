@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Deque, List, Optional
+
+from .metrics import Timeline
+from .models import JobInfo, JobStatus, RecordingResult, TranscriptionResult
+from .segments import SegmentedTranscription, discard_recording
+
+if TYPE_CHECKING:
+    from .transcription import TranscriptionClient
+
+logger = logging.getLogger(__name__)
+
+FINISHED_HISTORY = 5
+
+
+class DictationJob:
+    """One recording's trip through transcription and insertion."""
+
+    def __init__(self, sequence: int, client: TranscriptionClient, executor: ThreadPoolExecutor) -> None:
+        self.sequence = sequence
+        self.status = JobStatus.RECORDING
+        self.transcription: Optional[TranscriptionResult] = None
+        self.error: Optional[BaseException] = None
+        self.timeline = Timeline(sequence)
+        # Whether the engine pastes the text; clients such as scripts only want the transcript.
+        self.insert = True
+        self.executor = executor
+        self._segments = SegmentedTranscription(client, executor)
+        self._closed = threading.Event()
+
+    @property
+    def segment_count(self) -> int:
+        return self._segments.segment_count
+
+    @property
+    def recordings(self) -> List[RecordingResult]:
+        return self._segments.recordings
+
+    def info(self) -> JobInfo:
+        return JobInfo(sequence=self.sequence, status=self.status, segments=self.segment_count)
+
+    def add_segment(self, recording: RecordingResult) -> None:
+        if self.status is JobStatus.CANCELLED:
+            discard_recording(recording)
+            return
+        self._segments.submit(recording)
+
+    def close(self, final: RecordingResult) -> None:
+        """Marks the recording as finished; the final segment is dropped if it has no speech."""
+        if final.has_speech and self.status is not JobStatus.CANCELLED:
+            self._segments.submit(final)
+        else:
+            discard_recording(final)
+        if self.status is JobStatus.RECORDING:
+            self.status = JobStatus.TRANSCRIBING if self.segment_count else JobStatus.EMPTY
+        self.timeline.segments = self.segment_count
+        self.timeline.audio_seconds = sum(recording.duration_seconds for recording in self.recordings)
+        if self.recordings:
+            self.timeline.codec = self.recordings[-1].codec.value
+            self.timeline.audio_bytes = sum(recording.encoded_bytes for recording in self.recordings)
+            self.timeline.encode_seconds = sum(recording.encode_seconds for recording in self.recordings)
+        self._closed.set()
+
+    def cancel(self) -> None:
+        self.status = JobStatus.CANCELLED
+        self._closed.set()
+
+    def wait(self) -> None:
+        """Blocks until the recording is closed and every segment is transcribed."""
+        self._closed.wait()
+        if self.status is not JobStatus.TRANSCRIBING:
+            return
+        try:
+            self.transcription = self._segments.result()
+        except Exception as exc:
+            self.error = exc
+            return
+        self.timeline.mark("upload_started", self.transcription.started_at)
+        self.timeline.mark("response_received", self.transcription.finished_at)
+
+    def discard(self) -> None:
+        self._segments.discard()
+
+
+class JobQueue:
+    """Runs dictation jobs on a bounded worker pool and delivers them in capture order.
+
+    Segments of every open job share ``workers`` transcription threads, so recording
+    N+1 can proceed while job N is still transcribing. A single delivery thread
+    hands finished jobs to ``deliver`` strictly in the order they were opened.
+    :meth:`resize` applies new limits while jobs are running.
+    """
+
+    def __init__(
+        self,
+        client: Callable[[], TranscriptionClient],
+        deliver: Callable[[DictationJob], None],
+        on_change: Optional[Callable[[], None]] = None,
+        workers: int = 2,
+        max_pending: int = 4,
+    ) -> None:
+        self._client = client
+        self._deliver = deliver
+        self._on_change = on_change
+        self._max_pending = max(max_pending, 1)
+        self._workers = max(workers, 1)
+        self._executor = self._new_executor()
+        # Pools replaced by resize(), shut down once no open job uses them.
+        self._retired: List[ThreadPoolExecutor] = []
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._pending: Deque[DictationJob] = deque()
+        self._finished: Deque[DictationJob] = deque(maxlen=FINISHED_HISTORY)
+        self._ready: queue.Queue[Optional[DictationJob]] = queue.Queue()
+        self._thread = threading.Thread(target=self._delivery_loop, name="getdict-delivery", daemon=True)
+        self._thread.start()
+
+    @property
+    def depth(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    @property
+    def is_full(self) -> bool:
+        return self.depth >= self._max_pending
+
+    def jobs(self) -> List[JobInfo]:
+        with self._lock:
+            return [job.info() for job in (*self._finished, *self._pending)]
+
+    def open_job(self) -> Optional[DictationJob]:
+        """Starts a job for a new recording, or returns ``None`` when the queue is full."""
+        with self._lock:
+            if len(self._pending) >= self._max_pending:
+                return None
+            self._sequence += 1
+            job = DictationJob(self._sequence, self._client(), self._executor)
+            self._pending.append(job)
+        self._ready.put(job)
+        self._changed()
+        return job
+
+    def resize(self, workers: int, max_pending: int) -> None:
+        """Applies new pool limits; jobs already open finish on the pool they started with."""
+        with self._lock:
+            self._max_pending = max(max_pending, 1)
+            if max(workers, 1) != self._workers:
+                self._workers = max(workers, 1)
+                self._retired.append(self._executor)
+                self._executor = self._new_executor()
+        self._shutdown_retired()
+        self._changed()
+
+    def close_job(self, job: DictationJob, final: RecordingResult) -> None:
+        job.close(final)
+        self._changed()
+
+    def cancel_job(self, job: DictationJob) -> None:
+        job.cancel()
+        self._changed()
+
+    def shutdown(self) -> None:
+        self._ready.put(None)
+        with self._lock:
+            executors, self._retired = [self._executor, *self._retired], []
+        for executor in executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _new_executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="getdict-transcribe")
+
+    def _shutdown_retired(self) -> None:
+        with self._lock:
+            in_use = {id(job.executor) for job in self._pending}
+            idle = [executor for executor in self._retired if id(executor) not in in_use]
+            self._retired = [executor for executor in self._retired if id(executor) in in_use]
+        for executor in idle:
+            executor.shutdown(wait=False)
+
+    def _changed(self) -> None:
+        if self._on_change is not None:
+            self._on_change()
+
+    def _delivery_loop(self) -> None:
+        while True:
+            job = self._ready.get()
+            if job is None:
+                return
+            job.wait()
+            self._changed()
+            try:
+                if job.status is JobStatus.TRANSCRIBING:
+                    job.status = JobStatus.FAILED if job.error is not None else JobStatus.INSERTING
+                    self._changed()
+                self._deliver(job)
+                if job.status is JobStatus.INSERTING:
+                    job.status = JobStatus.DONE
+            except Exception as exc:  # pragma: no cover - keeps later jobs flowing
+                logger.exception("Delivering job %d failed: %s", job.sequence, exc)
+                job.status = JobStatus.FAILED
+            finally:
+                job.discard()
+                with self._lock:
+                    self._pending.remove(job)
+                    self._finished.append(job)
+                self._shutdown_retired()
+                self._changed()
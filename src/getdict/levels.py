@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from typing import List, Sequence
+
+import numpy as np
+
+from .models import LevelFrame
+from .vad import to_mono_float
+
+DISPLAY_RATE = 30
+# Edges of the low, mid and high bands shown by the overlay's three layers.
+BAND_EDGES_HZ = (60.0, 500.0, 2000.0, 8000.0)
+
+
+class LevelMeter:
+    """Turns the captured stream into :class:`LevelFrame` updates at display rate.
+
+    Samples are batched into frames of ``sample_rate / frame_rate`` samples; every
+    complete frame in a batch is analysed in one vectorised pass (RMS plus a
+    Hann-windowed FFT summed into bands), and any remainder is carried over.
+    """
+
+    def __init__(self, sample_rate: int, frame_rate: int = DISPLAY_RATE, band_edges: Sequence[float] = BAND_EDGES_HZ) -> None:
+        self.frame_length = max(int(sample_rate / max(frame_rate, 1)), 16)
+        self._window = np.hanning(self.frame_length).astype(np.float32)
+        freqs = np.fft.rfftfreq(self.frame_length, d=1.0 / sample_rate)
+        edges = np.asarray(band_edges, dtype=np.float64)
+        # (bins, bands) selector so band power is a single matrix product.
+        self._bands = ((freqs[:, None] >= edges[None, :-1]) & (freqs[:, None] < edges[None, 1:])).astype(np.float32)
+        # One-sided spectrum, corrected for the window's energy (Parseval).
+        self._scale = np.float32(2.0 / (self.frame_length * np.sum(np.square(self._window))))
+        self._pending = np.zeros(0, dtype=np.float32)
+
+    def reset(self) -> None:
+        self._pending = np.zeros(0, dtype=np.float32)
+
+    def feed(self, samples: np.ndarray) -> List[LevelFrame]:
+        mono = to_mono_float(samples)
+        if len(self._pending):
+            mono = np.concatenate((self._pending, mono))
+        count = len(mono) // self.frame_length
+        end = count * self.frame_length
+        self._pending = mono[end:].copy()
+        if not count:
+            return []
+        return self.analyse(mono[:end].reshape(count, self.frame_length))
+
+    def analyse(self, frames: np.ndarray) -> List[LevelFrame]:
+        rms = np.sqrt(np.mean(np.square(frames), axis=1))
+        spectrum = np.fft.rfft(frames * self._window, axis=1)
+        power = np.square(spectrum.real) + np.square(spectrum.imag)
+        bands = np.sqrt((power @ self._bands) * self._scale)
+        return [LevelFrame(rms=float(level), bands=tuple(row.tolist())) for level, row in zip(rms, bands)]
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+METRICS_DIR_NAME = "metrics"
+JSONL_FILE_NAME = "latency.jsonl"
+PROMETHEUS_FILE_NAME = "latency.prom"
+JSONL_MAX_BYTES = 5 * 1024 * 1024
+QUANTILES = (0.5, 0.95, 0.99)
+
+STAGES = (
+    "hotkey",
+    "stream_opened",
+    "first_frame",
+    "stop",
+    "encoded",
+    "upload_started",
+    "response_received",
+    "pasted",
+)
+
+# Named intervals between stages; "release_to_paste" is the user-visible budget.
+INTERVALS: Tuple[Tuple[str, str, str], ...] = (
+    ("device_open", "hotkey", "stream_opened"),
+    ("first_audio", "stream_opened", "first_frame"),
+    ("encode", "stop", "encoded"),
+    ("upload_wait", "encoded", "upload_started"),
+    ("transcribe", "upload_started", "response_received"),
+    ("insert", "response_received", "pasted"),
+    ("release_to_paste", "stop", "pasted"),
+    ("total", "hotkey", "pasted"),
+)
+
+
+class Timeline:
+    """Monotonic timestamps of the stages of one dictation."""
+
+    def __init__(self, sequence: int = 0) -> None:
+        self.sequence = sequence
+        self.created = time.time()
+        self.marks: Dict[str, float] = {}
+        self.audio_seconds = 0.0
+        self.segments = 0
+        self.codec: Optional[str] = None
+        self.audio_bytes = 0
+        self.encode_seconds = 0.0
+
+    def mark(self, stage: str, at: Optional[float] = None) -> None:
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage {stage!r}")
+        self.marks[stage] = time.monotonic() if at is None else at
+
+    def intervals(self) -> Dict[str, float]:
+        result = {}
+        for name, start, end in INTERVALS:
+            if start in self.marks and end in self.marks:
+                seconds = self.marks[end] - self.marks[start]
+                if seconds >= 0:
+                    result[name] = seconds
+        return result
+
+    def to_dict(self) -> Dict[str, object]:
+        origin = min(self.marks.values(), default=0.0)
+        return {
+            "sequence": self.sequence,
+            "time": self.created,
+            "audio_seconds": round(self.audio_seconds, 3),
+            "segments": self.segments,
+            "codec": self.codec,
+            "audio_bytes": self.audio_bytes,
+            "encode_seconds": round(self.encode_seconds, 6),
+            "marks": {stage: round(self.marks[stage] - origin, 6) for stage in STAGES if stage in self.marks},
+            "intervals": {name: round(seconds, 6) for name, seconds in self.intervals().items()},
+        }
+
+
+class LatencyHistogram:
+    """Rolling window of latency samples with percentile summaries."""
+
+    def __init__(self, window: int = 500) -> None:
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def quantiles(self, quantiles: Tuple[float, ...] = QUANTILES) -> Dict[float, float]:
+        if not self._samples:
+            return {}
+        values = np.percentile(np.fromiter(self._samples, dtype=np.float64), [q * 100 for q in quantiles])
+        return dict(zip(quantiles, (float(value) for value in values)))
+
+
+class MetricsRegistry:
+    """Collects dictation timelines into per-interval histograms.
+
+    When a directory is given, every timeline is appended to ``latency.jsonl`` and
+    ``latency.prom`` is rewritten in the Prometheus text format.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, window: int = 500) -> None:
+        self._directory = directory
+        self._window = window
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        if directory is not None:
+            directory.mkdir(parents=True, exist_ok=True)
+
+    def record(self, timeline: Timeline) -> None:
+        with self._lock:
+            for name, seconds in timeline.intervals().items():
+                self._observe(name, seconds)
+            if timeline.codec is not None:
+                # Encoding runs while recording, so it is tracked per codec rather than as a stage.
+                self._observe(f"encode_cpu_{timeline.codec}", timeline.encode_seconds)
+            if self._directory is None:
+                return
+            try:
+                self._append_jsonl(timeline)
+                self._write_prometheus()
+            except OSError as exc:
+                logger.warning("Unable to export metrics: %s", exc)
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._observe(name, seconds)
+
+    def _observe(self, name: str, seconds: float) -> None:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            histogram = self._histograms[name] = LatencyHistogram(self._window)
+        histogram.add(seconds)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            summary = {}
+            for name in self._ordered_names():
+                histogram = self._histograms[name]
+                row = {"count": float(histogram.count)}
+                row.update({f"p{int(q * 100)}": value for q, value in histogram.quantiles().items()})
+                summary[name] = row
+            return summary
+
+    def prometheus_text(self) -> str:
+        with self._lock:
+            return self._render_prometheus()
+
+    def _render_prometheus(self) -> str:
+        lines = [
+            "# HELP getdict_stage_latency_seconds Latency of dictation pipeline stages.",
+            "# TYPE getdict_stage_latency_seconds summary",
+        ]
+        for name in self._ordered_names():
+            histogram = self._histograms[name]
+            for quantile, value in histogram.quantiles().items():
+                lines.append(f'getdict_stage_latency_seconds{{stage="{name}",quantile="{quantile}"}} {value:.6f}')
+            lines.append(f'getdict_stage_latency_seconds_sum{{stage="{name}"}} {histogram.total:.6f}')
+            lines.append(f'getdict_stage_latency_seconds_count{{stage="{name}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def _ordered_names(self) -> List[str]:
+        known = [name for name, _, _ in INTERVALS if name in self._histograms]
+        return known + sorted(set(self._histograms) - set(known))
+
+    def _append_jsonl(self, timeline: Timeline) -> None:
+        assert self._directory is not None
+        path = self._directory / JSONL_FILE_NAME
+        if path.exists() and path.stat().st_size > JSONL_MAX_BYTES:
+            os.replace(path, path.with_suffix(".jsonl.1"))
+        with path.open("a", encoding="utf-8") as fh:
+            fh.write(json.dumps(timeline.to_dict()) + "\n")
+
+    def _write_prometheus(self) -> None:
+        assert self._directory is not None
+        path = self._directory / PROMETHEUS_FILE_NAME
+        tmp = path.with_suffix(".prom.tmp")
+        tmp.write_text(self._render_prometheus(), encoding="utf-8")
+        os.replace(tmp, path)
@@ -3,7 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Callable, Optional, Tuple, Union
 
 
 class AppState(Enum):
@@ -13,6 +13,20 @@ class AppState(Enum):
     ERROR = "error"
 
 
+class JobStatus(Enum):
+    RECORDING = "recording"
+    TRANSCRIBING = "transcribing"
+    INSERTING = "inserting"
+    DONE = "done"
+    FAILED = "failed"
+    EMPTY = "empty"
+    CANCELLED = "cancelled"
+
+    @property
+    def is_finished(self) -> bool:
+        return self in {JobStatus.DONE, JobStatus.FAILED, JobStatus.EMPTY, JobStatus.CANCELLED}
+
+
 class RecordingError(Exception):
     """Raised when recording fails."""
 
@@ -21,37 +35,134 @@ class TranscriptionError(Exception):
     """Raised when transcription fails."""
 
 
+class RetryableError(TranscriptionError):
+    """A transcription failure worth retrying, such as a timeout, 429 or 5xx.
+
+    ``retry_after`` is the delay in seconds the server asked for, if any.
+    """
+
+    def __init__(self, message: str, retry_after: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(TranscriptionError):
+    """Raised without contacting the service while it is considered unhealthy."""
+
+
+class EngineError(Exception):
+    """Raised when the dictation engine refuses a command; ``title`` is a short summary for notifications."""
+
+    def __init__(self, message: str, title: str = "GetDict") -> None:
+        super().__init__(message)
+        self.title = title
+
+
 @dataclass
 class Hotkey:
     modifier: str
     key: str
 
     def __str__(self) -> str:
-        return f"{self.modifier}+{self.key}"
+        return f"{self.modifier}+{self.key}" if self.modifier else self.key
+
+
+class AudioCodec(Enum):
+    FLAC = "flac"
+    OPUS = "opus"
+    WAV = "wav"
+
+    @property
+    def suffix(self) -> str:
+        return ".ogg" if self is AudioCodec.OPUS else f".{self.value}"
+
+
+AudioData = Union[bytes, memoryview]
 
 
 @dataclass
 class RecordingResult:
-    path: Path
     duration_seconds: float
+    path: Optional[Path] = None
+    data: Optional[AudioData] = None
+    index: int = 0
+    dropped_frames: int = 0
+    has_speech: bool = True
+    codec: AudioCodec = AudioCodec.FLAC
+    encoded_bytes: int = 0
+    encode_seconds: float = 0.0
+
+
+@dataclass(frozen=True)
+class LevelFrame:
+    """Input level over one display frame: overall RMS and RMS per frequency band, low to high."""
+
+    rms: float
+    bands: Tuple[float, ...]
 
 
-WaveformCallback = Callable[[float], None]
+WaveformCallback = Callable[[LevelFrame], None]
+SegmentCallback = Callable[[RecordingResult], None]
 
 
 @dataclass
 class TranscriptionRequest:
-    audio_path: Path
+    audio_path: Optional[Path] = None
+    audio_data: Optional[AudioData] = None
+    filename: str = "audio.flac"
     prompt: Optional[str] = None
 
+    @classmethod
+    def from_recording(cls, recording: RecordingResult, prompt: Optional[str] = None) -> "TranscriptionRequest":
+        return cls(
+            audio_path=recording.path,
+            audio_data=recording.data,
+            filename=f"audio{recording.codec.suffix}",
+            prompt=prompt,
+        )
+
+    @property
+    def size(self) -> int:
+        if self.audio_data is not None:
+            return len(self.audio_data)
+        if self.audio_path is not None:
+            try:
+                return self.audio_path.stat().st_size
+            except OSError:
+                return 0
+        return 0
+
+    def describe(self) -> str:
+        if self.audio_data is not None:
+            return f"{self.filename} ({len(self.audio_data)} bytes in memory)"
+        return str(self.audio_path)
+
 
 @dataclass
 class TranscriptionResult:
     text: str
     duration_seconds: float
+    started_at: float = 0.0
+    finished_at: float = 0.0
+
+
+@dataclass
+class JobInfo:
+    sequence: int
+    status: JobStatus
+    segments: int = 0
+
+
+class InsertionStrategy(Enum):
+    PASTE = "paste"
+    TYPE = "type"
+    CLIPBOARD = "clipboard"
 
 
 @dataclass
 class InsertionResult:
     success: bool
     message: Optional[str] = None
+    strategy: Optional[InsertionStrategy] = None
+    elapsed_seconds: float = 0.0
+    clipboard_wait_seconds: float = 0.0
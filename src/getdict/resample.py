@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from math import gcd
+
+import numpy as np
+
+# Filter taps applied per output sample; the prototype filter has ``up * TAPS_PER_PHASE`` taps.
+TAPS_PER_PHASE = 48
+KAISER_BETA = 8.0
+# Passband edge as a fraction of the output Nyquist frequency.
+ROLLOFF = 0.9
+
+
+def _polyphase_bank(up: int, down: int, taps: int) -> np.ndarray:
+    """Windowed-sinc low-pass split into ``up`` phases, each reversed for a dot product with the input window."""
+    length = up * taps
+    cutoff = ROLLOFF / max(up, down)
+    n = np.arange(length) - (length - 1) / 2
+    prototype = cutoff * np.sinc(cutoff * n) * np.kaiser(length, KAISER_BETA) * up
+    # bank[p, i] = prototype[p + (taps - 1 - i) * up]
+    return np.ascontiguousarray(prototype.reshape(taps, up).T[:, ::-1], dtype=np.float32)
+
+
+class StreamingResampler:
+    """Converts captured blocks to the upload format: downmix, rational resample, int16.
+
+    Channels are averaged to mono (or the first ``out_channels`` are kept), then the
+    rate is changed by ``up/down`` with a polyphase FIR filter. Each call gathers the
+    input window of every output sample at once and applies its filter phase in a
+    single vectorised product; the filter history and phase carry over between
+    calls, so blocks can be fed as they arrive.
+    """
+
+    def __init__(self, in_rate: int, out_rate: int, in_channels: int, out_channels: int = 1) -> None:
+        if in_rate <= 0 or out_rate <= 0:
+            raise ValueError("Sample rates must be positive")
+        divisor = gcd(in_rate, out_rate)
+        self.up = out_rate // divisor
+        self.down = in_rate // divisor
+        self.in_channels = in_channels
+        self.out_channels = out_channels
+        self.passthrough = self.up == self.down
+        self._bank = _polyphase_bank(self.up, self.down, TAPS_PER_PHASE) if not self.passthrough else None
+        self.reset()
+
+    def reset(self) -> None:
+        self._history = np.zeros((TAPS_PER_PHASE - 1, self.out_channels), dtype=np.float32)
+        # Position of the next output sample relative to the next input block, in 1/up input samples.
+        self._position = 0
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        if samples.ndim == 1:
+            samples = samples[:, None]
+        if self.passthrough and samples.dtype == np.int16 and samples.shape[1] == self.out_channels:
+            return samples
+        mixed = self._downmix(samples)
+        if self.passthrough:
+            return _to_int16(mixed)
+        count = len(mixed)
+        stop = count * self.up
+        signal = np.concatenate((self._history, mixed))
+        if self._position >= stop:
+            # Too few inputs for an output sample; they still enter the filter history.
+            self._position -= stop
+            self._history = signal[-(TAPS_PER_PHASE - 1) :].copy()
+            return np.zeros((0, self.out_channels), dtype=np.int16)
+        positions = np.arange(self._position, stop, self.down)
+        indices = positions // self.up
+        phases = positions % self.up
+        # windows[k] holds the TAPS_PER_PHASE inputs ending at input k of this block.
+        windows = np.lib.stride_tricks.sliding_window_view(signal, TAPS_PER_PHASE, axis=0)[indices]
+        assert self._bank is not None
+        output = np.einsum("nct,nt->nc", windows, self._bank[phases], optimize=False)
+        self._position = int(positions[-1]) + self.down - stop
+        self._history = signal[-(TAPS_PER_PHASE - 1) :].copy()
+        return _to_int16(output)
+
+    def _downmix(self, samples: np.ndarray) -> np.ndarray:
+        data = samples.astype(np.float32, copy=False)
+        if np.issubdtype(samples.dtype, np.floating):
+            data = data * np.float32(32768.0)
+        if samples.shape[1] == self.out_channels:
+            return data
+        if self.out_channels == 1:
+            return data.mean(axis=1, keepdims=True, dtype=np.float32)
+        if samples.shape[1] > self.out_channels:
+            return data[:, : self.out_channels]
+        return np.repeat(data[:, :1], self.out_channels, axis=1)
+
+
+def _to_int16(samples: np.ndarray) -> np.ndarray:
+    if samples.dtype == np.int16:
+        return samples
+    return np.clip(np.rint(samples), -32768, 32767).astype(np.int16)
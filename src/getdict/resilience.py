@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import email.utils
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from enum import Enum
+from typing import Callable, Deque, Dict, Mapping, Optional
+
+import numpy as np
+
+from .models import CircuitOpenError, RetryableError, TranscriptionError
+from .settings import TranscriptionSettings
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_INITIAL = 1.0
+BACKOFF_MAX = 8.0
+# A Retry-After longer than this is not waited out; the dictation is spooled instead.
+MAX_RETRY_AFTER = 30.0
+
+LATENCY_WINDOW = 200
+# Hedging starts once this many requests have been timed.
+HEDGE_MIN_SAMPLES = 20
+# At most this fraction of requests is duplicated, so a slowdown of the whole
+# service does not double the load on it.
+HEDGE_BUDGET = 0.1
+# Request time is modelled as proportional to this plus the upload size, so the
+# fixed per-request cost is not scaled away for short dictations.
+LATENCY_SIZE_OFFSET = 256 * 1024
+HEDGE_WORKERS = 8
+
+
+def parse_retry_after(headers: Mapping[str, str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait from ``retry-after-ms`` or ``Retry-After`` (seconds or an HTTP date)."""
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return max(float(value) / 1000, 0.0)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(when.timestamp() - (time.time() if now is None else now), 0.0)
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Fails fast after ``failures`` consecutive failed attempts.
+
+    After ``reset_seconds`` one probe request is let through; its outcome closes
+    the circuit or opens it for another period.
+    """
+
+    def __init__(self, failures: int, reset_seconds: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CircuitState.CLOSED
+        self._consecutive = 0
+        self._opened_at = 0.0
+        self.opened = 0
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state is CircuitState.CLOSED:
+                return True
+            if self._state is CircuitState.OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+                self._state = CircuitState.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state is not CircuitState.CLOSED:
+                logger.info("Transcription service recovered; closing circuit")
+            self._state = CircuitState.CLOSED
+            self._consecutive = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._consecutive += 1
+            if self._state is CircuitState.HALF_OPEN or (
+                self._state is CircuitState.CLOSED and self._consecutive >= self.failures
+            ):
+                logger.warning("Transcription service unhealthy; failing fast for %.0fs", self.reset_seconds)
+                self._state = CircuitState.OPEN
+                self._opened_at = self._clock()
+                self.opened += 1
+
+
+class LatencyTracker:
+    """Recent request times, normalised by upload size, for choosing when to hedge."""
+
+    def __init__(self, window: int = LATENCY_WINDOW) -> None:
+        self._lock = threading.Lock()
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float, size: int) -> None:
+        with self._lock:
+            self._samples.append(seconds / (LATENCY_SIZE_OFFSET + size))
+
+    def threshold(self, percentile: float, size: int) -> Optional[float]:
+        """The expected ``percentile`` request time for ``size`` bytes, or ``None`` until enough samples exist."""
+        with self._lock:
+            if len(self._samples) < HEDGE_MIN_SAMPLES:
+                return None
+            samples = np.fromiter(self._samples, dtype=np.float64)
+        return float(np.percentile(samples, percentile * 100)) * (LATENCY_SIZE_OFFSET + size)
+
+
+class ResilientCaller:
+    """Retries, hedging and circuit breaking around one backend call.
+
+    Each attempt that is still running past the recent ``hedge_percentile``
+    latency gets a duplicate, and whichever answers first wins. Retryable
+    failures back off exponentially, or for as long as the server's
+    ``Retry-After`` asks. Consecutive failures open the circuit, after which
+    calls raise :class:`CircuitOpenError` at once so dictations go to the spool
+    instead of waiting on a dead endpoint.
+    """
+
+    def __init__(
+        self,
+        settings: TranscriptionSettings,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._settings = settings
+        self._clock = clock
+        self._sleep = sleep
+        self.breaker = CircuitBreaker(settings.breaker_failures, settings.breaker_reset_seconds, clock)
+        self.latency = LatencyTracker()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = dict.fromkeys(("requests", "attempts", "retries", "hedged", "hedge_wins", "rejected"), 0)
+
+    def call(self, send: Callable[[], str], size: int = 0, hedge: bool = True) -> str:
+        settings = self._settings
+        self.breaker.failures = settings.breaker_failures
+        self.breaker.reset_seconds = settings.breaker_reset_seconds
+        self._count("requests")
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise CircuitOpenError("The transcription service is unavailable; retrying later")
+        attempts = max(settings.max_attempts, 1)
+        for attempt in range(attempts):
+            self._count("attempts")
+            try:
+                text = self._attempt(send, size, hedge and settings.hedge_requests)
+            except Exception as exc:
+                if isinstance(exc, TranscriptionError) and not isinstance(exc, RetryableError):
+                    # The service answered, so it is reachable; the request itself was refused.
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                delay = self._retry_delay(exc, attempt)
+                if attempt + 1 == attempts or delay is None:
+                    raise RetryableError(f"Transcription failed after {attempt + 1} attempt(s): {exc}") from exc
+                if not self.breaker.allow():
+                    raise CircuitOpenError(f"The transcription service is unavailable: {exc}") from exc
+                logger.warning("Transcription attempt %d failed (%s); retrying in %.1fs", attempt + 1, exc, delay)
+                self._count("retries")
+                self._sleep(delay)
+                continue
+            self.breaker.record_success()
+            return text
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            counts: Dict[str, float] = dict(self._counts)
+        counts["hedge_rate"] = counts["hedged"] / counts["attempts"] if counts["attempts"] else 0.0
+        counts["circuit_opened"] = self.breaker.opened
+        return counts
+
+    def close(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            # A losing hedge may still be in flight; nobody waits for it.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[name] += amount
+
+    def _retry_delay(self, exc: BaseException, attempt: int) -> Optional[float]:
+        retry_after = getattr(exc, "retry_after", None)
+        if retry_after is not None:
+            if retry_after > MAX_RETRY_AFTER:
+                logger.warning("Server asked to retry after %.0fs; giving up for now", retry_after)
+                return None
+            return retry_after
+        backoff = min(BACKOFF_INITIAL * 2**attempt, BACKOFF_MAX)
+        return backoff * random.uniform(0.5, 1.0)
+
+    def _attempt(self, send: Callable[[], str], size: int, hedge: bool) -> str:
+        delay = self._hedge_delay(size) if hedge else None
+        if delay is None:
+            return self._timed(send, size)
+        primary = self._submit(send, size)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        with self._lock:
+            over_budget = self._counts["hedged"] >= HEDGE_BUDGET * self._counts["attempts"]
+        if over_budget:
+            return primary.result()
+        self._count("hedged")
+        logger.info("Transcription slower than %.1fs; sending a hedged request", delay)
+        backup = self._submit(send, size)
+        pending = {primary, backup}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    if future is backup:
+                        self._count("hedge_wins")
+                    return future.result()
+        assert error is not None
+        raise error
+
+    def _hedge_delay(self, size: int) -> Optional[float]:
+        threshold = self.latency.threshold(self._settings.hedge_percentile, size)
+        if threshold is None:
+            return None
+        return max(threshold, self._settings.hedge_min_delay_ms / 1000)
+
+    def _timed(self, send: Callable[[], str], size: int) -> str:
+        start = self._clock()
+        text = send()
+        # Losing hedges are timed too, so hedging does not hide the slow tail it reacts to.
+        self.latency.observe(self._clock() - start, size)
+        return text
+
+    def _submit(self, send: Callable[[], str], size: int) -> Future:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="getdict-request")
+            executor = self._executor
+        return executor.submit(self._timed, send, size)
+
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import threading
+from typing import Iterator, Optional
+
+import numpy as np
+
+
+class RingBuffer:
+    """Fixed-capacity single-producer/single-consumer buffer of audio frames.
+
+    The producer (the PortAudio callback) copies whole blocks into preallocated
+    storage without allocating; the consumer is woken through an event and reads
+    the stored frames back as views. Blocks that do not fit are dropped and
+    counted as overruns instead of growing memory.
+
+    In overwrite mode there is no consumer: the producer keeps only the most
+    recent ``capacity`` frames by discarding the oldest ones, so that a capture
+    can later begin with a pre-roll of audio recorded before it started.
+    """
+
+    def __init__(self, capacity: int, channels: int, dtype: str | np.dtype) -> None:
+        if capacity <= 0:
+            raise ValueError("Ring buffer capacity must be positive")
+        self._data = np.zeros((capacity, channels), dtype=dtype)
+        self._capacity = capacity
+        # Monotonic frame counters. Outside overwrite mode each is only ever advanced
+        # by one side; in overwrite mode the producer also advances ``_read``, so
+        # switching modes happens under ``_lock``.
+        self._written = 0
+        self._read = 0
+        self._end: Optional[int] = None
+        self._overwrite = False
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+        self._closed = False
+        self.overruns = 0
+        self.dropped_frames = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def channels(self) -> int:
+        return self._data.shape[1]
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._data.dtype
+
+    @property
+    def available(self) -> int:
+        return self._limit() - self._read
+
+    def reset(self) -> None:
+        """Empties the buffer; only call while neither side is running."""
+        self._written = 0
+        self._read = 0
+        self._end = None
+        self._overwrite = False
+        self._closed = False
+        self._event.clear()
+        self.overruns = 0
+        self.dropped_frames = 0
+
+    def overwrite(self) -> None:
+        """Switches to overwrite mode; call once the consumer has finished."""
+        with self._lock:
+            self._overwrite = True
+
+    def begin_capture(self, preroll: int) -> None:
+        """Leaves overwrite mode, keeping at most ``preroll`` of the latest frames for the consumer."""
+        with self._lock:
+            self._read = max(self._read, self._written - max(preroll, 0))
+            self._overwrite = False
+            self._end = None
+            self._closed = False
+            self.overruns = 0
+            self.dropped_frames = 0
+
+    def write(self, block: np.ndarray) -> bool:
+        if self._overwrite:
+            with self._lock:
+                if self._overwrite:
+                    block = block[-self._capacity :]
+                    excess = len(block) - (self._capacity - (self._written - self._read))
+                    if excess > 0:
+                        self._read += excess
+                    self._store(block)
+                    return True
+        frames = len(block)
+        if frames > self._capacity - (self._written - self._read):
+            self.overruns += 1
+            self.dropped_frames += frames
+            self._event.set()
+            return False
+        self._store(block)
+        self._event.set()
+        return True
+
+    def _store(self, block: np.ndarray) -> None:
+        frames = len(block)
+        start = self._written % self._capacity
+        first = min(frames, self._capacity - start)
+        self._data[start : start + first] = block[:first]
+        if first < frames:
+            self._data[: frames - first] = block[first:]
+        self._written += frames
+
+    def close(self) -> None:
+        """Tells the consumer that the capture ends with the frames written so far.
+
+        The producer may keep writing afterwards, e.g. a warm stream that stays open;
+        those frames are left for the next capture's pre-roll.
+        """
+        self._end = self._written
+        self._closed = True
+        self._event.set()
+
+    def _limit(self) -> int:
+        end = self._end
+        return self._written if end is None else end
+
+    def wait(self) -> bool:
+        """Blocks until frames are available; returns ``False`` once closed and drained."""
+        while True:
+            self._event.clear()
+            if self._limit() != self._read:
+                return True
+            if self._closed:
+                return False
+            self._event.wait()
+
+    def drain(self) -> Iterator[np.ndarray]:
+        """Yields the available frames as at most two contiguous views.
+
+        Each view is released back to the producer when the consumer asks for the
+        next one, so it must be processed (or copied) before iterating further.
+        """
+        available = self._limit() - self._read
+        while available:
+            start = self._read % self._capacity
+            frames = min(available, self._capacity - start)
+            yield self._data[start : start + frames]
+            self._read += frames
+            available -= frames
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import logging
+from concurrent.futures import Executor, Future, wait
+from typing import TYPE_CHECKING, List
+
+from .models import RecordingResult, TranscriptionRequest, TranscriptionResult
+
+if TYPE_CHECKING:
+    from .transcription import TranscriptionClient
+
+logger = logging.getLogger(__name__)
+
+
+def discard_recording(recording: RecordingResult) -> None:
+    if recording.path is None:
+        return
+    try:
+        recording.path.unlink(missing_ok=True)
+    except Exception:  # pragma: no cover
+        logger.debug("Unable to delete temporary audio file %s", recording.path)
+
+
+def join_segments(texts: List[str]) -> str:
+    return " ".join(part for part in (text.strip() for text in texts) if part)
+
+
+class SegmentedTranscription:
+    """Transcribes the segments of one recording in the background.
+
+    Segments are submitted as soon as the recorder finishes them and the texts are
+    joined in capture order once the final segment has been transcribed. The audio
+    is kept until :meth:`discard` so a failed recording can still be spooled.
+    """
+
+    def __init__(self, client: TranscriptionClient, executor: Executor) -> None:
+        self._client = client
+        self._executor = executor
+        self._futures: List[Future[TranscriptionResult]] = []
+        self.recordings: List[RecordingResult] = []
+
+    @property
+    def segment_count(self) -> int:
+        return len(self._futures)
+
+    def submit(self, recording: RecordingResult) -> None:
+        logger.debug("Queueing segment %d for transcription", recording.index)
+        self.recordings.append(recording)
+        self._futures.append(self._executor.submit(self._transcribe, recording))
+
+    def result(self) -> TranscriptionResult:
+        wait(self._futures)
+        results = [future.result() for future in self._futures]
+        return TranscriptionResult(
+            text=join_segments([result.text for result in results]),
+            duration_seconds=sum(result.duration_seconds for result in results),
+            # The last segment is the one the user waits for after release.
+            started_at=results[-1].started_at if results else 0.0,
+            finished_at=max((result.finished_at for result in results), default=0.0),
+        )
+
+    def discard(self) -> None:
+        for recording in self.recordings:
+            discard_recording(recording)
+        self.recordings = []
+
+    def _transcribe(self, recording: RecordingResult) -> TranscriptionResult:
+        return self._client.transcribe(TranscriptionRequest.from_recording(recording))
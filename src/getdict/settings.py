@@ -3,7 +3,7 @@ from __future__ import annotations
 import json
 from dataclasses import asdict, dataclass, field
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from platformdirs import user_config_path
 
@@ -18,8 +18,28 @@ CONFIG_FILE_NAME = "settings.json"
 class AudioSettings:
     sample_rate: int = 16000
     channels: int = 1
-    dtype: str = "float32"
+    dtype: str = "int16"
     block_size: int = 1024
+    buffer_seconds: float = 10.0
+    in_memory: bool = True
+    segment_on_pause: bool = True
+    segment_min_seconds: float = 4.0
+    segment_pause_ms: int = 600
+    vad_enabled: bool = True
+    vad_energy_threshold: float = 0.01
+    vad_zero_crossing: bool = False
+    vad_zcr_threshold: float = 0.3
+    vad_frame_ms: int = 30
+    vad_padding_ms: int = 250
+    vad_min_speech_ms: int = 120
+    warm_stream: bool = False
+    preroll_ms: int = 300
+    native_format: bool = True
+    max_capture_channels: int = 2
+    codec: str = "flac"
+    flac_level: int = 5
+    opus_bitrate_kbps: int = 24
+    auto_opus_below_kbps: int = 256
 
 
 @dataclass
@@ -29,6 +49,47 @@ class TranscriptionSettings:
     language: str | None = None
     temperature: float = 0.0
     api_base_url: str | None = None
+    local_model: str = "base"
+    local_device: str = "auto"
+    local_compute_type: str = "default"
+    local_in_process: bool = False
+    stub_text: str | None = None
+    vocabulary_path: str | None = None
+    max_attempts: int = 3
+    hedge_requests: bool = True
+    hedge_percentile: float = 0.95
+    hedge_min_delay_ms: int = 1000
+    breaker_failures: int = 5
+    breaker_reset_seconds: float = 30.0
+
+
+@dataclass
+class PipelineSettings:
+    workers: int = 2
+    max_pending_jobs: int = 4
+    spool_concurrency: int = 2
+
+
+@dataclass
+class InsertionSettings:
+    type_max_chars: int = 16
+    clipboard_timeout_ms: int = 500
+    restore_delay_ms: int = 100
+    min_restore_delay_ms: int = 100
+    max_restore_delay_ms: int = 500
+
+
+@dataclass
+class DaemonSettings:
+    socket_path: str | None = None
+    serve: bool = True
+
+
+@dataclass
+class HistorySettings:
+    enabled: bool = True
+    retention_days: int = 90
+    max_entries: int = 10000
 
 
 @dataclass
@@ -41,8 +102,14 @@ class UISettings:
 class Settings:
     api_key: str | None = None
     hotkey: Hotkey = field(default_factory=lambda: Hotkey(modifier="ctrl+alt", key="space"))
+    toggle_hotkey: Optional[Hotkey] = None
+    cancel_hotkey: Optional[Hotkey] = None
     audio: AudioSettings = field(default_factory=AudioSettings)
     transcription: TranscriptionSettings = field(default_factory=TranscriptionSettings)
+    pipeline: PipelineSettings = field(default_factory=PipelineSettings)
+    insertion: InsertionSettings = field(default_factory=InsertionSettings)
+    daemon: DaemonSettings = field(default_factory=DaemonSettings)
+    history: HistorySettings = field(default_factory=HistorySettings)
     ui: UISettings = field(default_factory=UISettings)
 
     @classmethod
@@ -59,14 +126,26 @@ class Settings:
     def _from_dict(cls, data: Dict[str, Any]) -> "Settings":
         hotkey_data = data.get("hotkey", {})
         hotkey = Hotkey(**hotkey_data)
+        toggle_data = data.get("toggle_hotkey")
+        cancel_data = data.get("cancel_hotkey")
         audio = AudioSettings(**data.get("audio", {}))
         transcription = TranscriptionSettings(**data.get("transcription", {}))
+        pipeline = PipelineSettings(**data.get("pipeline", {}))
+        insertion = InsertionSettings(**data.get("insertion", {}))
+        daemon = DaemonSettings(**data.get("daemon", {}))
+        history = HistorySettings(**data.get("history", {}))
         ui = UISettings(**data.get("ui", {}))
         return cls(
             api_key=data.get("api_key"),
             hotkey=hotkey,
+            toggle_hotkey=Hotkey(**toggle_data) if toggle_data else None,
+            cancel_hotkey=Hotkey(**cancel_data) if cancel_data else None,
             audio=audio,
             transcription=transcription,
+            pipeline=pipeline,
+            insertion=insertion,
+            daemon=daemon,
+            history=history,
             ui=ui,
         )
 
@@ -81,9 +160,17 @@ class Settings:
         data["hotkey"] = asdict(self.hotkey)
         data["audio"] = asdict(self.audio)
         data["transcription"] = asdict(self.transcription)
+        data["pipeline"] = asdict(self.pipeline)
+        data["insertion"] = asdict(self.insertion)
+        data["daemon"] = asdict(self.daemon)
+        data["history"] = asdict(self.history)
         data["ui"] = asdict(self.ui)
         return data
 
+    @classmethod
+    def config_dir(cls) -> Path:
+        return cls._config_path().parent
+
     @staticmethod
     def _config_path() -> Path:
         return user_config_path(CONFIG_DIR_NAME) / CONFIG_FILE_NAME
@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+
+from .models import CircuitOpenError, RecordingResult, RetryableError, TranscriptionError, TranscriptionRequest
+from .segments import join_segments
+
+if TYPE_CHECKING:
+    from .transcription import TranscriptionClient
+
+logger = logging.getLogger(__name__)
+
+SPOOL_DIR_NAME = "spool"
+INITIAL_BACKOFF = 5.0
+MAX_BACKOFF = 300.0
+# Failed replays after which an entry is set aside, once other entries show the service works.
+MAX_ATTEMPTS = 5
+
+
+@dataclass
+class SpoolEntry:
+    entry_id: str
+    blobs: List[str]
+    created: float
+    reason: str = ""
+    attempts: int = 0
+
+
+@dataclass
+class SpooledResult:
+    result_id: str
+    text: str
+    created: float
+    recorded: float = 0.0
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    with tmp.open("wb") as fh:
+        fh.write(data)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+class Spool:
+    """Durable, content-addressed store for recordings that could not be transcribed.
+
+    Audio is stored once per SHA-256 digest under ``blobs/``; each deferred dictation
+    is a small JSON manifest under ``entries/`` listing its segments in capture order.
+    Replayed transcripts wait under ``results/`` until they are picked up. Entries
+    that cannot be transcribed are moved, with a copy of their audio, to
+    ``failed/<entry id>/``.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self._directory = directory
+        self._blobs = directory / "blobs"
+        self._entries = directory / "entries"
+        self._results = directory / "results"
+        self._failed = directory / "failed"
+        self._lock = threading.Lock()
+        for path in (self._blobs, self._entries, self._results):
+            path.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    def put(self, recordings: List[RecordingResult], reason: str = "") -> SpoolEntry:
+        with self._lock:
+            entry = self._put(recordings, reason)
+        logger.info("Spooled dictation %s (%d segments): %s", entry.entry_id[:12], len(entry.blobs), reason)
+        return entry
+
+    def _put(self, recordings: List[RecordingResult], reason: str) -> SpoolEntry:
+        blobs = []
+        for recording in recordings:
+            if recording.data is not None:
+                data = bytes(recording.data)
+                suffix = recording.codec.suffix
+            elif recording.path is not None:
+                data = recording.path.read_bytes()
+                suffix = recording.path.suffix
+            else:
+                continue
+            name = hashlib.sha256(data).hexdigest() + suffix
+            blob = self._blobs / name
+            if not blob.exists():
+                _write_atomic(blob, data)
+            blobs.append(name)
+        entry_id = hashlib.sha256("\n".join(blobs).encode()).hexdigest()
+        entry = SpoolEntry(entry_id=entry_id, blobs=blobs, created=time.time(), reason=reason)
+        self._write_entry(entry)
+        return entry
+
+    def entries(self) -> List[SpoolEntry]:
+        entries = []
+        for path in self._entries.glob("*.json"):
+            try:
+                entries.append(SpoolEntry(**json.loads(path.read_text(encoding="utf-8"))))
+            except (OSError, ValueError, TypeError) as exc:
+                logger.warning("Ignoring unreadable spool entry %s: %s", path.name, exc)
+        return sorted(entries, key=lambda entry: entry.created)
+
+    def requests(self, entry: SpoolEntry) -> List[TranscriptionRequest]:
+        return [TranscriptionRequest(audio_path=self._blobs / name, filename=name) for name in entry.blobs]
+
+    def record_attempt(self, entry: SpoolEntry) -> None:
+        entry.attempts += 1
+        with self._lock:
+            if (self._entries / f"{entry.entry_id}.json").exists():
+                self._write_entry(entry)
+
+    def complete(self, entry: SpoolEntry, text: str) -> SpooledResult:
+        """Stores the replayed transcript and releases the entry's audio."""
+        result = SpooledResult(result_id=entry.entry_id, text=text, created=time.time(), recorded=entry.created)
+        with self._lock:
+            _write_atomic(self._results / f"{result.result_id}.json", json.dumps(asdict(result)).encode("utf-8"))
+            (self._entries / f"{entry.entry_id}.json").unlink(missing_ok=True)
+            self._collect_blobs()
+        return result
+
+    def quarantine(self, entry: SpoolEntry, reason: str) -> Path:
+        """Moves an entry that keeps failing out of the replay queue; returns the directory it was moved to."""
+        target = self._failed / entry.entry_id
+        entry.reason = reason
+        with self._lock:
+            target.mkdir(parents=True, exist_ok=True)
+            for name in entry.blobs:
+                blob = self._blobs / name
+                if blob.exists():
+                    # Blobs are shared between entries, so the live one stays until it is unreferenced.
+                    shutil.copy2(blob, target / name)
+            _write_atomic(target / "entry.json", json.dumps(asdict(entry)).encode("utf-8"))
+            (self._entries / f"{entry.entry_id}.json").unlink(missing_ok=True)
+            self._collect_blobs()
+        logger.warning("Set aside spooled dictation %s after %d attempts: %s", entry.entry_id[:12], entry.attempts, reason)
+        return target
+
+    def results(self) -> List[SpooledResult]:
+        results = []
+        for path in self._results.glob("*.json"):
+            try:
+                results.append(SpooledResult(**json.loads(path.read_text(encoding="utf-8"))))
+            except (OSError, ValueError, TypeError) as exc:
+                logger.warning("Ignoring unreadable spool result %s: %s", path.name, exc)
+        return sorted(results, key=lambda result: result.recorded)
+
+    def dismiss(self, result_id: str) -> None:
+        (self._results / f"{result_id}.json").unlink(missing_ok=True)
+
+    def _write_entry(self, entry: SpoolEntry) -> None:
+        _write_atomic(self._entries / f"{entry.entry_id}.json", json.dumps(asdict(entry)).encode("utf-8"))
+
+    def _collect_blobs(self) -> None:
+        referenced = {name for entry in self.entries() for name in entry.blobs}
+        for blob in self._blobs.iterdir():
+            if blob.name not in referenced and not blob.name.startswith("."):
+                blob.unlink(missing_ok=True)
+
+
+def _is_permanent(error: BaseException) -> bool:
+    """Whether ``error`` is about the entry itself (bad or missing audio, a rejected request) rather than an outage."""
+    if isinstance(error, OSError):
+        return True
+    return isinstance(error, TranscriptionError) and not isinstance(error, (RetryableError, CircuitOpenError))
+
+
+class SpoolDrainer:
+    """Replays spooled dictations once the transcription backend recovers.
+
+    Entries are probed oldest first, with exponential backoff while the service
+    looks unavailable; once one succeeds the rest are replayed ``concurrency`` at
+    a time. An entry refused for reasons of its own does not hold back the ones
+    behind it: the next entry is probed instead. Once the service is known to
+    work, because another entry or a live dictation succeeded, entries that were
+    refused, or that failed ``MAX_ATTEMPTS`` times, are quarantined and
+    ``on_failed`` is called with the entry and its new location. ``postprocess``
+    is applied to each replayed transcript before it is stored.
+    """
+
+    def __init__(
+        self,
+        spool: Spool,
+        client: Callable[[], TranscriptionClient],
+        on_result: Callable[[SpooledResult], None],
+        concurrency: int = 2,
+        on_failed: Optional[Callable[[SpoolEntry, Path], None]] = None,
+        postprocess: Optional[Callable[[str], str]] = None,
+    ) -> None:
+        self._spool = spool
+        self._client = client
+        self._on_result = on_result
+        self._on_failed = on_failed
+        self._postprocess = postprocess
+        self._concurrency = max(concurrency, 1)
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._reachable = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="getdict-spool", daemon=True)
+        self._thread.start()
+
+    def wake(self, reachable: bool = False) -> None:
+        """Retries immediately, e.g. after a new entry or, with ``reachable``, a successful live transcription."""
+        if reachable:
+            self._reachable = True
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+
+    def _run(self) -> None:
+        backoff = INITIAL_BACKOFF
+        while not self._stopped.is_set():
+            self._wake.clear()
+            entries = self._spool.entries()
+            if not entries:
+                self._wake.wait()
+                continue
+            if not self._client().is_configured:
+                self._wake.wait(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF)
+                continue
+            reachable, self._reachable = self._reachable, False
+            failures: List[Tuple[SpoolEntry, BaseException]] = []
+            succeeded = False
+            while entries and not self._stopped.is_set():
+                entry = entries.pop(0)
+                error = self._replay(entry)
+                if error is None:
+                    succeeded = True
+                    break
+                failures.append((entry, error))
+                if not _is_permanent(error):
+                    break
+            if succeeded:
+                backoff = INITIAL_BACKOFF
+                with ThreadPoolExecutor(max_workers=self._concurrency, thread_name_prefix="getdict-replay") as executor:
+                    errors = list(executor.map(self._replay, entries))
+                failures.extend((entry, error) for entry, error in zip(entries, errors) if error is not None)
+            quarantined = 0
+            if (succeeded or reachable) and not self._stopped.is_set():
+                for entry, error in failures:
+                    if _is_permanent(error) or entry.attempts >= MAX_ATTEMPTS:
+                        self._quarantine(entry, error)
+                        quarantined += 1
+            if succeeded or (failures and quarantined == len(failures)):
+                continue
+            self._wake.wait(backoff)
+            backoff = min(backoff * 2, MAX_BACKOFF)
+
+    def _replay(self, entry: SpoolEntry) -> Optional[BaseException]:
+        """Transcribes ``entry``; returns the error if that failed."""
+        if self._stopped.is_set():
+            return CircuitOpenError("Stopped")
+        client = self._client()
+        try:
+            texts = [client.transcribe(request).text for request in self._spool.requests(entry)]
+        except Exception as exc:
+            logger.info("Replay of spooled dictation %s failed: %s", entry.entry_id[:12], exc)
+            if not isinstance(exc, CircuitOpenError):
+                self._spool.record_attempt(entry)
+            return exc
+        text = join_segments(texts)
+        if self._postprocess is not None:
+            text = self._postprocess(text)
+        result = self._spool.complete(entry, text)
+        logger.info("Replayed spooled dictation %s", entry.entry_id[:12])
+        self._on_result(result)
+        return None
+
+    def _quarantine(self, entry: SpoolEntry, error: BaseException) -> None:
+        try:
+            target = self._spool.quarantine(entry, str(error))
+        except OSError as exc:
+            logger.exception("Unable to set aside spooled dictation %s: %s", entry.entry_id[:12], exc)
+            return
+        if self._on_failed is not None:
+            self._on_failed(entry, target)
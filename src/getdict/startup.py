@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import builtins
+import importlib.util
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+
+class StartupProfiler:
+    """Records startup phase and first-import timings for ``--startup-profile``.
+
+    When disabled every method is a cheap no-op, so call sites need no checks.
+    Import timings come from wrapping ``builtins.__import__`` and are split into
+    self time (excluding nested imports) and cumulative time, per thread.
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._phases: List[Tuple[str, float, float, str]] = []
+        self._imports: Dict[str, Tuple[float, float]] = {}
+        self._stacks = threading.local()
+        self._original_import: Optional[Any] = None
+        self._reported = False
+
+    def install(self) -> None:
+        if not self.enabled or self._original_import is not None:
+            return
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def uninstall(self) -> None:
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self._phases.append((name, started - self._origin, finished - started, threading.current_thread().name))
+
+    def mark(self, name: str) -> None:
+        """Records a milestone, e.g. the tray becoming visible."""
+        if self.enabled:
+            with self._lock:
+                self._phases.append((name, time.perf_counter() - self._origin, 0.0, threading.current_thread().name))
+
+    def report(self, stream: Optional[TextIO] = None, top: int = 20) -> None:
+        """Prints the timings once and stops recording imports."""
+        if not self.enabled or self._reported:
+            return
+        self._reported = True
+        self.uninstall()
+        stream = stream or sys.stderr
+        with self._lock:
+            phases = sorted(self._phases, key=lambda phase: phase[1])
+            imports = sorted(self._imports.items(), key=lambda item: item[1][0], reverse=True)
+        print("Startup phases (ms since launch):", file=stream)
+        for name, offset, duration, thread in phases:
+            took = f"{duration * 1000:8.1f} ms" if duration else " " * 11
+            print(f"  {offset * 1000:8.1f}  {took}  {name} [{thread}]", file=stream)
+        print(f"Slowest first imports (top {top}, self / cumulative ms):", file=stream)
+        for module, (own, cumulative) in imports[:top]:
+            print(f"  {own * 1000:8.1f} {cumulative * 1000:8.1f}  {module}", file=stream)
+
+    def _timed_import(self, name: str, globals: Any = None, locals: Any = None, fromlist: Any = (), level: int = 0) -> Any:
+        # May still be entered on another thread just after uninstall().
+        original = self._original_import or builtins.__import__
+        try:
+            resolved = importlib.util.resolve_name("." * level + name, (globals or {}).get("__package__")) if level else name
+        except (ImportError, ValueError):
+            resolved = name
+        if resolved in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+        stack: List[float] = getattr(self._stacks, "children", None) or []
+        self._stacks.children = stack
+        stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            cumulative = time.perf_counter() - started
+            nested = stack.pop()
+            if stack:
+                stack[-1] += cumulative
+            with self._lock:
+                self._imports.setdefault(resolved, (cumulative - nested, cumulative))
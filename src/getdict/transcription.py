@@ -2,62 +2,70 @@ from __future__ import annotations
 
 import logging
 import time
-from typing import Optional
-
-from openai import OpenAI, OpenAIError
-from tenacity import RetryError, retry, stop_after_attempt, wait_exponential
+from typing import Dict, Optional
 
+from .backends import TranscriptionBackend, create_backend
+from .encoding import UplinkEstimator
 from .models import TranscriptionError, TranscriptionRequest, TranscriptionResult
+from .resilience import ResilientCaller
 from .settings import Settings
 
 logger = logging.getLogger(__name__)
 
 
 class TranscriptionClient:
-    def __init__(self, settings: Settings) -> None:
+    def __init__(self, settings: Settings, uplink: Optional[UplinkEstimator] = None) -> None:
         self._settings = settings
-        self._client = self._create_client()
+        self._uplink = uplink
+        self._backend = create_backend(settings)
+        self._backend_key = self._backend.connection_key(settings)
+        self._caller = ResilientCaller(settings.transcription)
 
     @property
-    def is_configured(self) -> bool:
-        return self._client is not None
+    def backend(self) -> TranscriptionBackend:
+        return self._backend
 
-    def _create_client(self) -> Optional[OpenAI]:
-        if not self._settings.api_key:
-            logger.warning("No API key configured; transcription will be disabled")
-            return None
-        kwargs = {"api_key": self._settings.api_key}
-        if self._settings.transcription.api_base_url:
-            kwargs["base_url"] = self._settings.transcription.api_base_url
-        return OpenAI(**kwargs)
+    @property
+    def is_configured(self) -> bool:
+        return self._backend.is_configured
 
     def transcribe(self, request: TranscriptionRequest) -> TranscriptionResult:
-        if self._client is None:
+        if not self._backend.is_configured:
             raise TranscriptionError("Transcription client is not configured")
         start = time.monotonic()
-        try:
-            text = self._transcribe_with_retry(request)
-        except RetryError as exc:
-            raise TranscriptionError("Transcription failed after retries") from exc
-        duration = time.monotonic() - start
-        return TranscriptionResult(text=text, duration_seconds=duration)
-
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=8))
-    def _transcribe_with_retry(self, request: TranscriptionRequest) -> str:
-        assert self._client is not None
-        logger.info("Submitting transcription request for %s", request.audio_path)
-        try:
-            with open(request.audio_path, "rb") as fh:
-                response = self._client.audio.transcriptions.create(
-                    model=self._settings.transcription.model,
-                    file=fh,
-                    temperature=self._settings.transcription.temperature,
-                    language=self._settings.transcription.language,
-                    prompt=request.prompt,
-                    response_format="text",
-                )
-        except OpenAIError as exc:
-            logger.exception("OpenAI transcription error: %s", exc)
-            raise
-        logger.debug("Transcription response received: %s", response)
-        return getattr(response, "text", str(response))
+        logger.info("Submitting transcription request for %s", request.describe())
+        backend = self._backend
+        # Hedging only pays off when requests can run side by side on a remote service.
+        text = self._caller.call(lambda: backend.transcribe(request), size=request.size, hedge=backend.remote)
+        finished = time.monotonic()
+        if self._uplink is not None and self._backend.remote:
+            self._uplink.observe(request.size, finished - start)
+        return TranscriptionResult(
+            text=text,
+            duration_seconds=finished - start,
+            started_at=start,
+            finished_at=finished,
+        )
+
+    def stats(self) -> Dict[str, float]:
+        """Request, retry and hedge counters since the client was created."""
+        return self._caller.stats()
+
+    def warm_up(self) -> None:
+        """Prepares the backend for an upload that is about to happen, without blocking."""
+        self._backend.warm_up()
+
+    def reconfigure(self) -> None:
+        """Applies changed settings, keeping the backend (and its connections) when possible."""
+        key = type(self._backend).connection_key(self._settings)
+        if key == self._backend_key:
+            return
+        logger.info("Transcription endpoint changed; recreating backend")
+        backend = create_backend(self._settings)
+        self._backend.close()
+        self._backend = backend
+        self._backend_key = backend.connection_key(self._settings)
+
+    def close(self) -> None:
+        self._caller.close()
+        self._backend.close()
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import time
+from typing import Callable, List, Optional
+
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtWidgets import (
+    QDialog,
+    QDialogButtonBox,
+    QLabel,
+    QLineEdit,
+    QListWidget,
+    QListWidgetItem,
+    QVBoxLayout,
+    QWidget,
+)
+
+from ..history import HistoryEntry
+
+# Searches run once typing pauses for this long.
+SEARCH_DELAY_MS = 150
+PREVIEW_CHARS = 100
+
+
+class HistoryDialog(QDialog):
+    """Searches past transcripts; the chosen one is re-inserted or copied once the dialog closes."""
+
+    def __init__(self, search: Callable[[str], List[HistoryEntry]], parent: QWidget | None = None) -> None:
+        super().__init__(parent)
+        self.setWindowTitle("GetDict History")
+        self.resize(560, 420)
+        self._search = search
+        # Set when the dialog is accepted: "insert" or "copy".
+        self.action: Optional[str] = None
+
+        self._query = QLineEdit(self)
+        self._query.setPlaceholderText("Search transcripts")
+        self._query.setClearButtonEnabled(True)
+        self._results = QListWidget(self)
+        self._results.setWordWrap(True)
+        self._details = QLabel(self)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(SEARCH_DELAY_MS)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Close, self)
+        self._insert_button = buttons.addButton("Insert", QDialogButtonBox.ButtonRole.AcceptRole)
+        self._copy_button = buttons.addButton("Copy", QDialogButtonBox.ButtonRole.ActionRole)
+        self._insert_button.setDefault(True)
+        self._insert_button.clicked.connect(lambda: self._choose("insert"))
+        self._copy_button.clicked.connect(lambda: self._choose("copy"))
+        buttons.rejected.connect(self.reject)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self._query)
+        layout.addWidget(self._results)
+        layout.addWidget(self._details)
+        layout.addWidget(buttons)
+
+        self._query.textChanged.connect(lambda _text: self._timer.start())
+        self._query.returnPressed.connect(lambda: self._choose("insert"))
+        self._timer.timeout.connect(self._refresh)
+        self._results.currentItemChanged.connect(lambda _current, _previous: self._show_details())
+        self._results.itemActivated.connect(lambda _item: self._choose("insert"))
+        self._refresh()
+
+    @property
+    def selected(self) -> Optional[HistoryEntry]:
+        item = self._results.currentItem()
+        return item.data(Qt.ItemDataRole.UserRole) if item is not None else None
+
+    def _refresh(self) -> None:
+        self._results.clear()
+        for entry in self._search(self._query.text()):
+            preview = " ".join(entry.text.split()) or "(No text recognised)"
+            if len(preview) > PREVIEW_CHARS:
+                preview = preview[: PREVIEW_CHARS - 1] + "…"
+            item = QListWidgetItem(f"{time.strftime('%d %b %H:%M', time.localtime(entry.created))}  {preview}")
+            item.setToolTip(entry.text)
+            item.setData(Qt.ItemDataRole.UserRole, entry)
+            self._results.addItem(item)
+        if self._results.count():
+            self._results.setCurrentRow(0)
+        self._show_details()
+
+    def _show_details(self) -> None:
+        entry = self.selected
+        self._insert_button.setEnabled(entry is not None)
+        self._copy_button.setEnabled(entry is not None)
+        if entry is None:
+            self._details.setText("No matching transcripts." if self._query.text().strip() else "No transcripts yet.")
+            return
+        details = [time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry.created)), entry.source]
+        if entry.audio_seconds:
+            details.append(f"{entry.audio_seconds:.1f} s of audio")
+        if entry.release_to_paste is not None:
+            details.append(f"pasted {entry.release_to_paste * 1000:.0f} ms after release")
+        self._details.setText(" · ".join(details))
+
+    def _choose(self, action: str) -> None:
+        if self.selected is not None:
+            self.action = action
+            self.accept()
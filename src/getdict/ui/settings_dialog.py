@@ -3,6 +3,7 @@ from __future__ import annotations
 from PySide6.QtCore import Qt
 from PySide6.QtWidgets import (
     QCheckBox,
+    QComboBox,
     QDialog,
     QDialogButtonBox,
     QFormLayout,
@@ -14,6 +15,20 @@ from PySide6.QtWidgets import (
 from ..models import Hotkey
 from ..settings import Settings
 
+CODECS = (
+    ("flac", "FLAC (lossless)"),
+    ("opus", "Opus (smallest upload)"),
+    ("wav", "WAV (no compression)"),
+    ("auto", "Auto (by upload speed)"),
+)
+
+
+def _parse_hotkey(text: str) -> Hotkey | None:
+    if not text:
+        return None
+    parts = text.split("+")
+    return Hotkey(modifier="+".join(parts[:-1]), key=parts[-1])
+
 
 class SettingsDialog(QDialog):
     def __init__(self, settings: Settings, parent: QWidget | None = None) -> None:
@@ -33,13 +48,36 @@ class SettingsDialog(QDialog):
         self._hotkey = QLineEdit(self)
         self._hotkey.setText(str(settings.hotkey))
 
+        self._toggle_hotkey = QLineEdit(self)
+        self._toggle_hotkey.setPlaceholderText("Disabled")
+        if settings.toggle_hotkey:
+            self._toggle_hotkey.setText(str(settings.toggle_hotkey))
+
+        self._cancel_hotkey = QLineEdit(self)
+        self._cancel_hotkey.setPlaceholderText("Disabled, e.g. esc")
+        if settings.cancel_hotkey:
+            self._cancel_hotkey.setText(str(settings.cancel_hotkey))
+
         self._visualizer = QCheckBox("Show waveform visualizer", self)
         self._visualizer.setChecked(settings.ui.show_visualizer)
 
+        self._warm_stream = QCheckBox("Keep microphone open for instant start", self)
+        self._warm_stream.setChecked(settings.audio.warm_stream)
+
+        self._codec = QComboBox(self)
+        for value, label in CODECS:
+            self._codec.addItem(label, value)
+        index = self._codec.findData(settings.audio.codec.lower())
+        self._codec.setCurrentIndex(max(index, 0))
+
         layout = QFormLayout(self)
         layout.addRow("API Key", self._api_key)
         layout.addRow("Hotkey", self._hotkey)
+        layout.addRow("Toggle hotkey", self._toggle_hotkey)
+        layout.addRow("Cancel hotkey", self._cancel_hotkey)
+        layout.addRow("Upload codec", self._codec)
         layout.addRow("", self._visualizer)
+        layout.addRow("", self._warm_stream)
 
         self._buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
         self._buttons.accepted.connect(self.accept)
@@ -57,6 +95,10 @@ class SettingsDialog(QDialog):
         key = parts[-1]
         self._settings.api_key = api_key
         self._settings.hotkey = Hotkey(modifier=modifier, key=key)
+        self._settings.toggle_hotkey = _parse_hotkey(self._toggle_hotkey.text().strip())
+        self._settings.cancel_hotkey = _parse_hotkey(self._cancel_hotkey.text().strip())
         self._settings.ui.show_visualizer = self._visualizer.isChecked()
+        self._settings.audio.warm_stream = self._warm_stream.isChecked()
+        self._settings.audio.codec = self._codec.currentData()
         self._settings.save()
         super().accept()
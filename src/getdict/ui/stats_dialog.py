@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+from PySide6.QtWidgets import QDialog, QDialogButtonBox, QLabel, QTableWidget, QTableWidgetItem, QVBoxLayout, QWidget
+
+COLUMNS = ("count", "p50", "p95", "p99")
+
+
+class StatsDialog(QDialog):
+    """Shows rolling latency percentiles for each pipeline stage, and request counters."""
+
+    def __init__(
+        self,
+        summary: Dict[str, Dict[str, float]],
+        export_dir: str,
+        requests: Optional[Dict[str, float]] = None,
+        parent: QWidget | None = None,
+    ) -> None:
+        super().__init__(parent)
+        self.setWindowTitle("GetDict Stats")
+
+        table = QTableWidget(len(summary), len(COLUMNS), self)
+        table.setHorizontalHeaderLabels(["Count", "p50 (ms)", "p95 (ms)", "p99 (ms)"])
+        table.setVerticalHeaderLabels([name.replace("_", " ") for name in summary])
+        for row, values in enumerate(summary.values()):
+            for column, key in enumerate(COLUMNS):
+                value = values.get(key)
+                if value is None:
+                    text = "–"
+                elif key == "count":
+                    text = str(int(value))
+                else:
+                    text = f"{value * 1000:.0f}"
+                table.setItem(row, column, QTableWidgetItem(text))
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        table.resizeColumnsToContents()
+
+        layout = QVBoxLayout(self)
+        if summary:
+            layout.addWidget(table)
+        else:
+            layout.addWidget(QLabel("No dictations recorded yet.", self))
+        if requests and requests.get("requests"):
+            layout.addWidget(QLabel(_describe_requests(requests), self))
+        layout.addWidget(QLabel(f"Exported to {export_dir}", self))
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+
+def _describe_requests(requests: Dict[str, float]) -> str:
+    return (
+        f"{int(requests['requests'])} requests, {int(requests['retries'])} retried, "
+        f"{int(requests['hedged'])} hedged ({requests['hedge_rate']:.0%}, {int(requests['hedge_wins'])} won), "
+        f"{int(requests['rejected'])} failed fast while the service was down"
+    )
@@ -1,13 +1,14 @@
 from __future__ import annotations
 
 import logging
-from typing import Callable, Dict
+from typing import Callable, Dict, List
 
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QColor, QCursor, QIcon, QPainter, QPixmap
 from PySide6.QtWidgets import QMenu, QSystemTrayIcon
 
-from ..models import AppState
+from ..models import AppState, JobInfo
+from ..spool import SpooledResult
 
 logger = logging.getLogger(__name__)
 
@@ -27,7 +28,11 @@ class TrayController:
         on_stop: Callable[[], None],
         on_open_settings: Callable[[], None],
         on_quit: Callable[[], None],
+        on_pick_up: Callable[[SpooledResult], None],
+        on_show_stats: Callable[[], None],
+        on_show_history: Callable[[], None],
     ) -> None:
+        self._on_pick_up = on_pick_up
         self._tray = QSystemTrayIcon()
         self._menu = QMenu()
         self._tray.setContextMenu(self._menu)
@@ -36,7 +41,15 @@ class TrayController:
         self._start_action.triggered.connect(on_start)
         self._stop_action = self._menu.addAction("Stop Recording")
         self._stop_action.triggered.connect(on_stop)
+        self._jobs_menu = self._menu.addMenu("Jobs")
+        self._jobs_menu.setEnabled(False)
+        self._pickup_menu = self._menu.addMenu("Recovered")
+        self._pickup_menu.setEnabled(False)
         self._menu.addSeparator()
+        history_action = self._menu.addAction("History")
+        history_action.triggered.connect(on_show_history)
+        stats_action = self._menu.addAction("Stats")
+        stats_action.triggered.connect(on_show_stats)
         settings_action = self._menu.addAction("Settings")
         settings_action.triggered.connect(on_open_settings)
         quit_action = self._menu.addAction("Quit")
@@ -56,9 +69,32 @@ class TrayController:
             self._tray.setToolTip(tooltip)
         else:
             self._tray.setToolTip(f"GetDict - {state.value.title()}")
-        self._start_action.setEnabled(state in {AppState.IDLE, AppState.ERROR})
+        self._start_action.setEnabled(state != AppState.RECORDING)
         self._stop_action.setEnabled(state == AppState.RECORDING)
 
+    def update_jobs(self, jobs: List[JobInfo]) -> None:
+        self._jobs_menu.clear()
+        for job in reversed(jobs):
+            label = f"#{job.sequence} {job.status.value}"
+            if job.segments > 1:
+                label += f" ({job.segments} segments)"
+            self._jobs_menu.addAction(label).setEnabled(False)
+        depth = sum(1 for job in jobs if not job.status.is_finished)
+        self._jobs_menu.setTitle(f"Jobs ({depth} queued)" if depth else "Jobs")
+        self._jobs_menu.setEnabled(bool(jobs))
+
+    def update_pickups(self, results: List[SpooledResult]) -> None:
+        self._pickup_menu.clear()
+        for result in results:
+            preview = result.text.strip() or "(No text recognised)"
+            if len(preview) > 60:
+                preview = preview[:57] + "…"
+            action = self._pickup_menu.addAction(preview)
+            action.setToolTip(result.text)
+            action.triggered.connect(lambda _checked=False, result=result: self._on_pick_up(result))
+        self._pickup_menu.setTitle(f"Recovered ({len(results)})" if results else "Recovered")
+        self._pickup_menu.setEnabled(bool(results))
+
     def show_message(self, title: str, message: str, level: QSystemTrayIcon.MessageIcon = QSystemTrayIcon.MessageIcon.Information) -> None:
         logger.info("Tray message: %s - %s", title, message)
         self._tray.showMessage(title, message, level)
@@ -1,15 +1,32 @@
 from __future__ import annotations
 
 from collections import deque
-from typing import Deque
+from typing import Deque, List, Tuple
 
-from PySide6.QtCore import QTimer, Qt
-from PySide6.QtGui import QColor, QPainter, QPainterPath, QRadialGradient
+import numpy as np
+from pyqtgraph.functions import create_qpolygonf, ndarray_from_qpolygonf
+from PySide6.QtCore import QTimer, Qt, Signal
+from PySide6.QtGui import QBrush, QColor, QPainter, QPen, QPixmap, QPolygonF, QRadialGradient
 from PySide6.QtWidgets import QWidget
 
+from ..models import LevelFrame
+
+HISTORY = 60
+FRAME_INTERVAL_MS = 33
+LAYER_SPACING = 12
+LAYER_HEIGHT = 120
+
 
 class WaveformVisualizer(QWidget):
-    """Siri-style waveform visualizer with translucent background."""
+    """Siri-style waveform visualizer with translucent background.
+
+    Each layer follows one frequency band of the pushed :class:`LevelFrame`s, low
+    band outermost. Levels may be pushed from any thread. While active, a frame
+    timer rebuilds the outline only if new levels arrived since the last frame;
+    the background gradient is rendered once per size into a cached pixmap.
+    """
+
+    _active_changed = Signal(bool)
 
     def __init__(self, parent: QWidget | None = None) -> None:
         super().__init__(parent)
@@ -21,52 +38,102 @@ class WaveformVisualizer(QWidget):
             | Qt.WindowType.WindowStaysOnTopHint
             | Qt.WindowType.Tool
         )
-        self._amplitudes: Deque[float] = deque(maxlen=60)
+        self._levels: Deque[Tuple[float, ...]] = deque(maxlen=HISTORY)
+        self._dirty = False
+        self._background: QPixmap | None = None
+        self._polygons: List[QPolygonF] = []
         self._timer = QTimer(self)
-        self._timer.timeout.connect(self.update)
-        self._timer.start(33)
+        self._timer.setInterval(FRAME_INTERVAL_MS)
+        self._timer.timeout.connect(self._refresh)
+        self._active_changed.connect(self._apply_active)
         self.resize(1000, 400)
-        self._colors = [
+        colors = [
             QColor(203, 36, 128, 160),
             QColor(41, 200, 192, 160),
             QColor(24, 137, 218, 160),
         ]
+        self._brushes = [QBrush(color) for color in colors]
+        self._pens = [QPen(color.lighter(150)) for color in colors]
+        # Half-height of each layer, innermost last.
+        self._scales = np.array([LAYER_HEIGHT - (index + 1) * LAYER_SPACING for index in range(len(colors))], dtype=np.float64)
 
-    def push_amplitude(self, amplitude: float) -> None:
-        clamped = max(0.01, min(1.0, amplitude))
-        self._amplitudes.append(clamped)
+    def push_levels(self, frame: LevelFrame) -> None:
+        bands = frame.bands or (frame.rms,)
+        layers = len(self._scales)
+        self._levels.append(tuple(bands[min(index, len(bands) - 1)] for index in range(layers)))
+        self._dirty = True
 
-    def paintEvent(self, event) -> None:  # type: ignore[override]
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    def set_active(self, active: bool) -> None:
+        """Starts or stops frame updates; safe to call from any thread."""
+        self._active_changed.emit(active)
+
+    def _apply_active(self, active: bool) -> None:
+        if active:
+            self._timer.start()
+        else:
+            self._timer.stop()
+            self._refresh()
+
+    def _refresh(self) -> None:
+        if not self._dirty:
+            return
+        self._dirty = False
+        self._rebuild_polygons()
+        self.update()
+
+    def _rebuild_polygons(self) -> None:
+        levels = list(self._levels)
+        steps = len(levels)
+        if not steps:
+            self._polygons = []
+            return
+        width = self.width()
+        baseline = self.height() / 2
+        points = 2 * steps + 2
+        if len(self._polygons) != len(self._scales) or len(self._polygons[0]) != points:
+            self._polygons = [create_qpolygonf(points) for _ in self._scales]
+
+        # One (layers, points, 2) pass: baseline start, upper edge left to right,
+        # baseline end, lower edge right to left.
+        xs = np.arange(steps, dtype=np.float64) * (width / max(steps - 1, 1))
+        amplitudes = np.clip(np.array(levels, dtype=np.float64).T, 0.01, 1.0)
+        offsets = self._scales[:, None] * amplitudes
+        geometry = np.empty((len(self._scales), points, 2), dtype=np.float64)
+        geometry[:, 0] = (0.0, baseline)
+        geometry[:, 1 : steps + 1, 0] = xs
+        geometry[:, 1 : steps + 1, 1] = baseline - offsets
+        geometry[:, steps + 1] = (width, baseline)
+        geometry[:, steps + 2 :, 0] = xs[::-1]
+        geometry[:, steps + 2 :, 1] = baseline + offsets[:, ::-1]
+        for polygon, layer in zip(self._polygons, geometry):
+            ndarray_from_qpolygonf(polygon)[:] = layer
+
+    def _render_background(self) -> QPixmap:
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(self.size() * ratio)
+        pixmap.setDevicePixelRatio(ratio)
         gradient = QRadialGradient(self.rect().center(), self.width() * 0.75)
         gradient.setColorAt(0.0, QColor(24, 33, 88))
         gradient.setColorAt(1.0, QColor(3, 4, 20))
+        painter = QPainter(pixmap)
         painter.fillRect(self.rect(), gradient)
+        painter.end()
+        return pixmap
 
-        if not self._amplitudes:
-            return
+    def resizeEvent(self, event) -> None:  # type: ignore[override]
+        self._background = None
+        self._rebuild_polygons()
+        super().resizeEvent(event)
 
-        width = self.width()
-        height = self.height()
-        baseline = height / 2
-        steps = len(self._amplitudes)
-        spacing = width / max(steps - 1, 1)
-        for index, color in enumerate(self._colors):
-            path = QPainterPath()
-            path.moveTo(0, baseline)
-            for i, amp in enumerate(self._amplitudes):
-                x = i * spacing
-                offset = (index + 1) * 12
-                y = baseline - (amp * (120 - offset))
-                path.lineTo(x, y)
-            path.lineTo(width, baseline)
-            for i, amp in reversed(list(enumerate(self._amplitudes))):
-                x = i * spacing
-                offset = (index + 1) * 12
-                y = baseline + (amp * (120 - offset))
-                path.lineTo(x, y)
-            path.closeSubpath()
-            painter.setBrush(color)
-            painter.setPen(color.lighter(150))
-            painter.drawPath(path)
+    def paintEvent(self, event) -> None:  # type: ignore[override]
+        if self._background is None:
+            self._background = self._render_background()
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._background)
+        if not self._polygons:
+            return
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        for polygon, brush, pen in zip(self._polygons, self._brushes, self._pens):
+            painter.setBrush(brush)
+            painter.setPen(pen)
+            painter.drawPolygon(polygon)
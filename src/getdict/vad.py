@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+from typing import List, Tuple
+
+import numpy as np
+
+from .settings import AudioSettings
+
+
+def to_mono_float(samples: np.ndarray) -> np.ndarray:
+    """Downmixes to mono and scales integer PCM to the [-1, 1] float range."""
+    mono = samples.mean(axis=1, dtype=np.float32) if samples.ndim == 2 else samples.astype(np.float32, copy=False)
+    if np.issubdtype(samples.dtype, np.integer):
+        mono = mono / np.float32(np.iinfo(samples.dtype).max + 1)
+    return mono
+
+
+def frame_features(samples: np.ndarray, frame_length: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the RMS level and zero-crossing rate of each frame.
+
+    A trailing partial frame is zero-padded so every input sample belongs to a frame.
+    """
+    mono = to_mono_float(samples)
+    count = -(-len(mono) // frame_length)
+    if count * frame_length != len(mono):
+        mono = np.pad(mono, (0, count * frame_length - len(mono)))
+    frames = mono.reshape(count, frame_length)
+    rms = np.sqrt(np.mean(np.square(frames), axis=1))
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / max(frame_length - 1, 1)
+    return rms, zcr
+
+
+class VoiceActivityDetector:
+    """Frame-energy voice activity detector with an optional zero-crossing rule.
+
+    With ``vad_zero_crossing`` enabled, quieter frames (above half the energy
+    threshold) still count as speech when their zero-crossing rate is high, which
+    keeps unvoiced consonants such as "s" and "f" from being trimmed.
+    """
+
+    def __init__(self, settings: AudioSettings) -> None:
+        self.frame_length = max(int(settings.sample_rate * settings.vad_frame_ms / 1000), 1)
+        self._energy_threshold = settings.vad_energy_threshold
+        self._zero_crossing = settings.vad_zero_crossing
+        self._zcr_threshold = settings.vad_zcr_threshold
+
+    def speech_mask(self, samples: np.ndarray) -> np.ndarray:
+        rms, zcr = frame_features(samples, self.frame_length)
+        speech = rms >= self._energy_threshold
+        if self._zero_crossing:
+            speech |= (rms >= self._energy_threshold * 0.5) & (zcr >= self._zcr_threshold)
+        return speech
+
+
+class SpeechGate:
+    """Streams audio through a :class:`VoiceActivityDetector`.
+
+    Silence is held back until speech follows it, so leading silence is cut down to
+    ``vad_padding_ms`` and trailing silence is dropped by :meth:`finish`. With
+    ``trim`` disabled every sample is passed through and only the speech and pause
+    bookkeeping used for segmentation is kept.
+    """
+
+    def __init__(self, settings: AudioSettings, trim: bool = True) -> None:
+        self._detector = VoiceActivityDetector(settings)
+        self._trim = trim
+        self._padding = int(settings.sample_rate * settings.vad_padding_ms / 1000)
+        self._min_speech = int(settings.sample_rate * settings.vad_min_speech_ms / 1000)
+        self._partial: np.ndarray | None = None
+        self._pending: List[np.ndarray] = []
+        self._pending_frames = 0
+        self.speech_frames = 0
+        self._silence_frames = 0
+
+    @property
+    def has_speech(self) -> bool:
+        return self.speech_frames > 0 and self.speech_frames >= self._min_speech
+
+    @property
+    def trailing_silence(self) -> int:
+        """Frames of silence since the last speech, or 0 before any speech."""
+        return self._silence_frames if self.speech_frames else 0
+
+    def reset(self) -> None:
+        """Starts a new segment, discarding held silence but keeping any partial frame."""
+        self._pending.clear()
+        self._pending_frames = 0
+        self.speech_frames = 0
+        self._silence_frames = 0
+
+    def feed(self, samples: np.ndarray) -> List[np.ndarray]:
+        """Returns the audio to keep, in order; held-back silence is copied."""
+        if self._partial is not None:
+            samples = np.concatenate((self._partial, samples))
+            self._partial = None
+        frame_length = self._detector.frame_length
+        full = len(samples) // frame_length * frame_length
+        if full < len(samples):
+            self._partial = samples[full:].copy()
+        return self._process(samples[:full])
+
+    def finish(self) -> List[np.ndarray]:
+        kept: List[np.ndarray] = []
+        if self._partial is not None:
+            kept.extend(self._process(self._partial))
+            self._partial = None
+        if self.speech_frames:
+            kept.extend(self._take_pending(from_start=True))
+        self._pending.clear()
+        self._pending_frames = 0
+        return kept
+
+    def _process(self, samples: np.ndarray) -> List[np.ndarray]:
+        if not len(samples):
+            return []
+        frame_length = self._detector.frame_length
+        mask = self._detector.speech_mask(samples)
+        edges = np.flatnonzero(np.diff(mask)) + 1
+        starts = np.concatenate(([0], edges))
+        ends = np.concatenate((edges, [len(mask)]))
+        kept: List[np.ndarray] = []
+        for start, end in zip(starts, ends):
+            chunk = samples[start * frame_length : end * frame_length]
+            if mask[start]:
+                kept.extend(self._take_pending(from_start=False))
+                kept.append(chunk)
+                self.speech_frames += len(chunk)
+                self._silence_frames = 0
+            else:
+                self._silence_frames += len(chunk)
+                if self._trim:
+                    self._hold(chunk.copy())
+                else:
+                    kept.append(chunk)
+        return kept
+
+    def _hold(self, chunk: np.ndarray) -> None:
+        self._pending.append(chunk)
+        self._pending_frames += len(chunk)
+        if self.speech_frames:
+            return
+        # Before any speech only the last padding's worth of silence can be kept.
+        while self._pending and self._pending_frames - len(self._pending[0]) >= self._padding:
+            self._pending_frames -= len(self._pending.pop(0))
+
+    def _take_pending(self, from_start: bool) -> List[np.ndarray]:
+        pending = self._pending
+        self._pending = []
+        total = self._pending_frames
+        self._pending_frames = 0
+        if self.speech_frames and not from_start:
+            return pending
+        kept: List[np.ndarray] = []
+        remaining = min(self._padding, total)
+        if from_start:
+            for chunk in pending:
+                if remaining <= 0:
+                    break
+                kept.append(chunk[:remaining])
+                remaining -= len(kept[-1])
+            return kept
+        skip = total - remaining
+        for chunk in pending:
+            if skip >= len(chunk):
+                skip -= len(chunk)
+                continue
+            kept.append(chunk[skip:])
+            skip = 0
+        return kept
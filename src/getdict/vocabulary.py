@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import itertools
+import json
+import logging
+import os
+import threading
+import uuid
+from array import array
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .settings import Settings
+
+logger = logging.getLogger(__name__)
+
+VOCABULARY_FILE_NAME = "vocabulary.txt"
+CACHE_SUFFIX = ".cache"
+# Bump when the cached table layout changes.
+CACHE_VERSION = 2
+MAPPING_SEPARATOR = "=>"
+VARIANT_SEPARATOR = "|"
+
+
+def vocabulary_path(settings: Settings) -> Path:
+    """Returns the configured vocabulary file, or the default one in the config directory."""
+    configured = settings.transcription.vocabulary_path
+    return Path(configured).expanduser() if configured else Settings.config_dir() / VOCABULARY_FILE_NAME
+
+
+def parse_vocabulary(text: str) -> List[Tuple[str, str]]:
+    """Reads ``(pattern, replacement)`` pairs from the vocabulary file format.
+
+    Each line is either a term, which fixes its capitalisation wherever it is
+    matched, or ``variant | variant => Replacement``. Blank lines and lines
+    starting with ``#`` are skipped.
+    """
+    entries = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if MAPPING_SEPARATOR in line:
+            variants, replacement = (part.strip() for part in line.split(MAPPING_SEPARATOR, 1))
+            patterns = [variant.strip() for variant in variants.split(VARIANT_SEPARATOR)]
+        else:
+            patterns, replacement = [line], line
+        for pattern in patterns:
+            if pattern:
+                entries.append((" ".join(pattern.split()), replacement))
+    return entries
+
+
+def _lower(text: str) -> str:
+    """Lower-cases ``text`` without changing its length, so match offsets map back to it."""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(char if len(char.lower()) != 1 else char.lower() for char in text)
+
+
+def _is_word(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class Automaton:
+    """Aho-Corasick matcher over lower-cased patterns.
+
+    One pass over the text finds every pattern occurrence, so the cost depends on
+    the transcript length and the number of matches, not on the dictionary size.
+    Matches must sit on word boundaries (at the edges of a pattern that are word
+    characters) and are taken leftmost-longest without overlaps.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str]] = ()) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        # Per state: index into ``_entries`` of the pattern ending there, or -1.
+        self._output: List[int] = [-1]
+        self._fail: List[int] = [0]
+        # Per state: the nearest state on the failure chain with an output.
+        self._link: List[int] = [0]
+        self._entries: List[Tuple[int, str, bool, bool]] = []
+        for pattern, replacement in entries:
+            self._add(_lower(pattern), replacement)
+        self._build_links()
+
+    def __len__(self) -> int:
+        return sum(1 for index in self._output if index >= 0)
+
+    def _add(self, pattern: str, replacement: str) -> None:
+        state = 0
+        for char in pattern:
+            following = self._goto[state].get(char)
+            if following is None:
+                following = len(self._goto)
+                self._goto[state][char] = following
+                self._goto.append({})
+                self._output.append(-1)
+                self._fail.append(0)
+                self._link.append(0)
+            state = following
+        entry = (len(pattern), replacement, _is_word(pattern[0]), _is_word(pattern[-1]))
+        if self._output[state] >= 0:
+            self._entries[self._output[state]] = entry  # a later line wins
+        else:
+            self._output[state] = len(self._entries)
+            self._entries.append(entry)
+
+    def _build_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, following in self._goto[state].items():
+                queue.append(following)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                fail = self._fail[following] = self._goto[fallback].get(char, 0)
+                self._link[following] = fail if self._output[fail] >= 0 else self._link[fail]
+
+    def replace(self, text: str) -> str:
+        if not self._entries or not text:
+            return text
+        lowered = _lower(text)
+        goto, fail, output, link, entries = self._goto, self._fail, self._output, self._link, self._entries
+        size = len(text)
+        matches = []
+        state = 0
+        for end, char in enumerate(lowered, start=1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            found = state if output[state] >= 0 else link[state]
+            while found:
+                length, replacement, word_start, word_end = entries[output[found]]
+                start = end - length
+                if (not word_start or start == 0 or not _is_word(text[start - 1])) and (
+                    not word_end or end == size or not _is_word(text[end])
+                ):
+                    matches.append((start, -length, replacement))
+                found = link[found]
+        if not matches:
+            return text
+        matches.sort()
+        pieces = []
+        position = 0
+        for start, negative_length, replacement in matches:
+            if start < position:
+                continue
+            pieces.append(text[position:start])
+            pieces.append(replacement)
+            position = start - negative_length
+        pieces.append(text[position:])
+        return "".join(pieces)
+
+    def tables(self) -> Dict[str, Any]:
+        """The compiled tables as plain lists, dicts, strings and numbers, for :meth:`from_tables`."""
+        return {"goto": self._goto, "output": self._output, "fail": self._fail, "link": self._link, "entries": self._entries}
+
+    @classmethod
+    def from_tables(cls, tables: Dict[str, Any]) -> "Automaton":
+        """Rebuilds an automaton from :meth:`tables`; raises ``ValueError`` if they are malformed."""
+        goto, output, fail, link = tables["goto"], tables["output"], tables["fail"], tables["link"]
+        entries = [
+            (int(length), str(replacement), bool(word_start), bool(word_end))
+            for length, replacement, word_start, word_end in tables["entries"]
+        ]
+        if not isinstance(goto, list) or set(map(type, goto)) - {dict}:
+            raise ValueError("Malformed goto table")
+        if set(map(type, itertools.chain.from_iterable(goto))) - {str}:
+            raise ValueError("Malformed goto table")
+        states = len(goto)
+        # array() accepts nothing but integers, and checks them at C speed.
+        targets = array("q", itertools.chain.from_iterable(map(dict.values, goto)))
+        if not (states and states == len(output) == len(fail) == len(link)) or not (
+            _in_range(array("q", output), -1, len(entries))
+            and _in_range(targets, 0, states)
+            and _in_range(array("q", fail), 0, states)
+            and _in_range(array("q", link), 0, states)
+        ):
+            raise ValueError("Inconsistent automaton tables")
+        automaton = cls()
+        automaton._goto = goto
+        automaton._output = list(output)
+        automaton._fail = list(fail)
+        automaton._link = list(link)
+        automaton._entries = entries
+        return automaton
+
+
+def _in_range(values: array, low: int, high: int) -> bool:
+    return not values or (min(values) >= low and max(values) < high)
+
+
+class Vocabulary:
+    """Custom vocabulary applied to transcripts before they are inserted.
+
+    The file is compiled into an :class:`Automaton` whose tables are cached next
+    to it as JSON; a cache that is stale or fails validation is rebuilt. The
+    automaton is only rebuilt when the file's size or modification time changes.
+    The file is checked before every transcript, so edits apply to the next
+    dictation. A missing file leaves transcripts unchanged.
+    """
+
+    def __init__(self, path: Path, cache_path: Optional[Path] = None) -> None:
+        self.path = path
+        self.cache_path = cache_path or path.with_name(f".{path.name}{CACHE_SUFFIX}")
+        self._lock = threading.Lock()
+        self._source: Optional[Tuple[int, int]] = None
+        self._automaton = Automaton()
+
+    def apply(self, text: str) -> str:
+        return self.refresh().replace(text)
+
+    def refresh(self) -> Automaton:
+        """Returns the automaton for the current file, loading or rebuilding it if the file changed."""
+        try:
+            stat = self.path.stat()
+            source: Optional[Tuple[int, int]] = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            source = None
+        with self._lock:
+            if source != self._source:
+                self._automaton = self._load(source) if source is not None else Automaton()
+                self._source = source
+            return self._automaton
+
+    def _load(self, source: Tuple[int, int]) -> Automaton:
+        # As it reads back from JSON, so it compares equal to a cached one.
+        header = {"version": CACHE_VERSION, "path": str(self.path), "source": list(source)}
+        try:
+            cached = json.loads(self.cache_path.read_bytes())
+            if cached.get("header") == header:
+                automaton = Automaton.from_tables(cached["tables"])
+                logger.debug("Loaded vocabulary automaton from %s", self.cache_path)
+                return automaton
+        except (OSError, ValueError, AttributeError, KeyError, TypeError, RecursionError):
+            pass
+        try:
+            entries = parse_vocabulary(self.path.read_text(encoding="utf-8"))
+        except (OSError, UnicodeDecodeError) as exc:
+            logger.warning("Unable to read vocabulary %s: %s", self.path, exc)
+            return Automaton()
+        automaton = Automaton(entries)
+        logger.info("Compiled %d vocabulary terms from %s", len(automaton), self.path)
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_path.with_name(f"{self.cache_path.name}.{uuid.uuid4().hex}.tmp")
+            tmp.write_text(json.dumps({"header": header, "tables": automaton.tables()}, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, self.cache_path)
+        except OSError as exc:
+            logger.warning("Unable to cache vocabulary: %s", exc)
+        return automaton
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import io
+import threading
+import time
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from benchmarks import fakes
+
+fakes.install()
+
+from getdict.audio import AudioRecorder  # noqa: E402
+from getdict.settings import AudioSettings  # noqa: E402
+
+RATE = 16000
+
+
+def _tone(seconds, rate=RATE, frequency=220.0):
+    t = np.arange(int(seconds * rate)) / rate
+    return (0.3 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def _decode(result):
+    samples, rate = sf.read(io.BytesIO(bytes(result.data)), dtype="float32", always_2d=True)
+    return samples, rate
+
+
+@pytest.fixture
+def microphone():
+    microphone = fakes.VirtualMicrophone(speed=20)
+    fakes.attach_microphone(microphone)
+    yield microphone
+    fakes.attach_microphone(None)
+
+
+def _record(recorder, microphone, *clips):
+    recorder.start()
+    for clip in clips:
+        microphone.play(clip, RATE)
+    assert microphone.wait_drained(10)
+    time.sleep(0.05)
+    return recorder.stop()
+
+
+def test_recording_is_cut_into_segments_at_pauses(microphone):
+    settings = AudioSettings(native_format=False, segment_min_seconds=2.0, segment_pause_ms=600)
+    segments = []
+    recorder = AudioRecorder(settings, segment_callback=segments.append)
+
+    final = _record(recorder, microphone, _tone(3.0), np.zeros(RATE, dtype=np.float32), _tone(1.5))
+
+    assert [segment.index for segment in segments] == [0]
+    # Each part keeps its speech plus the VAD padding on either side.
+    assert 3.0 <= segments[0].duration_seconds <= 3.0 + 2 * settings.vad_padding_ms / 1000 + 0.1
+    assert final.index == 1 and final.has_speech
+    assert 1.5 <= final.duration_seconds <= 2.5
+
+
+def test_short_recordings_are_not_segmented(microphone):
+    settings = AudioSettings(native_format=False, segment_min_seconds=4.0, segment_pause_ms=600)
+    segments = []
+    recorder = AudioRecorder(settings, segment_callback=segments.append)
+
+    final = _record(recorder, microphone, _tone(1.0), np.zeros(RATE, dtype=np.float32), _tone(1.0))
+
+    assert segments == [] and final.index == 0
+
+
+def test_native_capture_is_converted_to_the_configured_format(microphone):
+    settings = AudioSettings(native_format=True, vad_enabled=False)
+    recorder = AudioRecorder(settings)
+
+    result = _record(recorder, microphone, _tone(1.0))
+
+    assert (recorder._capture_rate, recorder._capture_channels) == (48000, 2)
+    samples, rate = _decode(result)
+    assert rate == RATE and samples.shape[1] == 1
+    assert result.duration_seconds == pytest.approx(len(samples) / RATE)
+    spectrum = np.abs(np.fft.rfft(samples[: RATE // 2, 0]))
+    assert np.argmax(spectrum) * 2 == pytest.approx(220, abs=4)
+    assert result.dropped_frames == 0
+
+
+def test_warm_stream_starts_with_the_preroll(microphone):
+    settings = AudioSettings(native_format=False, vad_enabled=False, warm_stream=True, preroll_ms=300)
+    recorder = AudioRecorder(settings)
+    recorder.prepare()
+    try:
+        deadline = time.monotonic() + 5
+        # Let more than the pre-roll arrive before the recording starts.
+        while (recorder._buffer is None or recorder._buffer.available < RATE) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        recorder.start()
+        result = recorder.stop()
+    finally:
+        recorder.close()
+
+    assert 0.3 <= result.duration_seconds <= 0.3 + 2 * settings.block_size / RATE
+
+
+def test_warm_stream_is_reopened_when_its_settings_change(microphone):
+    settings = AudioSettings(native_format=False, warm_stream=True)
+    recorder = AudioRecorder(settings)
+    recorder.prepare()
+    stream = recorder._stream
+    assert stream is not None and stream.active
+
+    recorder.prepare()
+    assert recorder._stream is stream
+
+    settings.preroll_ms = 500
+    recorder.prepare()
+    assert recorder._stream is not stream and not stream.active
+    assert recorder._buffer.capacity >= (settings.buffer_seconds + 0.5) * RATE
+
+    settings.warm_stream = False
+    recorder.prepare()
+    assert recorder._stream is None
+
+
+def test_blocks_that_do_not_fit_are_counted_as_dropped(microphone):
+    settings = AudioSettings(native_format=False, vad_enabled=False, buffer_seconds=0.5)
+    stalled = threading.Event()
+    resume = threading.Event()
+
+    def stall(frame):
+        stalled.set()
+        resume.wait(5)
+
+    recorder = AudioRecorder(settings, waveform_callback=stall)
+    recorder.start()
+    try:
+        microphone.play(_tone(3.0), RATE)
+        assert stalled.wait(5)
+        deadline = time.monotonic() + 5
+        while not recorder._buffer.overruns and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert microphone.wait_drained(10)
+    finally:
+        resume.set()
+    result = recorder.stop()
+
+    assert result.dropped_frames > 0
+    assert result.dropped_frames % settings.block_size == 0
+    assert result.duration_seconds + result.dropped_frames / RATE >= 3.0
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import io
+import json
+
+import numpy as np
+import soundfile as sf
+
+from getdict import batch
+from getdict.backends import StubBackend
+from getdict.batch import BatchOptions, BatchTranscriber, RateLimiter, find_audio_files, split_audio
+from getdict.settings import Settings
+from getdict.transcription import TranscriptionClient
+from getdict.vocabulary import Vocabulary
+
+
+def _client(stub_text=None) -> TranscriptionClient:
+    settings = Settings()
+    settings.transcription.provider = "stub"
+    settings.transcription.stub_text = stub_text
+    return TranscriptionClient(settings)
+
+
+def _write_tone(path, seconds: float, rate: int = 16000, frequency: float = 220.0) -> None:
+    t = np.arange(int(seconds * rate)) / rate
+    sf.write(str(path), (0.3 * np.sin(2 * np.pi * frequency * t)).astype(np.float32), rate, subtype="PCM_16")
+
+
+def test_batch_writes_jsonl_and_resumes_from_manifest(tmp_path):
+    audio = tmp_path / "audio"
+    (audio / "nested").mkdir(parents=True)
+    for index, name in enumerate(("a.wav", "nested/b.wav", "c.wav")):
+        _write_tone(audio / name, 0.5, frequency=200 + 100 * index)
+    (audio / "notes.txt").write_text("not audio")
+    options = BatchOptions(manifest=tmp_path / "out.jsonl.manifest.jsonl", concurrency=3)
+    paths = find_audio_files([audio])
+    assert [path.name for path in paths] == ["a.wav", "c.wav", "b.wav"]
+
+    client = _client()
+    sink = io.StringIO()
+    summary = BatchTranscriber(client, options, sink).run(paths)
+
+    assert (summary.done, summary.failed, summary.skipped) == (3, 0, 0)
+    results = [json.loads(line) for line in sink.getvalue().splitlines()]
+    assert sorted(result["path"] for result in results) == sorted(str(path) for path in paths)
+    assert all(result["text"].startswith("stub-") and result["error"] is None for result in results)
+
+    # A rerun only picks up the file that changed.
+    _write_tone(paths[0], 0.75)
+    rerun_client = _client()
+    rerun = BatchTranscriber(rerun_client, options, io.StringIO()).run(paths)
+    assert (rerun.done, rerun.skipped) == (1, 2)
+    assert isinstance(rerun_client.backend, StubBackend)
+    assert len(rerun_client.backend.requests) == 1
+
+
+def test_large_files_are_split_and_joined_in_order(tmp_path):
+    path = tmp_path / "meeting.wav"
+    _write_tone(path, 5.0, rate=48000)
+    options = BatchOptions(max_upload_bytes=1000, chunk_seconds=2.0, concurrency=2)
+    client = _client(stub_text="part")
+
+    sink = io.StringIO()
+    summary = BatchTranscriber(client, options, sink).run([path])
+
+    result = json.loads(sink.getvalue())
+    assert summary.done == 1
+    # Cuts fall at the quietest frame within the last second of each 2-second chunk.
+    assert 3 <= result["chunks"] <= 5
+    assert result["text"] == " ".join(["part"] * result["chunks"])
+    names = sorted(request.filename for request in client.backend.requests)
+    assert names == [f"meeting.part{index:03d}.flac" for index in range(result["chunks"])]
+
+
+def test_vocabulary_is_applied_to_each_file(tmp_path):
+    path = tmp_path / "standup.wav"
+    _write_tone(path, 0.5)
+    (tmp_path / "vocabulary.txt").write_text("hello world => Hello, World\n")
+    vocabulary = Vocabulary(tmp_path / "vocabulary.txt")
+
+    sink = io.StringIO()
+    BatchTranscriber(_client(stub_text="hello world"), BatchOptions(), sink, vocabulary.apply).run([path])
+
+    assert json.loads(sink.getvalue())["text"] == "Hello, World"
+
+
+def test_split_audio_resamples_to_16k_and_keeps_every_sample(tmp_path):
+    path = tmp_path / "call.wav"
+    _write_tone(path, 3.3, rate=44100)
+
+    chunks = [sf.read(io.BytesIO(bytes(request.audio_data))) for request in split_audio(path, chunk_seconds=1.0)]
+
+    assert all(rate == 16000 for _, rate in chunks)
+    assert all(len(samples) <= 16000 for samples, _ in chunks)
+    assert abs(sum(len(samples) for samples, _ in chunks) - 3.3 * 16000) < 100
+
+
+def test_failed_files_are_reported_and_not_marked_done(tmp_path, monkeypatch):
+    path = tmp_path / "broken.wav"
+    _write_tone(path, 0.2)
+    client = _client()
+
+    def fail(request):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(client, "transcribe", fail)
+    options = BatchOptions(manifest=tmp_path / "manifest.jsonl")
+    sink = io.StringIO()
+    summary = BatchTranscriber(client, options, sink).run([path])
+
+    assert summary.failed == 1
+    assert json.loads(sink.getvalue())["error"] == "RuntimeError: boom"
+    assert not batch.Manifest(options.manifest).is_done(path)
+
+
+def test_rate_limiter_spaces_requests():
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    limiter = RateLimiter(120, clock=lambda: now[0], sleep=sleep)
+    for _ in range(3):
+        limiter.acquire()
+
+    assert sleeps == [0.5, 0.5]
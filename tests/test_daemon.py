@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import socket
+import stat
+import threading
+import time
+
+import pytest
+
+from getdict.daemon import EVENT_QUEUE_SIZE, DaemonClient, DaemonServer, default_socket_path
+from getdict.models import EngineError
+from getdict.settings import Settings
+
+
+class FakeEngine:
+    def __init__(self):
+        self.listeners = []
+        self.recording = False
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+        listener({"event": "state", "state": "idle", "tooltip": "Ready"})
+        return lambda: self.listeners.remove(listener)
+
+    def start_recording(self, insert=True):
+        if self.recording:
+            raise EngineError("A recording is already in progress.", "Already recording")
+        self.recording = True
+        return {"sequence": 1, "insert": insert}
+
+    def stop_recording(self):
+        self.recording = False
+        for listener in list(self.listeners):
+            listener({"event": "transcript", "sequence": 1, "text": "hello", "inserted": False})
+        return {"sequence": 1, "status": "queued"}
+
+    def status(self):
+        return {"state": "recording" if self.recording else "idle", "tooltip": "", "jobs": [], "pickups": []}
+
+
+@pytest.fixture
+def served(tmp_path):
+    engine = FakeEngine()
+    server = DaemonServer(engine, tmp_path / "getdict.sock")
+    server.start()
+    client = DaemonClient.connect(server.path, timeout=5)
+    assert client is not None
+    yield engine, server, client
+    client.close()
+    server.close()
+
+
+def test_commands_and_errors_round_trip(served):
+    engine, server, client = served
+    assert stat.S_IMODE(server.path.stat().st_mode) == 0o600
+    assert client.call("ping")["version"] == 1
+    assert client.start_recording(insert=False) == {"sequence": 1, "insert": False}
+    assert client.status()["state"] == "recording"
+    with pytest.raises(EngineError) as excinfo:
+        client.start_recording()
+    assert excinfo.value.title == "Already recording"
+    with pytest.raises(EngineError, match="Unknown command"):
+        client.call("explode")
+    with pytest.raises(EngineError, match="hosted by the tray"):
+        client.call("shutdown")
+
+
+def test_subscribers_receive_engine_events(served):
+    engine, server, client = served
+    events = []
+    transcript = threading.Event()
+
+    def listener(event):
+        events.append(event)
+        if event["event"] == "transcript":
+            transcript.set()
+
+    client.subscribe(listener, events=["state", "transcript"])
+    client.start_recording(insert=False)
+    client.stop_recording()
+    assert transcript.wait(5)
+    assert events[0]["event"] == "state"
+    assert events[-1]["text"] == "hello"
+
+
+def test_second_server_refuses_a_live_socket_and_replaces_a_stale_one(served, tmp_path):
+    engine, server, client = served
+    with pytest.raises(EngineError, match="already serving"):
+        DaemonServer(FakeEngine(), server.path).start()
+
+    stale = tmp_path / "stale.sock"
+    stale.touch()
+    replacement = DaemonServer(FakeEngine(), stale)
+    replacement.start()
+    try:
+        assert DaemonClient.connect(stale, timeout=5).call("ping")["version"] == 1
+    finally:
+        replacement.close()
+    assert not stale.exists()
+
+
+def test_client_reports_disconnect(served):
+    engine, server, client = served
+    gone = threading.Event()
+    client.subscribe(lambda event: event["event"] == "disconnected" and gone.set())
+    server.close()
+    assert gone.wait(5)
+    with pytest.raises(EngineError):
+        client.status()
+
+
+def test_replies_are_not_blocked_by_events_a_client_does_not_read(served):
+    engine, server, _ = served
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(str(server.path))
+    try:
+        sock.sendall(b'{"id": 1, "command": "subscribe"}\n')
+        deadline = time.monotonic() + 5
+        while not engine.listeners and time.monotonic() < deadline:
+            time.sleep(0.01)
+        listener = engine.listeners[0]
+        # Far more than the socket buffer and the event queue hold; nothing is read.
+        for sequence in range(EVENT_QUEUE_SIZE * 4):
+            listener({"event": "transcript", "sequence": sequence, "text": "x" * 4096, "inserted": False})
+        sock.sendall(b'{"id": 2, "command": "stop"}\n{"id": 3, "command": "start"}\n')
+        while not engine.recording and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert engine.recording
+    finally:
+        sock.close()
+
+
+def test_call_times_out_when_the_daemon_never_replies(tmp_path):
+    path = tmp_path / "silent.sock"
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(str(path))
+    listener.listen()
+    client = DaemonClient.connect(path, timeout=0.2)
+    assert client is not None
+    try:
+        with pytest.raises(EngineError, match="did not respond") as excinfo:
+            client.status()
+        assert excinfo.value.title == "Daemon not responding"
+        assert client._pending == {}
+    finally:
+        client.close()
+        listener.close()
+
+
+def test_default_socket_path(monkeypatch, tmp_path):
+    settings = Settings()
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    assert default_socket_path(settings) == tmp_path / "getdict.sock"
+    settings.daemon.socket_path = str(tmp_path / "custom.sock")
+    assert default_socket_path(settings) == tmp_path / "custom.sock"
+    assert DaemonClient.connect(tmp_path / "missing.sock") is None
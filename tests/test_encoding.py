@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import io
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from getdict.encoding import UPLINK_MIN_SAMPLE_BYTES, UplinkEstimator, resolve_codec, soundfile_options
+from getdict.models import AudioCodec
+from getdict.settings import AudioSettings
+
+
+def _tone(seconds: float = 2.0, rate: int = 16000) -> np.ndarray:
+    t = np.arange(int(seconds * rate)) / rate
+    return (0.3 * np.sin(2 * np.pi * 220 * t) * np.sin(2 * np.pi * 3 * t)).astype(np.float32)
+
+
+@pytest.mark.parametrize("codec", list(AudioCodec))
+def test_codecs_round_trip(codec):
+    settings = AudioSettings()
+    buffer = io.BytesIO()
+    with sf.SoundFile(buffer, "w", settings.sample_rate, settings.channels, **soundfile_options(codec, settings)) as fh:
+        fh.write(_tone())
+    buffer.seek(0)
+    samples, rate = sf.read(buffer, dtype="float32")
+    assert rate == settings.sample_rate
+    assert abs(len(samples) - 2 * settings.sample_rate) < 1000
+
+
+def test_opus_bitrate_controls_size():
+    sizes = {}
+    for kbps in (12, 64):
+        settings = AudioSettings(opus_bitrate_kbps=kbps)
+        buffer = io.BytesIO()
+        with sf.SoundFile(buffer, "w", 16000, 1, **soundfile_options(AudioCodec.OPUS, settings)) as fh:
+            fh.write(_tone())
+        sizes[kbps] = len(buffer.getvalue())
+    assert sizes[12] < sizes[64] / 2
+
+
+def test_auto_codec_follows_uplink():
+    settings = AudioSettings(codec="auto", auto_opus_below_kbps=256)
+    uplink = UplinkEstimator()
+    assert resolve_codec(settings, uplink) is AudioCodec.FLAC
+
+    uplink.observe(UPLINK_MIN_SAMPLE_BYTES * 4, 10.0)
+    assert uplink.kbps is not None and uplink.kbps < 256
+    assert resolve_codec(settings, uplink) is AudioCodec.OPUS
+
+    for _ in range(20):
+        uplink.observe(UPLINK_MIN_SAMPLE_BYTES * 4, 0.1)
+    assert resolve_codec(settings, uplink) is AudioCodec.FLAC
+
+
+def test_small_uploads_and_stale_estimates_are_ignored():
+    uplink = UplinkEstimator(max_age=0.0)
+    uplink.observe(1000, 1.0)
+    assert uplink.kbps is None
+    uplink.observe(UPLINK_MIN_SAMPLE_BYTES, 1.0)
+    assert uplink.kbps is None
+
+
+def test_opus_falls_back_to_flac_for_unsupported_rates():
+    assert resolve_codec(AudioSettings(codec="opus", sample_rate=44100)) is AudioCodec.FLAC
+    assert resolve_codec(AudioSettings(codec="opus")) is AudioCodec.OPUS
+    assert resolve_codec(AudioSettings(codec="mp3")) is AudioCodec.FLAC
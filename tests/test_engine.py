@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from benchmarks import fakes
+
+fakes.install()
+
+from getdict.backends import StubBackend  # noqa: E402
+from getdict.engine import DictationEngine  # noqa: E402
+from getdict.models import InsertionResult, InsertionStrategy, RetryableError  # noqa: E402
+from getdict.settings import Settings  # noqa: E402
+
+RATE = 16000
+
+
+class FakeInserter:
+    def __init__(self):
+        self.keys_released = None
+        self.inserted = []
+
+    def insert(self, text):
+        self.inserted.append(text)
+        return InsertionResult(success=True, strategy=InsertionStrategy.PASTE)
+
+    def close(self):
+        pass
+
+
+class Events:
+    def __init__(self):
+        self.events = []
+        self._changed = threading.Condition()
+
+    def __call__(self, event):
+        with self._changed:
+            self.events.append(event)
+            self._changed.notify_all()
+
+    def of(self, kind):
+        with self._changed:
+            return [event for event in self.events if event["event"] == kind]
+
+    def wait_for(self, condition, timeout=10.0):
+        with self._changed:
+            assert self._changed.wait_for(lambda: condition(self), timeout), self.events
+
+
+def _speech(seconds):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+@pytest.fixture
+def microphone():
+    microphone = fakes.VirtualMicrophone(speed=20)
+    fakes.attach_microphone(microphone)
+    yield microphone
+    fakes.attach_microphone(None)
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch, microphone):
+    monkeypatch.setattr(Settings, "_config_path", staticmethod(lambda: tmp_path / "settings.json"))
+    settings = Settings()
+    settings.transcription.provider = "stub"
+    settings.transcription.stub_text = "hello world"
+    settings.transcription.max_attempts = 1
+    engine = DictationEngine(settings)
+    engine.start()
+    engine._inserter = FakeInserter()
+    yield engine
+    engine.close()
+
+
+def _dictate(engine, microphone, seconds=1.0):
+    started = engine.start_recording()
+    microphone.play(_speech(seconds), RATE)
+    assert microphone.wait_drained(10)
+    time.sleep(0.05)
+    return started, engine.stop_recording()
+
+
+def test_dictation_is_transcribed_and_inserted(engine, microphone):
+    events = Events()
+    engine.subscribe(events)
+
+    started, stopped = _dictate(engine, microphone)
+    events.wait_for(lambda e: e.of("transcript") and e.of("state")[-1]["state"] == "idle")
+
+    assert stopped == {"sequence": started["sequence"], "status": "transcribing"}
+    assert events.of("transcript") == [{"event": "transcript", "sequence": 1, "text": "hello world", "inserted": True}]
+    assert engine._inserter.inserted == ["hello world"]
+    states = [event["state"] for event in events.of("state")]
+    # Nothing is reported as queued while the first recording is still being opened.
+    assert states[:2] == ["idle", "recording"]
+    assert "processing" in states[2:]
+    engine._history.flush()
+    assert [entry.text for entry in engine._history.search()] == ["hello world"]
+
+
+def test_cancelled_recording_is_dropped(engine, microphone):
+    events = Events()
+    engine.subscribe(events)
+
+    engine.start_recording()
+    microphone.play(_speech(0.5), RATE)
+    assert microphone.wait_drained(10)
+    assert engine.cancel_recording() == {"cancelled": True, "sequence": 1}
+    events.wait_for(lambda e: e.of("jobs") and e.of("jobs")[-1]["jobs"][-1]["status"] == "cancelled")
+
+    assert engine.state.value == "idle"
+    assert engine.cancel_recording() == {"cancelled": False}
+    assert engine._client().backend.requests == []
+    assert events.of("transcript") == [] and engine._inserter.inserted == []
+
+
+def test_failed_dictation_is_spooled_and_replayed(engine, microphone, monkeypatch, tmp_path):
+    events = Events()
+    engine.subscribe(events)
+    transcribe = StubBackend.transcribe
+
+    def unreachable(self, request):
+        raise RetryableError("Service unavailable")
+
+    monkeypatch.setattr(StubBackend, "transcribe", unreachable)
+    _dictate(engine, microphone)
+    events.wait_for(lambda e: any(event["title"] == "Transcription deferred" for event in e.of("notice")))
+    assert len(engine._spool.entries()) == 1
+    assert engine._inserter.inserted == []
+
+    # The replayed transcript goes through the vocabulary like a live one.
+    (tmp_path / "vocabulary.txt").write_text("hello world => Hello, World\n")
+    monkeypatch.setattr(StubBackend, "transcribe", transcribe)
+    engine._drainer.wake()
+    events.wait_for(lambda e: e.of("pickups") and e.of("pickups")[-1]["results"])
+
+    assert [result["text"] for result in events.of("pickups")[-1]["results"]] == ["Hello, World"]
+    assert engine._spool.entries() == []
+
+
+def test_client_is_built_and_warmed_outside_the_state_lock(engine, monkeypatch):
+    building = threading.Event()
+    release = threading.Event()
+    stub_init = StubBackend.__init__
+
+    def slow_init(self, settings):
+        building.set()
+        release.wait(5)
+        stub_init(self, settings)
+
+    monkeypatch.setattr(StubBackend, "__init__", slow_init)
+    monkeypatch.setattr(StubBackend, "warm_up", lambda self: release.wait(5))
+    result = {}
+    starter = threading.Thread(target=lambda: result.update(engine.start_recording()))
+    starter.start()
+    try:
+        assert building.wait(5)
+        started = time.monotonic()
+        assert engine.cancel_recording() == {"cancelled": False}
+        assert time.monotonic() - started < 1
+        release.set()
+        starter.join(5)
+        # The slow warm-up runs in the background and does not delay the recording.
+        release.clear()
+        assert engine.cancel_recording()["cancelled"]
+        assert engine.start_recording()["sequence"] == 2
+        assert engine.cancel_recording()["cancelled"]
+    finally:
+        release.set()
+        starter.join(5)
+    assert result == {"sequence": 1}
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from PySide6.QtCore import QCoreApplication
+
+from getdict.event_bus import EventBus, JobsChanged, LevelsChanged, Notice, StateChanged, parse_engine_event
+from getdict.models import AppState, JobStatus, LevelFrame
+
+
+def _app() -> QCoreApplication:
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+def _run_until(app: QCoreApplication, condition, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+
+
+def test_engine_events_are_parsed_into_typed_events():
+    jobs = parse_engine_event({"event": "jobs", "jobs": [{"sequence": 2, "status": "done", "segments": 1}]})
+    assert isinstance(jobs, JobsChanged) and jobs.jobs[0].status is JobStatus.DONE
+    assert parse_engine_event({"event": "levels", "rms": 0.5, "bands": [0.1, 0.2]}) == LevelsChanged(LevelFrame(0.5, (0.1, 0.2)))
+    assert parse_engine_event({"event": "transcript", "sequence": 1, "text": "hi", "inserted": True}) is None
+
+
+def test_events_from_worker_threads_are_coalesced_onto_the_gui_thread():
+    app = _app()
+    bus = EventBus(interval_ms=20)
+    received = []
+    gui_thread = threading.get_ident()
+    for event_type in (StateChanged, LevelsChanged, Notice):
+        bus.subscribe(event_type, lambda event: received.append((event, threading.get_ident())))
+
+    def worker() -> None:
+        for index in range(100):
+            bus.post(LevelsChanged(LevelFrame(index / 100, ())))
+        bus.post(StateChanged(AppState.RECORDING, "Listening..."))
+        bus.post(Notice("first", ""))
+        bus.post(Notice("second", ""))
+        bus.post(StateChanged(AppState.PROCESSING, "Transcribing..."))
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    _run_until(app, lambda: len(received) >= 4)
+
+    events = [event for event, _ in received]
+    assert events == [
+        LevelsChanged(LevelFrame(0.99, ())),
+        Notice("first", ""),
+        Notice("second", ""),
+        StateChanged(AppState.PROCESSING, "Transcribing..."),
+    ]
+    assert {thread_id for _, thread_id in received} == {gui_thread}
+
+
+def test_deliveries_are_limited_to_one_per_frame():
+    app = _app()
+    bus = EventBus(interval_ms=50)
+    deliveries = []
+    bus.subscribe(LevelsChanged, lambda event: deliveries.append(time.monotonic()))
+    bus.post(LevelsChanged(LevelFrame(0.1, ())))
+    _run_until(app, lambda: len(deliveries) == 1)
+    bus.post(LevelsChanged(LevelFrame(0.2, ())))
+    _run_until(app, lambda: len(deliveries) == 2)
+    assert len(deliveries) == 2
+    assert deliveries[1] - deliveries[0] >= 0.045
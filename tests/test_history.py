@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import time
+
+from getdict.history import HistoryEntry, HistoryStore, _match_query
+from getdict.settings import HistorySettings
+
+
+def test_match_query_quotes_words_and_prefixes_the_last():
+    assert _match_query("  deploy k8s-clus ") == '"deploy" "k8s" "clus"*'
+    assert _match_query('cats OR "dogs') == '"cats" "OR" "dogs"*'
+    assert _match_query('" - *') == ""
+
+
+def test_entries_are_written_behind_in_batches(tmp_path, monkeypatch):
+    batches = []
+    original = HistoryStore._write
+    monkeypatch.setattr(
+        HistoryStore, "_write", lambda self, connection, entries: batches.append(len(entries)) or original(self, connection, entries)
+    )
+    store = HistoryStore(tmp_path / "history.sqlite3", HistorySettings())
+    try:
+        for index in range(10):
+            store.record(HistoryEntry(text=f"note {index}", sequence=index, inserted=True))
+        store.flush()
+        assert sum(batches) == 10 and len(batches) < 10
+        entries = store.search()
+        assert [entry.sequence for entry in entries] == list(range(9, -1, -1))
+        assert entries[0].inserted is True and entries[0].entry_id
+        assert store.get(entries[0].entry_id) == entries[0]
+    finally:
+        store.close()
+
+
+def test_search_ranks_full_text_matches(tmp_path):
+    store = HistoryStore(tmp_path / "history.sqlite3", HistorySettings())
+    try:
+        store.record(HistoryEntry(text="Deploy the Kubernetes cluster on Friday"))
+        store.record(HistoryEntry(text="Lunch on Friday?"))
+        store.record(HistoryEntry(text="Café meeting moved"))
+        store.flush()
+        assert [entry.text for entry in store.search("friday kube")] == ["Deploy the Kubernetes cluster on Friday"]
+        assert len(store.search("friday")) == 2
+        assert [entry.text for entry in store.search("cafe")] == ["Café meeting moved"]
+        assert store.search("nothing") == []
+    finally:
+        store.close()
+
+
+def test_search_falls_back_to_substrings_without_fts5(tmp_path, monkeypatch):
+    path = tmp_path / "history.sqlite3"
+    now = time.time()
+    store = HistoryStore(path, HistorySettings())
+    store.record(HistoryEntry(text="Deploy the Kubernetes cluster", created=now - 3))
+    store.close()
+
+    # A build without FTS5 rejects the virtual table with "no such module".
+    monkeypatch.setattr("getdict.history.FTS_SCHEMA", "CREATE VIRTUAL TABLE IF NOT EXISTS missing USING nofts5(text);")
+    store = HistoryStore(path, HistorySettings())
+    try:
+        store.record(HistoryEntry(text="Friday deploy at 100%", created=now - 2))
+        store.record(HistoryEntry(text="Lunch on Friday", created=now - 1))
+        store.flush()
+        assert store.count() == 3
+        assert [entry.text for entry in store.search("deploy")] == ["Friday deploy at 100%", "Deploy the Kubernetes cluster"]
+        assert [entry.text for entry in store.search("friday deploy")] == ["Friday deploy at 100%"]
+        assert store.search("100_") == []
+    finally:
+        store.close()
+
+    # Entries written meanwhile are indexed once FTS5 is back.
+    monkeypatch.undo()
+    store = HistoryStore(path, HistorySettings())
+    try:
+        assert [entry.text for entry in store.search("lunch")] == ["Lunch on Friday"]
+    finally:
+        store.close()
+
+
+def test_compaction_applies_retention_and_entry_limit(tmp_path):
+    store = HistoryStore(tmp_path / "history.sqlite3", HistorySettings(retention_days=30, max_entries=3))
+    try:
+        store.flush()
+        now = time.time()
+        store.record(HistoryEntry(text="ancient lunch", created=now - 40 * 86400))
+        for index in range(4):
+            store.record(HistoryEntry(text=f"lunch {index}", created=now - index))
+        store.flush()
+        assert store.count() == 5
+
+        store.compact()
+        store.flush()
+        assert sorted(entry.text for entry in store.search("lunch")) == ["lunch 0", "lunch 1", "lunch 2"]
+        assert store.count() == 3
+    finally:
+        store.close()
+
+
+def test_disabled_history_records_nothing(tmp_path):
+    store = HistoryStore(tmp_path / "history.sqlite3", HistorySettings(enabled=False))
+    try:
+        store.record(HistoryEntry(text="private"))
+        store.flush()
+        assert store.count() == 0
+    finally:
+        store.close()
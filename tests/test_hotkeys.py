@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from getdict.models import Hotkey
+
+try:
+    from pynput import keyboard
+
+    from getdict.hotkeys import HotkeyListener, _key_name
+except ImportError as exc:  # no display or unsupported platform
+    pytest.skip(f"pynput unavailable: {exc}", allow_module_level=True)
+
+
+def test_key_names_are_canonical():
+    assert _key_name(keyboard.Key.ctrl_r) == "ctrl"
+    assert _key_name(keyboard.Key.esc) == "esc"
+    assert _key_name(keyboard.KeyCode.from_char("A")) == "a"
+    assert _key_name(keyboard.KeyCode.from_char(" ")) == "space"
+
+
+def test_bindings_dispatch_off_the_hook_thread():
+    calls = []
+    hook_thread = threading.current_thread()
+    done = threading.Event()
+
+    def record(name):
+        def callback():
+            calls.append((name, threading.current_thread() is hook_thread))
+            if name == "cancel":
+                done.set()
+
+        return callback
+
+    listener = HotkeyListener(
+        Hotkey(modifier="ctrl+alt", key="space"),
+        on_start=record("start"),
+        on_stop=record("stop"),
+        toggle_hotkey=Hotkey(modifier="ctrl", key="t"),
+        on_toggle=record("toggle"),
+        cancel_hotkey=Hotkey(modifier="", key="esc"),
+        on_cancel=record("cancel"),
+    )
+    listener.start()
+    try:
+        for key in (keyboard.Key.ctrl_l, keyboard.Key.alt_l, keyboard.Key.space, keyboard.Key.space):
+            listener._on_press(key)
+        listener._on_release(keyboard.Key.space)
+        listener._on_release(keyboard.Key.alt_l)
+        listener._on_press(keyboard.KeyCode.from_char("t"))
+        listener._on_release(keyboard.KeyCode.from_char("t"))
+        listener._on_release(keyboard.Key.ctrl_l)
+        listener._on_press(keyboard.Key.esc)
+        assert done.wait(timeout=5)
+    finally:
+        listener.stop()
+
+    assert calls == [("start", False), ("stop", False), ("toggle", False), ("cancel", False)]
+
+
+def test_wait_released_tracks_held_modifiers():
+    listener = HotkeyListener(Hotkey(modifier="ctrl+alt", key="space"), on_start=lambda: None, on_stop=lambda: None)
+    assert listener.wait_released(0)
+    listener._on_press(keyboard.Key.ctrl_l)
+    listener._on_press(keyboard.Key.alt_r)
+    listener._on_press(keyboard.Key.space)
+    listener._on_release(keyboard.Key.space)
+    listener._on_release(keyboard.Key.ctrl_l)
+    assert not listener.wait_released(0.01)
+    listener._on_release(keyboard.Key.alt_r)
+    assert listener.wait_released(0)
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from getdict.models import InsertionStrategy
+from getdict.settings import InsertionSettings
+
+try:
+    from getdict.insertion import TextInserter
+except ImportError as exc:  # no display or unsupported platform
+    pytest.skip(f"pynput unavailable: {exc}", allow_module_level=True)
+
+
+class FakeController:
+    def __init__(self, clipboard):
+        self.clipboard = clipboard
+        self.typed = []
+        self.pasted = []
+
+    def type(self, text):
+        self.typed.append(text)
+
+    def pressed(self, *keys):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def press(self, key):
+        self.pasted.append(self.clipboard["value"])
+
+    def release(self, key):
+        pass
+
+
+@pytest.fixture
+def clipboard(monkeypatch):
+    state = {"value": "original"}
+    monkeypatch.setattr("getdict.insertion.pyperclip.copy", lambda text: state.update(value=text))
+    monkeypatch.setattr("getdict.insertion.pyperclip.paste", lambda: state["value"])
+    return state
+
+
+def _inserter(clipboard, **overrides):
+    settings = InsertionSettings(min_restore_delay_ms=10, max_restore_delay_ms=50, **overrides)
+    inserter = TextInserter(settings)
+    inserter._controller = FakeController(clipboard)
+    return inserter
+
+
+def test_short_text_is_typed(clipboard):
+    inserter = _inserter(clipboard)
+
+    result = inserter.insert("hello")
+
+    assert result.success and result.strategy is InsertionStrategy.TYPE
+    assert inserter._controller.typed == ["hello"]
+    assert clipboard["value"] == "original"
+
+
+def test_paste_restores_clipboard_in_background(clipboard):
+    inserter = _inserter(clipboard, type_max_chars=0)
+
+    first = inserter.insert("first dictation")
+    second = inserter.insert("second dictation")
+
+    assert first.strategy is second.strategy is InsertionStrategy.PASTE
+    assert inserter._controller.pasted == ["first dictation", "second dictation"]
+    assert clipboard["value"] == "second dictation"
+    deadline = time.monotonic() + 2
+    while clipboard["value"] != "original" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert clipboard["value"] == "original"
+
+
+def test_typing_waits_for_modifiers_to_be_released(clipboard):
+    released = threading.Event()
+    inserter = _inserter(clipboard)
+    inserter.keys_released = released.wait
+    threading.Timer(0.05, released.set).start()
+
+    started = time.monotonic()
+    result = inserter.insert("hello")
+
+    assert result.strategy is InsertionStrategy.TYPE and inserter._controller.typed == ["hello"]
+    assert time.monotonic() - started >= 0.04
+
+
+def test_text_is_pasted_when_modifiers_stay_down(clipboard, monkeypatch):
+    monkeypatch.setattr("getdict.insertion.KEY_RELEASE_TIMEOUT", 0.01)
+    inserter = _inserter(clipboard)
+    inserter.keys_released = threading.Event().wait
+
+    result = inserter.insert("hello")
+
+    assert result.strategy is InsertionStrategy.PASTE
+    assert inserter._controller.typed == [] and inserter._controller.pasted == ["hello"]
+
+
+def test_restore_never_comes_sooner_than_the_floor(clipboard):
+    inserter = _inserter(clipboard, type_max_chars=0)
+    inserter.insert("fast clipboard")
+    assert inserter.restore_delay >= 0.1
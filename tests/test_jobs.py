@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from getdict.jobs import DictationJob, JobQueue
+from getdict.models import JobStatus, RecordingResult, TranscriptionRequest, TranscriptionResult
+
+
+class DelayClient:
+    """Sleeps for the number of milliseconds encoded in the audio bytes."""
+
+    def transcribe(self, request: TranscriptionRequest) -> TranscriptionResult:
+        text = bytes(request.audio_data).decode()
+        time.sleep(int(text.split(":")[1]) / 1000)
+        return TranscriptionResult(text=text.split(":")[0], duration_seconds=0.0)
+
+
+def _recording(text: str, delay_ms: int, has_speech: bool = True) -> RecordingResult:
+    return RecordingResult(duration_seconds=1.0, data=f"{text}:{delay_ms}".encode(), has_speech=has_speech)
+
+
+def test_jobs_are_delivered_in_capture_order():
+    delivered = []
+    done = threading.Event()
+
+    def deliver(job: DictationJob) -> None:
+        delivered.append((job.sequence, job.transcription.text if job.transcription else None))
+        if len(delivered) == 3:
+            done.set()
+
+    client = DelayClient()
+    jobs = JobQueue(client=lambda: client, deliver=deliver, workers=3)
+    first = jobs.open_job()
+    second = jobs.open_job()
+    third = jobs.open_job()
+    jobs.close_job(first, _recording("slow", 150))
+    jobs.close_job(second, _recording("fast", 0))
+    jobs.close_job(third, _recording("silent", 0, has_speech=False))
+
+    assert done.wait(timeout=5)
+    assert delivered == [(1, "slow"), (2, "fast"), (3, None)]
+    assert [job.status for job in jobs.jobs()] == [JobStatus.DONE, JobStatus.DONE, JobStatus.EMPTY]
+    jobs.shutdown()
+
+
+def test_queue_refuses_jobs_beyond_capacity():
+    client = DelayClient()
+    jobs = JobQueue(client=lambda: client, deliver=lambda job: None, max_pending=1)
+    job = jobs.open_job()
+
+    assert job is not None
+    assert jobs.open_job() is None
+    jobs.cancel_job(job)
+    deadline = time.monotonic() + 5
+    while jobs.depth and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert jobs.open_job() is not None
+    jobs.shutdown()
+
+
+def test_resize_applies_to_new_jobs_and_lets_open_ones_finish():
+    delivered = threading.Event()
+    client = DelayClient()
+    jobs = JobQueue(client=lambda: client, deliver=lambda job: delivered.set(), workers=1, max_pending=1)
+    job = jobs.open_job()
+    old_executor = job.executor
+
+    jobs.resize(workers=3, max_pending=2)
+
+    second = jobs.open_job()
+    assert second is not None and second.executor is not old_executor
+    assert second.executor._max_workers == 3
+    # The open job can still add segments to the pool it started on.
+    jobs.close_job(job, _recording("kept", 0))
+    assert delivered.wait(timeout=5)
+    jobs.cancel_job(second)
+    deadline = time.monotonic() + 5
+    while (jobs.depth or not old_executor._shutdown) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert old_executor._shutdown
+    assert [info.status for info in jobs.jobs()] == [JobStatus.DONE, JobStatus.CANCELLED]
+    jobs.shutdown()
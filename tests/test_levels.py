@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from getdict.levels import LevelMeter
+
+RATE = 16000
+
+
+def _tone(frequency: float, seconds: float, amplitude: float = 0.5) -> np.ndarray:
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def test_frames_are_batched_at_display_rate():
+    meter = LevelMeter(RATE)
+    tone = _tone(200, 1.0)
+
+    frames = []
+    for block in np.array_split(tone, 37):
+        frames.extend(meter.feed(block))
+
+    assert len(frames) == RATE // meter.frame_length == 30
+
+
+@pytest.mark.parametrize("frequency, band", [(200, 0), (1000, 1), (4000, 2)])
+def test_tone_energy_lands_in_its_band(frequency, band):
+    frame = LevelMeter(RATE).feed(_tone(frequency, 0.1))[-1]
+
+    assert frame.rms == pytest.approx(0.5 / np.sqrt(2), rel=0.02)
+    assert frame.bands[band] == pytest.approx(frame.rms, rel=0.1)
+    assert sum(frame.bands) - frame.bands[band] < 0.1 * frame.rms
+
+
+def test_int16_stereo_input_is_normalised():
+    stereo = np.repeat((_tone(1000, 0.1) * 32767).astype(np.int16)[:, None], 2, axis=1)
+
+    frame = LevelMeter(RATE).feed(stereo)[0]
+
+    assert frame.rms == pytest.approx(0.5 / np.sqrt(2), rel=0.02)
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import json
+
+from getdict.metrics import JSONL_FILE_NAME, PROMETHEUS_FILE_NAME, MetricsRegistry, Timeline
+
+
+def _timeline(sequence: int, offset: float) -> Timeline:
+    timeline = Timeline(sequence)
+    for stage, at in (("hotkey", 0.0), ("stream_opened", 0.05), ("stop", 2.0), ("encoded", 2.01), ("pasted", 2.5 + offset)):
+        timeline.mark(stage, 100.0 + at)
+    return timeline
+
+
+def test_timeline_intervals_skip_missing_stages():
+    intervals = _timeline(1, 0.0).intervals()
+
+    assert round(intervals["device_open"], 3) == 0.05
+    assert round(intervals["release_to_paste"], 3) == 0.5
+    assert "transcribe" not in intervals
+
+
+def test_registry_exports_percentiles(tmp_path):
+    registry = MetricsRegistry(tmp_path, window=10)
+    for index in range(100):
+        registry.record(_timeline(index, index / 100))
+
+    summary = registry.summary()["release_to_paste"]
+    assert summary["count"] == 100
+    assert summary["p50"] < summary["p95"] <= summary["p99"] < 1.5
+
+    lines = (tmp_path / JSONL_FILE_NAME).read_text().splitlines()
+    assert len(lines) == 100
+    assert json.loads(lines[0])["marks"]["hotkey"] == 0.0
+    prometheus = (tmp_path / PROMETHEUS_FILE_NAME).read_text()
+    assert 'getdict_stage_latency_seconds_count{stage="total"} 100' in prometheus
+    assert 'stage="release_to_paste",quantile="0.95"' in prometheus
+
+
+def test_registry_tracks_encode_cost_per_codec(tmp_path):
+    registry = MetricsRegistry(tmp_path)
+    timeline = _timeline(1, 0.0)
+    timeline.codec = "opus"
+    timeline.audio_bytes = 30_000
+    timeline.encode_seconds = 0.12
+    registry.record(timeline)
+
+    assert registry.summary()["encode_cpu_opus"]["count"] == 1
+    record = json.loads((tmp_path / JSONL_FILE_NAME).read_text())
+    assert (record["codec"], record["audio_bytes"], record["encode_seconds"]) == ("opus", 30_000, 0.12)
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from getdict.resample import StreamingResampler
+
+
+def _tone(frequency: float, rate: int, seconds: float = 1.0, channels: int = 2) -> np.ndarray:
+    t = np.arange(int(rate * seconds)) / rate
+    mono = (0.5 * 32767 * np.sin(2 * np.pi * frequency * t)).astype(np.int16)
+    return np.repeat(mono[:, None], channels, axis=1)
+
+
+def _level(samples: np.ndarray) -> float:
+    middle = samples[len(samples) // 8 : -len(samples) // 8, 0].astype(np.float64)
+    return float(np.sqrt(np.mean(np.square(middle))) / (0.5 * 32767 / np.sqrt(2)))
+
+
+@pytest.mark.parametrize("rate", [44100, 48000, 8000])
+def test_resamples_and_downmixes_to_16k_mono_int16(rate):
+    output = StreamingResampler(rate, 16000, in_channels=2).process(_tone(1000, rate))
+
+    assert output.dtype == np.int16
+    assert output.shape == (16000, 1)
+    spectrum = np.abs(np.fft.rfft(output[:, 0] * np.hanning(len(output))))
+    assert np.argmax(spectrum) == 1000
+    assert _level(output) == pytest.approx(1.0, abs=0.02)
+
+
+def test_streaming_matches_one_shot():
+    samples = _tone(440, 44100)
+    resampler = StreamingResampler(44100, 16000, in_channels=2)
+    whole = resampler.process(samples)
+    resampler.reset()
+    blocks = [resampler.process(block) for block in np.array_split(samples, 97)]
+    # Single-frame blocks exercise calls that produce no output.
+    resampler.reset()
+    single = [resampler.process(samples[index : index + 1]) for index in range(2000)]
+
+    assert np.array_equal(np.concatenate(blocks), whole)
+    assert np.array_equal(np.concatenate(single), whole[: sum(len(part) for part in single)])
+
+
+def test_removes_content_above_the_output_nyquist():
+    output = StreamingResampler(48000, 16000, in_channels=1).process(_tone(11000, 48000, channels=1))
+
+    assert _level(output) < 0.01
+
+
+def test_passthrough_keeps_int16_blocks_and_converts_float():
+    resampler = StreamingResampler(16000, 16000, in_channels=1)
+    block = _tone(440, 16000, channels=1)
+    assert resampler.process(block) is block
+
+    converted = resampler.process(block.astype(np.float32) / 32768)
+    assert converted.dtype == np.int16
+    assert np.abs(converted.astype(np.int32) - block).max() <= 1
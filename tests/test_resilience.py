@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from getdict import resilience
+from getdict.models import CircuitOpenError, RetryableError, TranscriptionError
+from getdict.resilience import CircuitBreaker, CircuitState, ResilientCaller, parse_retry_after
+from getdict.settings import TranscriptionSettings
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _caller(**settings) -> tuple[ResilientCaller, list]:
+    sleeps = []
+    caller = ResilientCaller(TranscriptionSettings(**settings), sleep=sleeps.append)
+    return caller, sleeps
+
+
+def _failing(errors):
+    errors = list(errors)
+
+    def send():
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    return send
+
+
+def test_parse_retry_after_formats():
+    assert parse_retry_after({"retry-after-ms": "1500"}) == 1.5
+    assert parse_retry_after({"retry-after": "7"}) == 7.0
+    assert parse_retry_after({"retry-after": "Wed, 21 Oct 2015 07:28:10 GMT"}, now=1445412480.0) == 10.0
+    assert parse_retry_after({"retry-after": "soon"}) is None
+    assert parse_retry_after({}) is None
+
+
+def test_retry_after_is_honoured_and_refused_errors_are_not_retried():
+    caller, sleeps = _caller()
+    assert caller.call(_failing([RetryableError("429", retry_after=2.5)])) == "ok"
+    assert sleeps == [2.5]
+
+    with pytest.raises(TranscriptionError, match="bad audio"):
+        caller.call(_failing([TranscriptionError("bad audio")]))
+    assert sleeps == [2.5]
+
+    with pytest.raises(TranscriptionError, match="after 1 attempt"):
+        caller.call(_failing([RetryableError("429", retry_after=600)]))
+    assert caller.stats()["retries"] == 1
+
+
+def test_circuit_opens_then_probes_after_reset():
+    clock = Clock()
+    breaker = CircuitBreaker(failures=2, reset_seconds=30, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state is CircuitState.OPEN and not breaker.allow()
+
+    clock.now = 31
+    assert breaker.allow()
+    assert not breaker.allow()  # one probe at a time
+    breaker.record_failure()
+    assert breaker.state is CircuitState.OPEN
+
+    clock.now = 62
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state is CircuitState.CLOSED
+
+
+def test_open_circuit_fails_fast():
+    caller, sleeps = _caller(breaker_failures=2, max_attempts=5)
+    with pytest.raises(CircuitOpenError):
+        caller.call(_failing([OSError("down")] * 5))
+    assert len(sleeps) == 1
+
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        caller.call(lambda: calls.append(1) or "ok")
+    assert not calls
+    assert caller.stats()["rejected"] == 1
+    assert caller.stats()["circuit_opened"] == 1
+
+
+def test_slow_request_is_hedged_and_backup_wins(monkeypatch):
+    monkeypatch.setattr(resilience, "HEDGE_MIN_SAMPLES", 3)
+    caller, _ = _caller(hedge_min_delay_ms=10)
+    for _ in range(20):
+        caller.latency.observe(0.001, 0)
+    release = threading.Event()
+    calls = []
+
+    def send():
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(5)
+            return "slow"
+        return "fast"
+
+    try:
+        assert caller.call(send) == "fast"
+        stats = caller.stats()
+        assert stats["hedged"] == 1 and stats["hedge_wins"] == 1
+        assert stats["hedge_rate"] == 1.0
+        # Over the hedge budget, the next slow request is simply awaited.
+        calls.clear()
+        release.clear()
+        threading.Timer(0.1, release.set).start()
+        assert caller.call(send) == "slow"
+        assert caller.stats()["hedged"] == 1
+    finally:
+        release.set()
+        caller.close()
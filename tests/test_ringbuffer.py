@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import threading
+
+import numpy as np
+
+from getdict.ringbuffer import RingBuffer
+
+
+def _drain(buffer: RingBuffer) -> np.ndarray:
+    return np.concatenate([view.copy() for view in buffer.drain()])
+
+
+def test_drain_releases_frames():
+    buffer = RingBuffer(capacity=8, channels=1, dtype="int16")
+    buffer.write(np.arange(6, dtype=np.int16).reshape(-1, 1))
+    assert _drain(buffer)[:, 0].tolist() == [0, 1, 2, 3, 4, 5]
+    assert buffer.available == 0
+
+
+def test_wraparound_returns_two_views():
+    buffer = RingBuffer(capacity=8, channels=1, dtype="int16")
+    buffer.write(np.zeros((6, 1), dtype=np.int16))
+    _drain(buffer)
+    buffer.write(np.arange(6, dtype=np.int16).reshape(-1, 1))
+    views = [view.copy() for view in buffer.drain()]
+    assert [len(view) for view in views] == [2, 4]
+    assert np.concatenate(views)[:, 0].tolist() == [0, 1, 2, 3, 4, 5]
+
+
+def test_overrun_drops_block_and_counts():
+    buffer = RingBuffer(capacity=4, channels=2, dtype="float32")
+    assert buffer.write(np.ones((3, 2), dtype=np.float32))
+    assert not buffer.write(np.ones((3, 2), dtype=np.float32))
+    assert buffer.overruns == 1
+    assert buffer.dropped_frames == 3
+    assert buffer.available == 3
+
+
+def test_consumer_receives_all_frames_until_closed():
+    buffer = RingBuffer(capacity=64, channels=1, dtype="int16")
+    received = []
+
+    def consume() -> None:
+        while buffer.wait():
+            for view in buffer.drain():
+                received.extend(view[:, 0].tolist())
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    expected = []
+    for start in range(0, 4000, 16):
+        block = np.arange(start, start + 16, dtype=np.int16).reshape(-1, 1)
+        while not buffer.write(block):
+            threading.Event().wait(0.001)
+        buffer.overruns = buffer.dropped_frames = 0
+        expected.extend(block[:, 0].tolist())
+    buffer.close()
+    consumer.join(timeout=5)
+
+    assert not consumer.is_alive()
+    assert received == expected
+
+
+def test_overwrite_mode_keeps_latest_frames_as_preroll():
+    buffer = RingBuffer(capacity=8, channels=1, dtype="int16")
+    buffer.overwrite()
+    for start in range(0, 20, 3):
+        assert buffer.write(np.arange(start, start + 3, dtype=np.int16).reshape(-1, 1))
+    assert buffer.overruns == 0
+
+    buffer.begin_capture(preroll=4)
+    buffer.write(np.array([[100], [101]], dtype=np.int16))
+    buffer.close()
+    buffer.write(np.array([[200]], dtype=np.int16))
+
+    assert buffer.wait()
+    assert _drain(buffer)[:, 0].tolist() == [17, 18, 19, 20, 100, 101]
+    assert not buffer.wait()
+    buffer.overwrite()
+    buffer.begin_capture(preroll=1)
+    assert _drain(buffer)[:, 0].tolist() == [200]
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from getdict.models import RecordingResult, TranscriptionRequest, TranscriptionResult
+from getdict.segments import SegmentedTranscription, join_segments
+
+
+class SlowFirstClient:
+    def transcribe(self, request: TranscriptionRequest) -> TranscriptionResult:
+        name = request.audio_path.stem
+        if name == "segment0":
+            time.sleep(0.05)
+        return TranscriptionResult(text=f" {name} ", duration_seconds=0.01)
+
+
+def test_segments_join_in_capture_order(tmp_path):
+    paths = []
+    for index in range(3):
+        path = tmp_path / f"segment{index}.flac"
+        path.write_bytes(b"audio")
+        paths.append(path)
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        session = SegmentedTranscription(SlowFirstClient(), executor)
+        for index, path in enumerate(paths):
+            session.submit(RecordingResult(duration_seconds=1.0, path=path, index=index))
+        result = session.result()
+        assert all(path.exists() for path in paths)
+        session.discard()
+
+    assert result.text == "segment0 segment1 segment2"
+    assert not any(Path(path).exists() for path in paths)
+
+
+def test_join_segments_skips_empty_text():
+    assert join_segments(["Hello", "  ", "world. "]) == "Hello world."
+
+
+class EchoDataClient:
+    def transcribe(self, request: TranscriptionRequest) -> TranscriptionResult:
+        assert request.audio_path is None
+        return TranscriptionResult(text=bytes(request.audio_data).decode(), duration_seconds=0.0)
+
+
+def test_in_memory_segments_are_uploaded_from_buffer():
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        session = SegmentedTranscription(EchoDataClient(), executor)
+        session.submit(RecordingResult(duration_seconds=1.0, data=memoryview(b"first")))
+        session.submit(RecordingResult(duration_seconds=1.0, data=b"second", index=1))
+        assert session.result().text == "first second"
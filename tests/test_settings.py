@@ -30,3 +30,11 @@ def test_settings_roundtrip(tmp_path, monkeypatch):
     assert loaded.api_key == "test-key"
     assert loaded.hotkey.modifier == "ctrl+shift"
     assert loaded.hotkey.key == "space"
+
+
+def test_optional_hotkeys_are_off_unless_configured():
+    assert Settings().cancel_hotkey is None and Settings().toggle_hotkey is None
+    hotkey = {"modifier": "ctrl+alt", "key": "space"}
+    assert Settings._from_dict({"hotkey": hotkey}).cancel_hotkey is None
+    configured = Settings._from_dict({"hotkey": hotkey, "cancel_hotkey": {"modifier": "", "key": "esc"}})
+    assert configured.cancel_hotkey is not None and configured.cancel_hotkey.key == "esc"
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+
+from getdict.models import RecordingResult, RetryableError, TranscriptionError, TranscriptionRequest, TranscriptionResult
+from getdict.spool import Spool, SpoolDrainer
+
+
+class FlakyClient:
+    is_configured = True
+
+    def __init__(self, failures: int) -> None:
+        self.failures = failures
+
+    def transcribe(self, request: TranscriptionRequest) -> TranscriptionResult:
+        if self.failures:
+            self.failures -= 1
+            raise RetryableError("service unavailable")
+        audio = request.audio_path.read_bytes()
+        if audio == b"corrupt":
+            raise TranscriptionError("Transcription rejected (400): could not decode audio")
+        return TranscriptionResult(text=audio.decode(), duration_seconds=0.0)
+
+
+def test_spool_is_content_addressed(tmp_path):
+    spool = Spool(tmp_path / "spool")
+    audio = tmp_path / "segment.flac"
+    audio.write_bytes(b"second")
+    recordings = [
+        RecordingResult(duration_seconds=1.0, data=memoryview(b"first")),
+        RecordingResult(duration_seconds=1.0, path=audio),
+    ]
+
+    entry = spool.put(recordings, reason="offline")
+    again = spool.put(recordings, reason="offline")
+
+    assert entry.entry_id == again.entry_id
+    assert len(spool.entries()) == 1
+    assert len(list((tmp_path / "spool" / "blobs").iterdir())) == 2
+    assert [request.audio_path.read_bytes() for request in spool.requests(entry)] == [b"first", b"second"]
+
+
+def test_drainer_replays_after_recovery(tmp_path, monkeypatch):
+    monkeypatch.setattr("getdict.spool.INITIAL_BACKOFF", 0.01)
+    spool = Spool(tmp_path / "spool")
+    spool.put([RecordingResult(duration_seconds=1.0, data=b"hello"), RecordingResult(duration_seconds=1.0, data=b"world")])
+    spool.put([RecordingResult(duration_seconds=1.0, data=b"again")])
+    client = FlakyClient(failures=1)
+    results = []
+    finished = threading.Event()
+
+    def on_result(result):
+        results.append(result.text)
+        if len(results) == 2:
+            finished.set()
+
+    drainer = SpoolDrainer(spool, client=lambda: client, on_result=on_result)
+    drainer.start()
+
+    assert finished.wait(timeout=5)
+    drainer.stop()
+    assert sorted(results) == ["again", "hello world"]
+    assert spool.entries() == []
+    assert list((tmp_path / "spool" / "blobs").iterdir()) == []
+    assert sorted(result.text for result in spool.results()) == ["again", "hello world"]
+    spool.dismiss(spool.results()[0].result_id)
+    assert len(spool.results()) == 1
+
+
+def test_corrupt_head_entry_is_quarantined_without_blocking_the_next(tmp_path):
+    spool = Spool(tmp_path / "spool")
+    corrupt = spool.put([RecordingResult(duration_seconds=1.0, data=b"corrupt")], reason="offline")
+    time.sleep(0.01)
+    spool.put([RecordingResult(duration_seconds=1.0, data=b"fine")], reason="offline")
+    results = []
+    failed = []
+    finished = threading.Event()
+
+    def on_failed(entry, location):
+        failed.append((entry.entry_id, location))
+        finished.set()
+
+    drainer = SpoolDrainer(
+        spool, client=lambda: FlakyClient(failures=0), on_result=lambda result: results.append(result.text), on_failed=on_failed
+    )
+    drainer.start()
+
+    assert finished.wait(timeout=5)
+    drainer.stop()
+    assert results == ["fine"]
+    assert spool.entries() == []
+    assert failed == [(corrupt.entry_id, tmp_path / "spool" / "failed" / corrupt.entry_id)]
+    manifest = json.loads((failed[0][1] / "entry.json").read_text())
+    assert manifest["attempts"] == 1 and "could not decode" in manifest["reason"]
+    assert [path.read_bytes() for path in failed[0][1].iterdir() if path.name != "entry.json"] == [b"corrupt"]
+    assert list((tmp_path / "spool" / "blobs").iterdir()) == []
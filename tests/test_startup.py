@@ -0,0 +1,35 @@
+import io
+import sys
+
+from getdict.startup import StartupProfiler
+
+
+def test_profiler_records_phases_and_first_imports():
+    sys.modules.pop("json.tool", None)
+    profiler = StartupProfiler(enabled=True)
+    profiler.install()
+    with profiler.phase("load"):
+        import json.tool  # noqa: F401
+    profiler.mark("ready")
+    stream = io.StringIO()
+    profiler.report(stream)
+
+    output = stream.getvalue()
+    assert "load [MainThread]" in output
+    assert "ready [MainThread]" in output
+    assert "json.tool" in output
+    assert profiler._original_import is None
+
+
+def test_disabled_profiler_does_not_hook_imports():
+    import builtins
+
+    original = builtins.__import__
+    profiler = StartupProfiler()
+    profiler.install()
+    with profiler.phase("load"):
+        pass
+    stream = io.StringIO()
+    profiler.report(stream)
+    assert builtins.__import__ is original
+    assert stream.getvalue() == ""
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from getdict import backends
+from getdict.backends import LocalBackend, StubBackend, TranscriptionBackend
+from getdict.models import TranscriptionError, TranscriptionRequest
+from getdict.settings import Settings
+from getdict.transcription import TranscriptionClient
+
+
+def _settings(provider: str, **transcription) -> Settings:
+    settings = Settings()
+    settings.transcription.provider = provider
+    for name, value in transcription.items():
+        setattr(settings.transcription, name, value)
+    return settings
+
+
+def test_stub_backend_is_deterministic():
+    client = TranscriptionClient(_settings("stub"))
+    request = TranscriptionRequest(audio_data=b"same audio")
+
+    first = client.transcribe(request)
+    second = client.transcribe(TranscriptionRequest(audio_data=memoryview(b"same audio")))
+
+    assert client.is_configured
+    assert isinstance(client.backend, StubBackend)
+    assert first.text == second.text
+    assert first.text.startswith("stub-")
+
+
+def test_stub_backend_returns_configured_text(tmp_path):
+    audio = tmp_path / "clip.flac"
+    audio.write_bytes(b"data")
+    client = TranscriptionClient(_settings("stub", stub_text="hello world"))
+
+    assert client.transcribe(TranscriptionRequest(audio_path=audio)).text == "hello world"
+
+
+def test_openai_backend_requires_api_key():
+    client = TranscriptionClient(_settings("openai"))
+
+    assert not client.is_configured
+    with pytest.raises(TranscriptionError):
+        client.transcribe(TranscriptionRequest(audio_data=b"x"))
+
+
+def test_unknown_provider_is_rejected():
+    with pytest.raises(TranscriptionError):
+        TranscriptionClient(_settings("carrier-pigeon"))
+
+
+def test_backends_must_implement_transcribe():
+    class Incomplete(TranscriptionBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete(_settings("stub"))
+
+
+def test_local_backend_starts_loading_on_warm_up(monkeypatch):
+    loaded = threading.Event()
+    monkeypatch.setattr(backends, "_load_local_model", lambda settings: loaded.set() or object())
+    monkeypatch.setattr(backends.LocalBackend, "_start_worker", lambda self: pytest.fail("worker spawned"))
+
+    backend = LocalBackend(_settings("local", local_in_process=True))
+    assert not loaded.wait(0.1)
+
+    backend.warm_up()
+    backend.warm_up()
+    assert loaded.wait(5)
+    assert backend._loader is not None
+    backend.close()
+
+    # The worker process is only spawned once something asks for it.
+    LocalBackend(_settings("local")).close()
+
+
+def test_local_backend_loads_model_once(monkeypatch):
+    loads = []
+    release = threading.Event()
+
+    def fake_load(settings):
+        release.wait(timeout=5)
+        loads.append(settings.local_model)
+        return object()
+
+    def fake_run(model, audio, language, temperature, prompt):
+        return f"{len(audio)} bytes"
+
+    monkeypatch.setattr(backends, "_load_local_model", fake_load)
+    monkeypatch.setattr(backends, "_run_local_model", fake_run)
+    backend = LocalBackend(_settings("local", local_in_process=True))
+    release.set()
+
+    assert backend.transcribe(TranscriptionRequest(audio_data=b"abc")) == "3 bytes"
+    assert backend.transcribe(TranscriptionRequest(audio_data=b"abcd")) == "4 bytes"
+    assert loads == ["base"]
+    backend.close()
+
+
+def test_reconfigure_keeps_backend_unless_endpoint_changes():
+    settings = _settings("openai")
+    settings.api_key = "key-1"
+    client = TranscriptionClient(settings)
+    backend = client.backend
+
+    settings.transcription.model = "whisper-2"
+    settings.transcription.temperature = 0.2
+    client.reconfigure()
+    assert client.backend is backend
+
+    settings.transcription.api_base_url = "http://localhost:9000/v1"
+    client.reconfigure()
+    assert client.backend is not backend
+    client.close()
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import numpy as np
+
+from getdict.settings import AudioSettings
+from getdict.vad import SpeechGate, VoiceActivityDetector
+
+RATE = 16000
+
+
+def _tone(seconds: float, amplitude: float = 0.3) -> np.ndarray:
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32).reshape(-1, 1)
+
+
+def _silence(seconds: float) -> np.ndarray:
+    return np.zeros((int(RATE * seconds), 1), dtype=np.float32)
+
+
+def _run(gate: SpeechGate, signal: np.ndarray, block: int = 1024) -> int:
+    kept = 0
+    for start in range(0, len(signal), block):
+        kept += sum(len(part) for part in gate.feed(signal[start : start + block]))
+    kept += sum(len(part) for part in gate.finish())
+    return kept
+
+
+def test_gate_trims_leading_and_trailing_silence():
+    settings = AudioSettings(vad_padding_ms=100)
+    signal = np.concatenate([_silence(1.0), _tone(0.5), _silence(0.3), _tone(0.5), _silence(1.0)])
+    gate = SpeechGate(settings)
+
+    kept = _run(gate, signal)
+
+    assert gate.has_speech
+    padding = int(RATE * 0.1)
+    expected = int(RATE * 1.3) + 2 * padding
+    assert abs(kept - expected) <= VoiceActivityDetector(settings).frame_length * 2
+
+
+def test_gate_rejects_silence_and_short_clicks():
+    gate = SpeechGate(AudioSettings())
+    signal = np.concatenate([_silence(0.5), _tone(0.03), _silence(0.5)])
+
+    assert _run(gate, signal) < int(RATE * 0.6)
+    assert not gate.has_speech
+
+
+def test_gate_without_trim_passes_everything_through():
+    gate = SpeechGate(AudioSettings(), trim=False)
+    signal = np.concatenate([_silence(0.5), _tone(0.5), _silence(0.7)])
+
+    assert _run(gate, signal) == len(signal)
+    assert gate.trailing_silence >= int(RATE * 0.65)
+
+
+def test_zero_crossing_rule_detects_quiet_fricatives():
+    rng = np.random.default_rng(0)
+    hiss = (rng.uniform(-1, 1, 480 * 30) * 0.012).astype(np.float32)
+    plain = VoiceActivityDetector(AudioSettings())
+    with_zcr = VoiceActivityDetector(AudioSettings(vad_zero_crossing=True))
+
+    assert not plain.speech_mask(hiss).any()
+    assert with_zcr.speech_mask(hiss).all()
+
+
+def test_int16_samples_are_normalised():
+    detector = VoiceActivityDetector(AudioSettings())
+    loud = (_tone(0.1) * 32767).astype(np.int16)
+
+    assert detector.speech_mask(loud).all()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+import os
+import pickle
+
+from getdict import vocabulary
+from getdict.vocabulary import Automaton, Vocabulary, parse_vocabulary
+
+VOCABULARY = """
+# product names
+Kubernetes
+k8s | kates => Kubernetes
+new york => New York
+new york city => NYC
+.net => .NET
+"""
+
+
+def test_parse_vocabulary_lines():
+    assert parse_vocabulary("# c\n\nPyTorch\nk8s |  kates =>  Kubernetes\ntwo   words => 2w\n") == [
+        ("PyTorch", "PyTorch"),
+        ("k8s", "Kubernetes"),
+        ("kates", "Kubernetes"),
+        ("two words", "2w"),
+    ]
+
+
+def test_replacements_respect_word_boundaries_and_prefer_longest():
+    automaton = Automaton(parse_vocabulary(VOCABULARY))
+    assert automaton.replace("Deploy KATES with k8s in new york city, not new york.") == (
+        "Deploy Kubernetes with Kubernetes in NYC, not New York."
+    )
+    assert automaton.replace("k8sx kubernetesy xk8s") == "k8sx kubernetesy xk8s"
+    assert automaton.replace("use .net, asp.net") == "use .NET, asp.NET"
+    assert automaton.replace("İstanbul runs kubernetes") == "İstanbul runs Kubernetes"
+
+
+def test_overlapping_patterns_fall_back_through_failure_links():
+    automaton = Automaton([("he", "HE"), ("she", "SHE"), ("hers", "HERS"), ("his", "HIS")])
+    assert automaton.replace("she said hers and his, ushers") == "SHE said HERS and HIS, ushers"
+
+
+def test_vocabulary_is_cached_and_rebuilt_when_the_file_changes(tmp_path, monkeypatch):
+    path = tmp_path / "vocabulary.txt"
+    path.write_text("k8s => Kubernetes\n", encoding="utf-8")
+    builds = []
+    original = vocabulary.parse_vocabulary
+    monkeypatch.setattr(vocabulary, "parse_vocabulary", lambda text: builds.append(text) or original(text))
+
+    assert Vocabulary(path).apply("k8s") == "Kubernetes"
+    assert Vocabulary(path).apply("k8s") == "Kubernetes"
+    assert len(builds) == 1
+    assert (tmp_path / ".vocabulary.txt.cache").exists()
+
+    live = Vocabulary(path)
+    path.write_text("k8s => K8s\n", encoding="utf-8")
+    os.utime(path, ns=(1, 1))
+    assert live.apply("k8s") == "K8s"
+    assert len(builds) == 2
+
+    path.unlink()
+    assert live.apply("k8s") == "k8s"
+
+
+def test_tampered_cache_is_rejected_without_running_anything(tmp_path):
+    path = tmp_path / "vocabulary.txt"
+    path.write_text("k8s => Kubernetes\n", encoding="utf-8")
+    cache = tmp_path / ".vocabulary.txt.cache"
+    marker = tmp_path / "pwned"
+    # A pickle that would create ``marker`` if it were unpickled.
+    cache.write_bytes(pickle.dumps(_Exploit(str(marker))))
+    assert Vocabulary(path).apply("k8s") == "Kubernetes"
+    assert not marker.exists()
+
+    stat = path.stat()
+    header = {"version": vocabulary.CACHE_VERSION, "path": str(path), "source": [stat.st_size, stat.st_mtime_ns]}
+    tables = Automaton(parse_vocabulary("k8s => Kubernetes\n")).tables()
+    tables["fail"] = [99] * len(tables["fail"])
+    cache.write_text(json.dumps({"header": header, "tables": tables}), encoding="utf-8")
+    assert Vocabulary(path).apply("k8s") == "Kubernetes"
+
+    cache.write_text("[" * 100000, encoding="utf-8")
+    assert Vocabulary(path).apply("k8s") == "Kubernetes"
+
+
+class _Exploit:
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def __reduce__(self):
+        return (open, (self.path, "w"))